@@ -0,0 +1,400 @@
+""" Benchmark suite for the PLEASE loaders, I(V) extraction, and smoothing
+
+Synthetic LEEM and LEED data sets are generated in every supported format
+(see synthetic.py) and the hot paths of PLEASE are timed at several data
+set sizes. For each benchmark the best and median wall time over a number
+of repeats, the throughput, and the peak memory allocated while it runs are
+reported. Peak memory is measured with tracemalloc in a separate, untimed
+run so that tracing does not slow down the timings.
+
+Only the standard library and the packages PLEASE already depends on are
+used. Run from the repository root:
+
+    python benchmarks/run_benchmarks.py                  # small and medium
+    python benchmarks/run_benchmarks.py --sizes large --filter smooth
+    python benchmarks/run_benchmarks.py --json before.json
+    python benchmarks/run_benchmarks.py --compare before.json
+
+--compare prints the speedup of every benchmark relative to a previous
+--json run, so the effect of a change can be measured on the same machine.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import synthetic
+
+# Benchmark both the legacy GUI modules in source/ and the please package.
+# source/please.py would shadow the please package, so source/ goes last.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, ROOT)
+sys.path.append(os.path.join(ROOT, 'source'))
+
+import integral  # noqa: E402
+import LEEMFUNCTIONS as LF  # noqa: E402
+import roi  # noqa: E402
+from bline import LineProfiles, bline  # noqa: E402
+from please.io.readers import read_image_data, read_raw_data  # noqa: E402
+
+try:
+    from qthreads import WorkerThread  # noqa: E402
+except ImportError:
+    WorkerThread = None  # PyQt5 is not installed
+
+#: (height, width, number of images) of the synthetic data sets
+SIZES = {
+    'tiny': (64, 64, 8),
+    'small': (256, 256, 64),
+    'medium': (512, 512, 128),
+    'large': (1024, 1024, 256),
+}
+
+MB = 2 ** 20
+
+#: number of curves smoothed one at a time by LF.smooth
+NUM_CURVES = 2000
+
+#: number of square windows, and their radius, for window I(V) sums
+NUM_WINDOWS = 32
+WINDOW_RADIUS = 20
+
+
+class Benchmark(NamedTuple):
+    """ A single timed operation on one synthetic data set """
+
+    #: Name of the benchmark, including the data format where relevant
+    name: str
+
+    #: Function to time; called with no arguments
+    func: Callable[[], object]
+
+    #: Amount of work done by one call, in units of `unit`
+    work: float
+
+    #: Unit of throughput, e.g. 'MB/s' or 'curves/s'
+    unit: str
+
+    #: Optional function called before every call of func, not timed
+    setup: Optional[Callable[[], object]] = None
+
+
+class Result(NamedTuple):
+    """ Timings of a benchmark """
+
+    name: str
+    size: str
+    best: float
+    median: float
+    throughput: float
+    unit: str
+    peak_mb: float
+
+
+def quiet(func: Callable[[], object]) -> Callable[[], object]:
+    """ Wrap a function so that anything it prints is discarded """
+    def wrapped():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return wrapped
+
+
+def loader_benchmarks(
+        data: Dict[int, np.ndarray],
+        shape: Tuple[int, int, int],
+        workdir: str,
+        formats: List[str]
+) -> List[Benchmark]:
+    """ Benchmarks reading a data set written in each format """
+    height, width, num = shape
+    benchmarks = []
+    for fmt in formats:
+        container, bits, byteorder = synthetic.parse_format(fmt)
+        path = os.path.join(workdir, fmt)
+        file_paths = synthetic.write_stack(data[bits], path, fmt)
+        megabytes = data[bits].nbytes / MB
+        if container == 'raw':
+            benchmarks.append(Benchmark(
+                f'process_LEEM_Data[{fmt}]',
+                quiet(lambda path=path, bits=bits, byteorder=byteorder:
+                      LF.process_LEEM_Data(path, height, width, bits,
+                                           byteorder)),
+                megabytes, 'MB/s'
+            ))
+            benchmarks.append(Benchmark(
+                f'read_raw_data[{fmt}]',
+                lambda paths=file_paths, bits=bits, byteorder=byteorder: [
+                    read_raw_data(p, height, width, bits, byteorder)
+                    for p in paths
+                ],
+                megabytes, 'MB/s'
+            ))
+        else:
+            benchmarks.append(Benchmark(
+                f'get_img_array[{fmt}]',
+                quiet(lambda path=path, fmt=fmt:
+                      LF.get_img_array(path, ext=synthetic.extension(fmt))),
+                megabytes, 'MB/s'
+            ))
+            benchmarks.append(Benchmark(
+                f'read_image_data[{fmt}]',
+                lambda paths=file_paths: [read_image_data(p) for p in paths],
+                megabytes, 'MB/s'
+            ))
+    return benchmarks
+
+
+def smoothing_benchmarks(data: np.ndarray) -> List[Benchmark]:
+    """ Benchmarks smoothing single I(V) curves and the full data set """
+    height, width, num = data.shape
+    curves = data.reshape(-1, num)[:NUM_CURVES]
+    benchmarks = [
+        Benchmark(
+            'LF.smooth',
+            lambda: [LF.smooth(curve, window_len=10, window_type='hanning')
+                     for curve in curves],
+            len(curves), 'curves/s'
+        ),
+        Benchmark(
+            'LF.smooth_cube',
+            lambda: LF.smooth_cube(data, window_len=10,
+                                   window_type='hanning'),
+            height * width, 'curves/s'
+        ),
+    ]
+    if WorkerThread is not None:
+        thread = WorkerThread(task='SMOOTH', data=data, window_len=10,
+                              window_type='hanning')
+        benchmarks.append(Benchmark(
+            'WorkerThread.smooth', thread.smooth, height * width, 'curves/s'
+        ))
+    return benchmarks
+
+
+def extraction_benchmarks(data: np.ndarray) -> List[Benchmark]:
+    """ Benchmarks line profiles and the average intensity of windows """
+    height, width, num = data.shape
+    rng = np.random.default_rng(1)
+    # lines from the centre of the image to points along each edge
+    ends = [(x, 0) for x in range(0, width, 4)] + \
+           [(width - 1, y) for y in range(0, height, 4)]
+    lines = [((width // 2, height // 2), end) for end in ends]
+    points = sum(max(abs(x - width // 2), abs(y - height // 2)) + 1
+                 for x, y in ends)
+    radius = min(WINDOW_RADIUS, height // 4, width // 4)
+    centers = rng.integers(radius, [width - radius, height - radius],
+                           size=(NUM_WINDOWS, 2))
+    rois = [roi.RectROI.from_center(int(x), int(y), radius)
+            for x, y in centers]
+    table = integral.SummedAreaTable(data)
+
+    def query_table():
+        if not table.built:
+            table.build()
+        return roi.extract_iv(data, rois, table=table)
+
+    return [
+        Benchmark(
+            'bline',
+            lambda: [bline(width // 2, height // 2, x, y) for x, y in ends],
+            points, 'points/s'
+        ),
+        Benchmark(
+            'LineProfiles',
+            lambda: LineProfiles(lines, data.shape).gather(data[:, :, 0]),
+            points, 'points/s'
+        ),
+        Benchmark(
+            'window I(V) direct',
+            lambda: roi.extract_iv(data, rois),
+            NUM_WINDOWS * num, 'window-images/s'
+        ),
+        Benchmark(
+            'SummedAreaTable.build',
+            lambda: integral.SummedAreaTable(data).build(),
+            data.nbytes / MB, 'MB/s'
+        ),
+        Benchmark(
+            'window I(V) summed-area',
+            query_table,
+            NUM_WINDOWS * num, 'window-images/s'
+        ),
+    ]
+
+
+def time_benchmark(
+        benchmark: Benchmark,
+        size: str,
+        repeat: int
+) -> Result:
+    """ Time a benchmark then measure its peak memory in one more call """
+    times = []
+    for _ in range(repeat):
+        if benchmark.setup is not None:
+            benchmark.setup()
+        start = time.perf_counter()
+        benchmark.func()
+        times.append(time.perf_counter() - start)
+
+    if benchmark.setup is not None:
+        benchmark.setup()
+    tracemalloc.start()
+    try:
+        benchmark.func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    return Result(
+        name=benchmark.name,
+        size=size,
+        best=best,
+        median=statistics.median(times),
+        throughput=benchmark.work / best if best > 0 else float('inf'),
+        unit=benchmark.unit,
+        peak_mb=peak / MB,
+    )
+
+
+def run(
+        sizes: List[str],
+        formats: List[str],
+        repeat: int,
+        name_filter: Optional[str] = None
+) -> List[Result]:
+    """ Generate the synthetic data sets and run every matching benchmark """
+    results = []
+    workdir = tempfile.mkdtemp(prefix='please-bench-')
+    try:
+        for size in sizes:
+            shape = SIZES[size]
+            print(f"Generating {size} data sets {shape} ...", flush=True)
+            data = {bits: synthetic.make_stack('LEEM', shape, bits=bits)
+                    for bits in (8, 16)}
+            leed = synthetic.make_stack('LEED', shape, bits=16)
+            benchmarks = (
+                loader_benchmarks(data, shape,
+                                  os.path.join(workdir, size), formats) +
+                smoothing_benchmarks(data[16]) +
+                extraction_benchmarks(leed)
+            )
+            for benchmark in benchmarks:
+                if name_filter and name_filter not in benchmark.name:
+                    continue
+                result = time_benchmark(benchmark, size, repeat)
+                results.append(result)
+                print(format_result(result), flush=True)
+            shutil.rmtree(os.path.join(workdir, size), ignore_errors=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def format_result(result: Result, baseline: Optional[Result] = None) -> str:
+    """ Format a result as one row of the results table """
+    row = (f"{result.name:<32} {result.size:<7} "
+           f"{1000 * result.best:>10.2f} {1000 * result.median:>10.2f} "
+           f"{result.throughput:>12.1f} {result.unit:<16}"
+           f"{result.peak_mb:>9.1f}")
+    if baseline is not None:
+        row += f" {baseline.best / result.best:>8.2f}x"
+    return row
+
+
+def header(compare: bool = False) -> str:
+    """ Column headings of the results table """
+    row = (f"{'benchmark':<32} {'size':<7} {'best ms':>10} "
+           f"{'median ms':>10} {'throughput':>12} {'unit':<16}"
+           f"{'peak MB':>9}")
+    if compare:
+        row += f" {'speedup':>9}"
+    return row
+
+
+def save(results: List[Result], path: str, repeat: int):
+    """ Write results and a description of the machine to a JSON file """
+    with open(path, 'w') as f:
+        json.dump({
+            'machine': {
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'processor': platform.processor(),
+                'cpu_count': os.cpu_count(),
+            },
+            'repeat': repeat,
+            'results': [result._asdict() for result in results],
+        }, f, indent=2)
+
+
+def load(path: str) -> Dict[Tuple[str, str], Result]:
+    """ Read results from a JSON file written by `save` """
+    with open(path, 'r') as f:
+        results = json.load(f)['results']
+    return {(r['name'], r['size']): Result(**r) for r in results}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """ Create the command line argument parser """
+    parser = argparse.ArgumentParser(
+        description="Time the PLEASE loaders, I(V) extraction, and smoothing "
+                    "on synthetic data."
+    )
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES),
+                        default=['small', 'medium'],
+                        help="data set sizes (default: small medium)")
+    parser.add_argument('--formats', nargs='+', choices=synthetic.FORMATS,
+                        default=list(synthetic.FORMATS),
+                        help="file formats for the loader benchmarks "
+                             "(default: all)")
+    parser.add_argument('--filter', default=None,
+                        help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="timed calls of each benchmark (default: 5)")
+    parser.add_argument('--quick', action='store_true',
+                        help="one call of each benchmark on tiny data sets, "
+                             "to check that the suite runs")
+    parser.add_argument('--json', default=None,
+                        help="write the results to a JSON file")
+    parser.add_argument('--compare', default=None,
+                        help="JSON file from a previous run to compare "
+                             "against")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """ Run the benchmark suite from the command line """
+    args = build_parser().parse_args(argv)
+    sizes, repeat = args.sizes, max(1, args.repeat)
+    if args.quick:
+        sizes, repeat = ['tiny'], 1
+    print(header())
+    results = run(sizes, args.formats, repeat, name_filter=args.filter)
+    if args.json:
+        save(results, args.json, repeat)
+        print(f"Results written to {args.json}")
+    if args.compare:
+        baseline = load(args.compare)
+        print()
+        print(f"Compared with {args.compare}:")
+        print(header(compare=True))
+        for result in results:
+            print(format_result(result,
+                                baseline.get((result.name, result.size))))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+""" Synthetic LEEM and LEED data sets for the benchmark suite
+
+Data sets are written in every format PLEASE reads: raw .dat files with a
+header in 8 or 16 bit and either byte order, and TIFF or PNG images in 8 or
+16 bit. Generation is seeded, so the same size and format always produce
+the same files.
+"""
+import os
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+RAW_HEADER_LENGTH = 104  # bytes of header preceding the image data
+RAW_FORMATS = ('raw8L', 'raw8B', 'raw16L', 'raw16B')
+IMAGE_FORMATS = ('tiff8', 'tiff16', 'png8', 'png16')
+FORMATS = RAW_FORMATS + IMAGE_FORMATS
+
+
+def make_stack(
+        kind: str,
+        shape: Tuple[int, int, int],
+        bits: int = 16,
+        seed: int = 0
+) -> np.ndarray:
+    """ Generate a synthetic 3d stack of LEEM or LEED images
+
+    Parameters
+    ----------
+    kind : str
+        'LEEM' for a real space image with smooth contrast, or 'LEED' for a
+        diffraction pattern of Gaussian spots on a diffuse background
+
+    shape : tuple of int
+        (height, width, number of images)
+
+    bits : int
+        8 or 16; the data fills most of the range of the unsigned type
+
+    seed : int
+        Seed for the random number generator
+
+    Returns
+    -------
+    data : NDArray
+        3D array of unsigned integer image data with the requested shape
+    """
+    height, width, num = shape
+    rng = np.random.default_rng(seed)
+    rows = np.linspace(-1, 1, height, dtype=np.float32)[:, np.newaxis]
+    cols = np.linspace(-1, 1, width, dtype=np.float32)[np.newaxis, :]
+    energy = np.linspace(0, 1, num, dtype=np.float32)
+    if kind == 'LEEM':
+        terraces = np.sin(6 * rows + 3 * cols) * np.cos(5 * cols - 2 * rows)
+        image = 0.5 + 0.25 * terraces
+        # each terrace has its own I(V) curve
+        modulation = 0.2 * np.sin(np.multiply.outer(image, 12 * energy))
+        data = image[:, :, np.newaxis] + modulation
+    elif kind == 'LEED':
+        background = 0.3 * np.exp(-2 * (rows ** 2 + cols ** 2))
+        spots = np.zeros((height, width), dtype=np.float32)
+        for x, y in rng.uniform(-0.8, 0.8, size=(12, 2)):
+            spots += np.exp(-((rows - y) ** 2 + (cols - x) ** 2) / 0.002)
+        intensity = 0.5 + 0.5 * np.cos(np.pi * 7 * energy) ** 2
+        data = (background[:, :, np.newaxis] +
+                0.6 * np.multiply.outer(spots, intensity))
+    else:
+        raise ValueError(f"Unknown data kind: {kind}.")
+    data = data + rng.normal(0, 0.02, size=shape).astype(np.float32)
+    top = 2 ** bits - 1
+    dtype = np.uint8 if bits == 8 else np.uint16
+    return np.clip(data * 0.9 * top, 0, top).astype(dtype)
+
+
+def parse_format(fmt: str) -> Tuple[str, int, str]:
+    """ Split a format name such as 'raw16B' or 'png8'
+
+    Returns
+    -------
+    (container, bits, byteorder) : tuple
+        container is 'raw', 'tiff', or 'png'; byteorder is 'L' or 'B' and
+        is always 'L' for images
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}; valid formats are {FORMATS}")
+    if fmt.startswith('raw'):
+        return 'raw', int(fmt[3:-1]), fmt[-1]
+    container = fmt.rstrip('0123456789')
+    return container, int(fmt[len(container):]), 'L'
+
+
+def write_stack(data: np.ndarray, path: str, fmt: str) -> list:
+    """ Write each image of a stack to its own file in a directory
+
+    Parameters
+    ----------
+    data : NDArray
+        3D array (height, width, number of images) from `make_stack`
+
+    path : str
+        Directory to write into; it is created if it does not exist
+
+    fmt : str
+        One of FORMATS
+
+    Returns
+    -------
+    file_paths : list of str
+        Paths of the files written, sorted by image number
+    """
+    container, bits, byteorder = parse_format(fmt)
+    os.makedirs(path, exist_ok=True)
+    dtype = np.dtype('u1' if bits == 8 else 'u2').newbyteorder(
+        '<' if byteorder == 'L' else '>'
+    )
+    header = (b'PLEASE' * RAW_HEADER_LENGTH)[:RAW_HEADER_LENGTH]
+    file_paths = []
+    for idx in range(data.shape[2]):
+        image = np.ascontiguousarray(data[:, :, idx])
+        if container == 'raw':
+            file_path = os.path.join(path, f"img_{idx:04d}.dat")
+            with open(file_path, 'wb') as f:
+                f.write(header)
+                f.write(image.astype(dtype).tobytes())
+        else:
+            file_path = os.path.join(path, f"img_{idx:04d}.{container}")
+            Image.fromarray(image).save(file_path)
+        file_paths.append(file_path)
+    return file_paths
+
+
+def extension(fmt: str) -> str:
+    """ Get the file extension, including the '.', of a format """
+    container = parse_format(fmt)[0]
+    return '.dat' if container == 'raw' else '.' + container
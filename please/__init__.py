@@ -0,0 +1,10 @@
+""" PLEASE: the Python Low-energy Electron Analysis SuitE
+
+Subpackages are imported on first access, so ``import please`` is cheap and
+using ``please.io`` does not import the dependencies of ``please.model``.
+"""
+from please.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__, submodules=['constants', 'exceptions', 'io', 'model', 'ui'],
+)
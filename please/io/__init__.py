@@ -0,0 +1,19 @@
+""" Readers for raw .dat files and common image formats.
+
+Submodules are imported on first access to one of their names.
+"""
+from please.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=['readers', 'utils'],
+    attributes={
+        'read_image_data': 'readers',
+        'read_image_stack': 'readers',
+        'read_raw_data': 'readers',
+        'read_raw_stack': 'readers',
+        'get_file_extension': 'utils',
+        'is_image_file': 'utils',
+        'is_raw_file': 'utils',
+    },
+)
@@ -2,15 +2,20 @@
 such as raw .dat files as well as common image types like TIFF and PNG.
 """
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Sequence, Tuple
 
 import numpy as np
-from PIL import Image
 
 from please.constants import (
     SUPPORTED_IMAGE_FORMATS, SUPPORTED_RAW_FORMATS,
 )
 from please.constants import BITS_PER_BYTE
 from please.exceptions import UnsupportedDataType
+from please.lazy import lazy_import
+
+# PIL is only needed to read images, not raw data
+Image = lazy_import('PIL.Image')
 
 
 def read_image_data(file_path: str) -> np.ndarray:
@@ -25,6 +30,12 @@ def read_image_data(file_path: str) -> np.ndarray:
     -------
     data : NDArray
         2D array of image data
+
+    Notes
+    -----
+    Greyscale images keep their native bit depth, so 16-bit images are
+    returned as uint16 rather than being reduced to 8-bit. Colour images are
+    converted to 8-bit greyscale.
     """
     ext = pathlib.Path(file_path).suffix
     if ext:
@@ -38,7 +49,8 @@ def read_image_data(file_path: str) -> np.ndarray:
             ' format is not supported.'
         )
 
-    return np.array(Image.open(file_path).convert('L'))
+    with Image.open(file_path) as image:
+        return _image_to_array(image)
 
 
 def read_raw_data(
@@ -102,6 +114,248 @@ def read_raw_data(
     return np.frombuffer(image_data, format_string).reshape((height, width))
 
 
+def read_image_stack(
+        file_paths: Sequence[str],
+        max_workers: Optional[int] = None,
+        crop: Optional[Tuple[Optional[int], ...]] = None,
+        binning: int = 1,
+        energy_stride: int = 1
+) -> np.ndarray:
+    """ Generate a 3d numpy array of image data from a sequence of image files
+
+    Parameters
+    ----------
+    file_paths : Sequence[str]
+        Paths to the image files, in stack order
+
+    max_workers : int, optional
+        Number of threads used to read files in parallel. Defaults to the
+        ThreadPoolExecutor default.
+
+    crop : tuple of int, optional
+        Pixel region (row start, column start, row stop, column stop) to
+        keep from each image, with the stop values excluded. An edge given
+        as None is the edge of the image. Defaults to the full image.
+
+    binning : int, optional
+        Mean-bin each image over binning x binning pixel blocks after
+        cropping. Defaults to 1, no binning.
+
+    energy_stride : int, optional
+        Only read every energy_stride-th file. Defaults to 1, every file.
+
+    Returns
+    -------
+    data : NDArray
+        3D array of image data with shape (height, width, number of files
+        read), where height and width are those of the reduced images
+
+    Notes
+    -----
+    Each image is reduced as soon as it is read, so only the reduced stack
+    is ever held in memory.
+    """
+    file_paths = list(file_paths)[::_check_stride(energy_stride)]
+    if not file_paths:
+        raise ValueError("Can not read an image stack from zero files.")
+    first = read_image_data(file_paths[0])
+    bounds = _reduction_bounds(first.shape, crop, binning)
+
+    def read_frame(file_path: str) -> np.ndarray:
+        return _reduce_frame(read_image_data(file_path), bounds, binning)
+
+    first = _reduce_frame(first, bounds, binning)
+    stack = np.empty(first.shape + (len(file_paths),), dtype=first.dtype)
+    stack[:, :, 0] = first
+    _fill_stack(file_paths[1:], read_frame, stack[:, :, 1:], max_workers)
+    return stack
+
+
+def read_raw_stack(
+        file_paths: Sequence[str],
+        height: int,
+        width: int,
+        bits_per_pixel: int,
+        byteorder: str,
+        max_workers: Optional[int] = None,
+        crop: Optional[Tuple[Optional[int], ...]] = None,
+        binning: int = 1,
+        energy_stride: int = 1
+) -> np.ndarray:
+    """ Generate a 3d numpy array of image data from a sequence of raw files
+
+    Parameters
+    ----------
+    file_paths : Sequence[str]
+        Paths to the raw data files, in stack order
+
+    max_workers : int, optional
+        Number of threads used to read files in parallel. Defaults to the
+        ThreadPoolExecutor default.
+
+    crop, binning, energy_stride : optional
+        Data reduction applied while reading, see `read_image_stack`. Only
+        the rows inside the crop region are read from each file.
+
+    Returns
+    -------
+    data : NDArray
+        3D array of image data with shape (height, width, number of files
+        read), where height and width are those of the reduced images
+
+    Notes
+    -----
+    See `read_raw_data` for the remaining parameters.
+    """
+    file_paths = list(file_paths)[::_check_stride(energy_stride)]
+    format_string = _get_dtype_string(bits_per_pixel, byteorder)
+    bounds = _reduction_bounds((height, width), crop, binning)
+    row_start, col_start, row_stop, col_stop = bounds
+    stack = np.empty(
+        ((row_stop - row_start) // binning,
+         (col_stop - col_start) // binning,
+         len(file_paths)),
+        dtype=format_string
+    )
+
+    def read_frame(file_path: str) -> np.ndarray:
+        if crop is None and binning == 1:
+            return read_raw_data(
+                file_path, height, width, bits_per_pixel, byteorder
+            )
+        rows = _read_raw_rows(
+            file_path, height, width, format_string, row_start, row_stop
+        )
+        row_bounds = (0, col_start, rows.shape[0], col_stop)
+        return _reduce_frame(rows, row_bounds, binning)
+
+    return _fill_stack(file_paths, read_frame, stack, max_workers)
+
+
+def _fill_stack(
+        file_paths: Sequence[str],
+        read_frame: Callable[[str], np.ndarray],
+        out: np.ndarray,
+        max_workers: Optional[int]
+) -> np.ndarray:
+    """ Read files in parallel into the last axis of a preallocated array
+
+    Each worker copies its frame directly into out[:, :, idx], so no
+    intermediate list of frames is built. File reads and PIL decoding release
+    the GIL, so a thread pool overlaps I/O across files.
+    """
+    def read_into(idx: int) -> None:
+        out[:, :, idx] = read_frame(file_paths[idx])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Consume the results so exceptions raised in workers propagate
+        for _ in pool.map(read_into, range(len(file_paths))):
+            pass
+    return out
+
+
+def _check_stride(energy_stride: int) -> int:
+    """ Validate the step between files read along the energy axis """
+    if int(energy_stride) < 1:
+        raise ValueError(
+            f"Energy stride must be a positive integer: {energy_stride}."
+        )
+    return int(energy_stride)
+
+
+def _reduction_bounds(
+        shape: Tuple[int, ...],
+        crop: Optional[Tuple[Optional[int], ...]],
+        binning: int
+) -> Tuple[int, int, int, int]:
+    """ Get the pixel region read from each image for a crop and binning
+
+    The crop region is clipped to the image then trimmed at the bottom and
+    right so that it holds a whole number of bins. An edge given as None is
+    the edge of the image, as in the crop regions of an Experiment.
+    """
+    if int(binning) < 1:
+        raise ValueError(f"Binning must be a positive integer: {binning}.")
+    height, width = shape[0], shape[1]
+    binning = int(binning)
+    if crop is None:
+        crop = (None, None, None, None)
+    row_start = 0 if crop[0] is None else max(0, int(crop[0]))
+    col_start = 0 if crop[1] is None else max(0, int(crop[1]))
+    row_stop = height if crop[2] is None else min(height, int(crop[2]))
+    col_stop = width if crop[3] is None else min(width, int(crop[3]))
+    row_stop = row_start + max(0, row_stop - row_start) // binning * binning
+    col_stop = col_start + max(0, col_stop - col_start) // binning * binning
+    if row_stop <= row_start or col_stop <= col_start:
+        raise ValueError(
+            f"Crop region {crop} with binning {binning} contains no pixels"
+            f" of a {height}x{width} image."
+        )
+    return row_start, col_start, row_stop, col_stop
+
+
+def _reduce_frame(
+        frame: np.ndarray,
+        bounds: Tuple[int, int, int, int],
+        binning: int
+) -> np.ndarray:
+    """ Crop a 2d image to bounds then mean-bin it, keeping integer dtypes """
+    row_start, col_start, row_stop, col_stop = bounds
+    frame = frame[row_start:row_stop, col_start:col_stop]
+    if binning == 1:
+        return frame
+    height, width = frame.shape[0] // binning, frame.shape[1] // binning
+    binned = frame.reshape(height, binning, width, binning).mean(axis=(1, 3))
+    if frame.dtype.kind in 'ui':
+        return np.rint(binned).astype(frame.dtype)
+    return binned
+
+
+def _read_raw_rows(
+        file_path: str,
+        height: int,
+        width: int,
+        format_string: str,
+        row_start: int,
+        row_stop: int
+) -> np.ndarray:
+    """ Read rows [row_start, row_stop) of the image in a raw data file
+
+    The header length is inferred from the file size as in `read_raw_data`
+    and only the bytes of the requested rows are read.
+    """
+    itemsize = np.dtype(format_string).itemsize
+    rows = np.empty((row_stop - row_start, width), dtype=format_string)
+    with open(file_path, 'rb') as f:
+        file_length_in_bytes = f.seek(0, 2)
+        image_length_in_bytes = height * width * itemsize
+        header_length_in_bytes = file_length_in_bytes - image_length_in_bytes
+        if header_length_in_bytes < 0:
+            raise ValueError(
+                f"Can not read raw data file, {file_path}."
+                " Image parameters do not match the data file."
+            )
+        f.seek(header_length_in_bytes + row_start * width * itemsize)
+        f.readinto(rows.view(np.uint8))
+    return rows
+
+
+def _image_to_array(image: 'Image.Image') -> np.ndarray:
+    """ Convert a PIL image to a 2d numpy array at its native bit depth
+
+    Pixel data is passed to numpy through the PIL array interface, never as
+    Python objects. The dtype depends only on the PIL mode, so 32-bit integer
+    images are always int32 and every image of a stack in one mode fits the
+    array allocated for the first.
+    """
+    if image.mode in {'L', 'F', 'I'} or image.mode.startswith('I;16'):
+        data = np.asarray(image)
+    else:
+        data = np.asarray(image.convert('L'))
+    # 16-bit images may be decoded big-endian; return native byte order
+    return data.astype(data.dtype.newbyteorder('='), copy=False)
+
+
 def _get_dtype_string(bits: int, byteorder: str) -> str:
     """ Generate a numpy compatable string indicating the array dtype
 
@@ -1,12 +1,18 @@
 """ Unittests for image I/O """
 
+import json
 import os
 import pkg_resources
+import tempfile
 from unittest import TestCase
 
 import numpy as np
+from PIL import Image
 
-from please.io.readers import read_image_data, read_raw_data, _get_dtype_string
+from please.io.readers import (
+    read_image_data, read_image_stack, read_raw_data, read_raw_stack,
+    _get_dtype_string, _reduction_bounds,
+)
 
 
 class TestImageFileIO(TestCase):
@@ -95,6 +101,18 @@ class TestImageFileIO(TestCase):
         self.assertIsInstance(data, np.ndarray)
         self.assertEqual(data.shape, expected_shape)
 
+    def test_read_image_data_keeps_native_bit_depth(self):
+        # Given
+        # The test image is a 16-bit greyscale PNG
+        expected_dtype = np.uint16
+
+        # When
+        data = read_image_data(self.img_file)
+
+        # Then
+        self.assertEqual(data.dtype, expected_dtype)
+        self.assertGreater(data.max(), 255)
+
     def test_read_raw_data(self):
         # Given
         bits_per_pixel = 16
@@ -135,3 +153,153 @@ class TestImageFileIO(TestCase):
 
         # Then
         self.assertIn(expected_error, str(ctx.exception))
+
+    def test_read_raw_stack(self):
+        # Given
+        height = 600
+        width = 592
+        file_paths = [self.raw_data_file] * 3
+        frame = read_raw_data(
+            self.raw_data_file, height, width, bits_per_pixel=16, byteorder='L'
+        )
+
+        # When
+        data = read_raw_stack(
+            file_paths,
+            height=height,
+            width=width,
+            bits_per_pixel=16,
+            byteorder='L',
+            max_workers=2
+        )
+
+        # Then
+        self.assertEqual(data.shape, (height, width, 3))
+        for idx in range(3):
+            np.testing.assert_array_equal(data[:, :, idx], frame)
+
+    def test_read_image_stack(self):
+        # Given
+        file_paths = [self.img_file] * 3
+        frame = read_image_data(self.img_file)
+
+        # When
+        data = read_image_stack(file_paths, max_workers=2)
+
+        # Then
+        self.assertEqual(data.shape, frame.shape + (3,))
+        self.assertEqual(data.dtype, frame.dtype)
+        for idx in range(3):
+            np.testing.assert_array_equal(data[:, :, idx], frame)
+
+    def test_read_image_stack_of_32bit_images_with_mixed_ranges(self):
+        # Given
+        # The second image holds values too large for the dtype which the
+        # values of the first would need
+        values = [300, 100000, -5]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_paths = []
+            for idx, value in enumerate(values):
+                file_path = os.path.join(tmp_dir, f'{idx}.tiff')
+                frame = np.full((8, 8), value, dtype=np.int32)
+                Image.fromarray(frame).save(file_path)
+                file_paths.append(file_path)
+
+            # When
+            data = read_image_stack(file_paths, max_workers=2)
+
+        # Then
+        self.assertEqual(data.dtype, np.int32)
+        np.testing.assert_array_equal(data[0, 0, :], values)
+
+    def test_read_raw_stack_with_crop_binning_and_energy_stride(self):
+        # Given
+        height = 600
+        width = 592
+        file_paths = [self.raw_data_file] * 5
+        frame = read_raw_data(
+            self.raw_data_file, height, width, bits_per_pixel=16, byteorder='L'
+        ).astype(float)
+        # 101 rows and 75 columns trim to 50 x 37 bins of 2 x 2 pixels
+        block = frame[10:110, 20:94]
+        expected = np.rint(block.reshape(50, 2, 37, 2).mean(axis=(1, 3)))
+
+        # When
+        data = read_raw_stack(
+            file_paths,
+            height=height,
+            width=width,
+            bits_per_pixel=16,
+            byteorder='L',
+            crop=(10, 20, 111, 95),
+            binning=2,
+            energy_stride=2
+        )
+
+        # Then
+        self.assertEqual(data.shape, (50, 37, 3))
+        self.assertEqual(data.dtype, np.dtype('<u2'))
+        for idx in range(3):
+            np.testing.assert_array_equal(data[:, :, idx], expected)
+
+    def test_read_image_stack_with_crop_binning_and_energy_stride(self):
+        # Given
+        file_paths = [self.img_file] * 4
+        frame = read_image_data(self.img_file)
+        block = frame[:90, 30:].astype(float)
+        rows, cols = block.shape[0] // 3, block.shape[1] // 3
+        block = block[:rows * 3, :cols * 3]
+        expected = np.rint(block.reshape(rows, 3, cols, 3).mean(axis=(1, 3)))
+
+        # When
+        data = read_image_stack(
+            file_paths, crop=(0, 30, 90, frame.shape[1]), binning=3,
+            energy_stride=3
+        )
+
+        # Then
+        self.assertEqual(data.shape, (rows, cols, 2))
+        self.assertEqual(data.dtype, frame.dtype)
+        for idx in range(2):
+            np.testing.assert_array_equal(data[:, :, idx], expected)
+
+    def test__reduction_bounds(self):
+        # Given
+        # The same cases are checked against LEEMFUNCTIONS.crop_bounds in
+        # source/tests.py, so both loaders crop and bin alike
+        cases_file = pkg_resources.resource_filename(
+            'please.io.tests', os.path.join('data', 'crop_bounds.json')
+        )
+        with open(cases_file) as f:
+            cases = json.load(f)
+
+        for case in cases:
+            with self.subTest(**case):
+                # When
+                if case['bounds'] is None:
+                    with self.assertRaises(ValueError):
+                        _reduction_bounds(
+                            case['shape'], case['crop'], case['binning']
+                        )
+                    continue
+                bounds = _reduction_bounds(
+                    case['shape'], case['crop'], case['binning']
+                )
+
+                # Then
+                self.assertEqual(bounds, tuple(case['bounds']))
+
+    def test_read_stack_raises_for_empty_crop(self):
+        # Given
+        file_paths = [self.raw_data_file]
+        expected_error = "contains no pixels"
+
+        # When
+        with self.assertRaises(ValueError) as ctx:
+            read_raw_stack(
+                file_paths, height=600, width=592, bits_per_pixel=16,
+                byteorder='L', crop=(100, 100, 101, 300), binning=2
+            )
+
+        # Then
+        self.assertIn(expected_error, str(ctx.exception))
@@ -0,0 +1,122 @@
+""" This module contains helpers which defer importing modules until they are
+first used, so that importing a part of PLEASE only pays for the dependencies
+that part actually uses.
+
+``lazy_import`` returns a stand-in for a single module, for heavy third party
+dependencies such as PIL or traits. ``attach`` implements module level
+``__getattr__`` and ``__dir__`` (PEP 562) for a package ``__init__``, so that
+its submodules and their public names are imported on first access.
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+import types
+from collections.abc import Callable, Iterable
+
+_LOCK = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """ Stand-in for a module which is imported on first attribute access
+
+    Attributes are copied onto the stand-in as they are first used, so later
+    lookups cost the same as on the real module. As a consequence, changes
+    made to an attribute of the real module after it was first used through
+    the stand-in are not seen by the stand-in.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__['_lazy_target'] = None
+
+    def _load(self) -> types.ModuleType:
+        """ Import the real module if it has not been imported yet """
+        module = self.__dict__['_lazy_target']
+        if module is None:
+            with _LOCK:
+                module = self.__dict__['_lazy_target']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_target'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __dir__(self) -> list[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        loaded = self.__dict__['_lazy_target'] is not None
+        state = 'loaded' if loaded else 'not loaded'
+        return "<lazy module {!r} ({})>".format(self.__name__, state)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """ Get a module which is only imported once one of its attributes is used
+
+    Parameters
+    ----------
+    name : str
+        Absolute name of the module, e.g. 'PIL.Image'
+
+    Returns
+    -------
+    module : ModuleType
+        Stand-in which forwards attribute access to the imported module
+    """
+    return LazyModule(name)
+
+
+def attach(
+        package: str,
+        submodules: Iterable[str] = (),
+        attributes: dict[str, str] | None = None
+) -> tuple[Callable[[str], object], Callable[[], list[str]], list[str]]:
+    """ Make the submodules of a package and their names load on first use
+
+    Use in a package ``__init__`` as::
+
+        __getattr__, __dir__, __all__ = attach(
+            __name__, submodules=['utils'], attributes={'read': 'readers'}
+        )
+
+    Parameters
+    ----------
+    package : str
+        Name of the package, normally ``__name__``
+    submodules : Iterable[str]
+        Names of submodules available as attributes of the package
+    attributes : Dict[str, str], optional
+        Maps each name available from the package to the submodule which
+        defines it
+
+    Returns
+    -------
+    __getattr__, __dir__, __all__
+        Module level ``__getattr__`` and ``__dir__`` functions and the list
+        of public names for the package
+    """
+    submodules = set(submodules)
+    attributes = dict(attributes or {})
+    names = sorted(submodules | set(attributes))
+
+    def __getattr__(name: str) -> object:
+        if name in submodules:
+            return importlib.import_module('{}.{}'.format(package, name))
+        if name in attributes:
+            module = importlib.import_module(
+                '{}.{}'.format(package, attributes[name])
+            )
+            return getattr(module, name)
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(package, name)
+        )
+
+    def __dir__() -> list[str]:
+        return list(names)
+
+    return __getattr__, __dir__, list(names)
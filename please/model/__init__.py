@@ -0,0 +1,18 @@
+""" Models of Electron Microscope images and experiments.
+
+The models are built on traits, which is only imported once one of them is
+first used.
+"""
+from please.lazy import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=['experiment', 'image', 'interfaces'],
+    attributes={
+        'Experiment': 'experiment',
+        'IEMExperiment': 'interfaces',
+        'IEMImage': 'interfaces',
+        'LEEDImage': 'image',
+        'LEEMImage': 'image',
+    },
+)
@@ -0,0 +1,97 @@
+""" Lazy import checks for the please package and the GUI
+
+Importing a part of PLEASE must only import the dependencies that part needs.
+Each test imports a module in a fresh interpreter with ``python -X importtime``
+and checks which modules were imported.
+
+The import time of each module is only checked against its budget when the
+environment variable PLEASE_IMPORT_BUDGETS is set, since wall-clock times vary
+too much between machines for the check to run everywhere.
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+from unittest import TestCase, skipUnless
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+SOURCE = os.path.join(ROOT, 'source')
+
+#: Modules which the please package must not import
+HEAVY_MODULES = {'PIL', 'traits', 'yaml', 'pyqtgraph', 'PyQt5', 'pendulum'}
+
+#: Modules which only some features of the GUI need
+GUI_DEFERRED_MODULES = {
+    'pyqtgraph', 'yaml', 'pendulum', 'PIL', 'yamloutput', 'configinfo'
+}
+
+#: (module, directory it is imported from, modules it must not import,
+#: cumulative import time budget in milliseconds). The budgets are several
+#: times the times measured on a laptop.
+PACKAGE_IMPORTS = [
+    ('please', ROOT, HEAVY_MODULES, 100),
+    ('please.io', ROOT, HEAVY_MODULES, 150),
+    ('please.io.readers', ROOT, HEAVY_MODULES, 600),
+]
+GUI_IMPORTS = [
+    ('main', SOURCE, GUI_DEFERRED_MODULES, 600),
+    ('please', SOURCE, GUI_DEFERRED_MODULES, 1500),
+    ('LEEMFUNCTIONS', SOURCE, GUI_DEFERRED_MODULES, 800),
+]
+
+CHECK_BUDGETS = bool(os.environ.get('PLEASE_IMPORT_BUDGETS'))
+
+
+def import_times(module: str, cwd: str) -> dict:
+    """ Import a module in a new interpreter and get the cumulative import
+    time of every module it imported, in microseconds
+
+    Parameters
+    ----------
+    module : str
+        Name of the module to import
+    cwd : str
+        Directory the module is imported from
+
+    Returns
+    -------
+    times : dict
+        Maps the name of every module imported to its cumulative import time
+    """
+    command = [sys.executable, '-X', 'importtime', '-c',
+               'import {}'.format(module)]
+    # the first run writes any missing .pyc files
+    subprocess.run(command, cwd=cwd, capture_output=True, check=True)
+    result = subprocess.run(command, cwd=cwd, capture_output=True,
+                            check=True, universal_newlines=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImports(TestCase):
+
+    def check_imports(self, cases):
+        for module, cwd, deferred, budget in cases:
+            with self.subTest(module=module, cwd=cwd):
+                # When
+                times = import_times(module, cwd)
+
+                # Then
+                imported = {name.split('.')[0] for name in times}
+                self.assertFalse(imported & deferred)
+                if CHECK_BUDGETS:
+                    self.assertLess(times[module] / 1000, budget)
+
+    def test_package_imports(self):
+        self.check_imports(PACKAGE_IMPORTS)
+
+    @skipUnless(importlib.util.find_spec('PyQt5'), 'the GUI requires PyQt5')
+    def test_gui_imports(self):
+        self.check_imports(GUI_IMPORTS)
@@ -0,0 +1,59 @@
+""" Unit tests for deferred imports """
+
+import sys
+import types
+from unittest import TestCase
+
+import please
+from please.lazy import attach, lazy_import
+
+
+class TestLazyImport(TestCase):
+
+    def test_lazy_import(self):
+        # Given
+        module = lazy_import('json')
+
+        # When
+        dumps = module.dumps
+
+        # Then
+        self.assertIsInstance(module, types.ModuleType)
+        self.assertIs(dumps, sys.modules['json'].dumps)
+        self.assertIn('loads', dir(module))
+        self.assertIn('loaded', repr(module))
+
+    def test_lazy_import_missing_attribute(self):
+        # Given
+        module = lazy_import('json')
+
+        # Then
+        with self.assertRaises(AttributeError):
+            module.not_a_function
+
+    def test_attach(self):
+        # Given
+        __getattr__, __dir__, __all__ = attach(
+            'please.io', submodules=['utils'],
+            attributes={'read_raw_data': 'readers'}
+        )
+
+        # When
+        utils = __getattr__('utils')
+        read_raw_data = __getattr__('read_raw_data')
+
+        # Then
+        self.assertIs(utils, sys.modules['please.io.utils'])
+        readers = sys.modules['please.io.readers']
+        self.assertIs(read_raw_data, readers.read_raw_data)
+        self.assertEqual(__all__, ['read_raw_data', 'utils'])
+        self.assertEqual(__dir__(), __all__)
+        with self.assertRaises(AttributeError):
+            __getattr__('not_a_name')
+
+    def test_package_attributes(self):
+        # Then
+        self.assertIs(please.io.read_image_data,
+                      sys.modules['please.io.readers'].read_image_data)
+        self.assertIn('io', dir(please))
+        self.assertIn('LEEMImage', please.model.__all__)
@@ -11,10 +11,17 @@ These methods are independent of the GUI and thus not contained in please.py
 
 """
 
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from PIL import Image
-from PyQt5 import QtCore
+import instrument
+from datastack import MemmapStack
+from lazyimport import lazy_import
+from pyramid import bin_frame
+
+Image = lazy_import('PIL.Image')  # only needed to read image files, not raw data
 
 
 class InvalidParameterError(Exception):
@@ -26,6 +33,10 @@ class InvalidParameterError(Exception):
         super(InvalidParameterError, self).__init__(message)
 
 
+class TaskCancelled(Exception):
+    """Raised when loading or processing data is cancelled before it has finished."""
+
+
 class ParseError(Exception):
     """Custom exception for errors encountered while parsing TIFF file headers."""
 
@@ -69,6 +80,7 @@ def energy_to_filenumber(el, val):
 
 def getRectCorners(pt1, pt2):
     """Get coordinates of top left and bottom right corners given any two corners of a rectangle."""
+    from PyQt5 import QtCore  # imported here so the rest of this module can be used without Qt
     if not isinstance(pt1, (QtCore.QPointF, tuple)) or not isinstance(pt2, (QtCore.QPointF, tuple)):
         print("Error: pt1 and pt2 must be both either tuples or QPointF objects")
         return None
@@ -101,74 +113,271 @@ def getRectCorners(pt1, pt2):
         return None
 
 
-def process_LEEM_Data(dirname, ht=None, wd=None, bits=None, byte=None):
+@instrument.timed('load raw data', 'stack')
+def process_LEEM_Data(dirname, ht=None, wd=None, bits=None, byte=None, workers=None, callback=None,
+                      crop=None, binning=1, stride=1, cancelled=None):
     """Read in .dat files, convert to numpy arrays, then stack into 3D numpy array and return.
 
+    Files are read in parallel by a pool of worker threads directly into a preallocated 3d array.
+    Each image may be cropped and binned as it is read, and only every stride-th file read,
+    so that only the reduced data is ever held in memory; see crop_bounds().
+
     :argument dirname: string path to current data directory
     :param ht: integer pixel height of image
     :param wd: integer pixel width of image
     :param bits: integer representing bit depth of image, default is 16 bit
     :param byte: string representing byte order, 'L' for Little-Endian (Intel), 'B' for Big-Endian (Motorola)
+    :param workers: integer number of threads used to read files; default None lets the pool decide
+    :param callback: optional callable invoked as callback(dat_arr, stop) once the array has been allocated
+                     (stop=0) and again each time images [0, stop) have been read into it
+    :param crop: optional (row start, column start, row stop, column stop) pixel region to keep
+    :param binning: integer size of the square blocks of pixels averaged together; default 1, no binning
+    :param stride: integer step between the files read; default 1, every file
+    :param cancelled: optional callable returning True once loading should stop; see fill_stack()
     :return dat_arr: 3d numpy array
     """
     print('Processing Data ...')
-    # progress = pb.ProgressBar(fd=sys.stdout)
-    arr_list = []
-    flag = True
     # add filter on file names to exclude hidden files beginning with a leading period
     print("Searching for files in {}".format(dirname))
     files = [name for name in os.listdir(dirname) if name.endswith('.dat') and not name.startswith(".")]
     files.sort()
+    files = files[::check_stride(stride)]
     print('First file is {}.'.format(files[0]))
-    bitsize = bits
-    byteorder = byte
+    if ht is None or wd is None:
+        raise InvalidParameterError
+
+    # Generate format string given a bit size read from YAML config file
+    formatstring = get_format_string(bits, byte)
+    if formatstring is None:
+        print("Error in process_LEEM_Data() - unknown bit size when loading raw data")
+        print("Check for incorrect bitsize in YAML experiment file")
+        print("The paramters loaded from file were: bit size = {0}, byte order = {1}".format(bits, byte))
+        return None
+
+    paths = [os.path.join(dirname, fl) for fl in files]
+    # dynamically calculate file header length; only print first file header length
+    hdln = os.path.getsize(paths[0]) - np.dtype(formatstring).itemsize * ht * wd
+    print('Calculated Header Length of First File: {}'.format(hdln))
+
+    bounds = crop_bounds(ht, wd, crop, binning)
+    row0, col0, row1, col1 = bounds
+    if bounds != (0, 0, ht, wd) or binning != 1:
+        print('Reducing Images to Rows {0}-{1}, Columns {2}-{3}, Binned {4}x{4}'.format(
+            row0, row1 - 1, col0, col1 - 1, binning))
+
+    read_frame = functools.partial(read_reduced_frame, ht=ht, wd=wd, formatstring=formatstring,
+                                   bounds=bounds, binning=binning)
+
+    print('Creating 3D Array ...')
+    dat_arr = np.empty(((row1 - row0) // binning, (col1 - col0) // binning, len(paths)), dtype=formatstring)
+    if callback is not None:
+        callback(dat_arr, 0)
+        progress = functools.partial(callback, dat_arr)
+    else:
+        progress = None
+    fill_stack(paths, read_frame, dat_arr, workers=workers, callback=progress, cancelled=cancelled)
+    return dat_arr
+
+
+@instrument.timed('read raw frame', 'read')
+def read_raw_frame(path, ht, wd, formatstring, rows=None):
+    """Read the image data from a single raw .dat file, discarding the header.
+
+    :param path: string path to raw data file
+    :param ht: integer pixel height of image
+    :param wd: integer pixel width of image
+    :param formatstring: numpy dtype string such as '<u2'
+    :param rows: optional (start, stop) range of image rows to read; default every row
+    :return frame: 2d numpy array with shape (ht, wd), or (stop - start, wd) when rows is given
+    """
+    start, stop = (0, ht) if rows is None else rows
+    frame = np.empty((stop - start, wd), dtype=formatstring)
+    with open(path, 'rb') as f:
+        hdln = os.fstat(f.fileno()).st_size - ht * wd * frame.itemsize
+        if hdln < 0:
+            raise InvalidParameterError("Error: Image parameters do not match the data file {}.".format(path))
+        f.seek(hdln + start * wd * frame.itemsize)
+        f.readinto(frame.view(np.uint8))
+    return frame
+
+
+def read_reduced_frame(path, ht, wd, formatstring, bounds, binning=1):
+    """Read the image data inside bounds from a single raw .dat file and bin it.
+
+    Only the rows inside bounds are read from disk.
+
+    :param path: string path to raw data file
+    :param ht: integer pixel height of image
+    :param wd: integer pixel width of image
+    :param formatstring: numpy dtype string such as '<u2'
+    :param bounds: (row start, column start, row stop, column stop) from crop_bounds()
+    :param binning: integer size of the square blocks of pixels averaged together
+    :return frame: 2d numpy array
+    """
+    frame = read_raw_frame(path, ht, wd, formatstring, rows=(bounds[0], bounds[2]))
+    return reduce_frame(frame, (0, bounds[1], frame.shape[0], bounds[3]), binning)
+
+
+def check_stride(stride):
+    """Validate the step between files read along the energy axis.
+
+    :param stride: integer step between files
+    :return: stride as an integer
+    """
+    if int(stride) < 1:
+        raise InvalidParameterError("Error: Energy Stride must be a positive integer, not {}.".format(stride))
+    return int(stride)
+
+
+def crop_bounds(ht, wd, crop=None, binning=1):
+    """Get the pixel region of each image kept when data is cropped and binned as it is loaded.
+
+    The crop region is clipped to the image, then its bottom rows and right columns which
+    do not fill a whole bin are dropped.
+
+    :param ht: integer pixel height of image
+    :param wd: integer pixel width of image
+    :param crop: optional (row start, column start, row stop, column stop) with the stops excluded;
+                 None for the full image or for any single edge of the image
+    :param binning: integer size of the square blocks of pixels averaged together
+    :return: tuple (row start, column start, row stop, column stop)
+    """
+    if int(binning) < 1:
+        raise InvalidParameterError("Error: Binning must be a positive integer, not {}.".format(binning))
+    binning = int(binning)
+    if crop is None:
+        crop = (None, None, None, None)
+    row0 = max(0, int(crop[0])) if crop[0] is not None else 0
+    col0 = max(0, int(crop[1])) if crop[1] is not None else 0
+    row1 = min(ht, int(crop[2])) if crop[2] is not None else ht
+    col1 = min(wd, int(crop[3])) if crop[3] is not None else wd
+    row1 = row0 + max(0, row1 - row0) // binning * binning
+    col1 = col0 + max(0, col1 - col0) // binning * binning
+    if row1 <= row0 or col1 <= col0:
+        raise InvalidParameterError("Error: Crop region {0} binned {1}x{1} contains no pixels "
+                                    "of a {2}x{3} image.".format(crop, binning, ht, wd))
+    return row0, col0, row1, col1
+
+
+def reduce_frame(frame, bounds, binning=1):
+    """Crop a 2d image to bounds and mean-bin it.
+
+    :param frame: 2d numpy array (height, width)
+    :param bounds: (row start, column start, row stop, column stop) from crop_bounds()
+    :param binning: integer size of the square blocks of pixels averaged together
+    :return: 2d numpy array; integer data keeps its dtype
+    """
+    frame = frame[bounds[0]:bounds[2], bounds[1]:bounds[3]]
+    if binning == 1:
+        return frame
+    return bin_frame(frame, binning)
+
+
+@instrument.timed('fill stack', 'stack')
+def fill_stack(paths, read_frame, out, workers=None, callback=None, cancelled=None):
+    """Read files in parallel into the image axis of a preallocated 3d array.
+
+    Each worker thread reads and decodes one file at a time and copies it straight
+    into its slice out[:, :, idx]; no intermediate list of arrays is created.
+    File reads and PIL decoding release the GIL, so threads scale with the
+    number of outstanding I/O requests the storage can service.
+
+    :param paths: list of string paths to data files sorted by image number
+    :param read_frame: callable taking a path and returning a 2d numpy array
+    :param out: 3d numpy array (height, width, len(paths)) to be filled
+    :param workers: integer number of threads; default None lets ThreadPoolExecutor decide
+    :param callback: optional callable invoked as callback(stop) from the calling thread
+                     each time images [0, stop) have been read into out
+    :param cancelled: optional callable checked before each file is read; once it returns True
+                      no further files are read and TaskCancelled is raised
+    :return out: the filled 3d array
+    """
+    def read_into(idx):
+        if cancelled is not None and cancelled():
+            raise TaskCancelled("Loading cancelled after {0} of {1} files.".format(idx, len(paths)))
+        out[:, :, idx] = read_frame(paths[idx])
+        return idx
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # consume the iterator so that exceptions raised by workers propagate here
+        # pool.map yields in order, so each result marks a contiguous block of filled images
+        for idx in pool.map(read_into, range(len(paths))):
+            if callback is not None:
+                callback(idx + 1)
+    return out
+
+
+def get_format_string(bits=None, byte=None):
+    """Generate a numpy dtype string from the bit size and byte order in an Experiment YAML file.
+
+    :param bits: integer bit depth of image, 8 or 16; default is 16 bit
+    :param byte: string representing byte order, 'L' for Little-Endian (Intel), 'B' for Big-Endian (Motorola)
+    :return formatstring: string numpy dtype, e.g. '<u2', or None if the parameters are not supported
+    """
+    if bits is None:
+        bits = 16  # default to 16 bit images
     if byte is None:
-        byteorder = 'L'
-    for fl in files:
-        with open(os.path.join(dirname, fl), 'rb') as f:
-            # dynamically calculate file header length
-            if ht is None or wd is None:
-                raise InvalidParameterError
-                return
-
-            hdln = len(f.read()) - (int(bits/8) * ht * wd)  # multiply by number of bytes per pixel
-
-            if flag:
-                print('Calculated Header Length of First File: {}'.format(hdln))
-                # only print first file header length
-                flag = False
-            f.seek(0)
+        byte = 'L'  # default to Little-Endian
+    if bits not in (8, 16) or byte not in ('L', 'B'):
+        return None
+    endian = '<' if byte == 'L' else '>'
+    return endian + 'u' + str(bits // 8)
 
-            # Generate format string given a bit size read from YAML config file
-            if bitsize == 8 and byteorder == 'L':
-                formatstring = '<u1'  # 1 byte (8 bits) per pixel
-            elif bitsize == 8 and byteorder == 'B':
-                formatstring = '>u1'
 
-            elif bitsize == 16 and byteorder == 'L':
-                formatstring = '<u2'  # 2 bytes (16 bits) per pixel
-            elif bitsize == 16 and byteorder == 'B':
-                formatstring = '>u2'
+def map_LEEM_Data(dirname, ht=None, wd=None, bits=None, byte=None):
+    """Memory map .dat files as a lazily indexed 3d stack rather than reading them into memory.
 
-            elif bitsize is None:
-                formatstring = '<u2'  # default to 16 bit images
+    The header length is calculated once from the first file; all files in a data set are
+    assumed to share the same header length and image size.
 
-            else:
-                print("Error in process_LEEM_Data() - unknown bit size when loading raw data")
-                print("Check for incorrect bitsize in YAML experiment file")
-                print("The paramters loaded from file were: bit size = {0}, byte order = {1}".format(bits, byte))
-                return None
+    :argument dirname: string path to current data directory
+    :param ht: integer pixel height of image
+    :param wd: integer pixel width of image
+    :param bits: integer representing bit depth of image, default is 16 bit
+    :param byte: string representing byte order, 'L' for Little-Endian (Intel), 'B' for Big-Endian (Motorola)
+    :return stack: datastack.MemmapStack with shape (ht, wd, number of files)
+    """
+    if ht is None or wd is None:
+        raise InvalidParameterError
+    print('Memory Mapping Data ...')
+    print("Searching for files in {}".format(dirname))
+    files = [name for name in os.listdir(dirname) if name.endswith('.dat') and not name.startswith(".")]
+    files.sort()
+    print('First file is {}.'.format(files[0]))
 
-            arr_list.append(np.fromstring(f.read()[hdln:],
-                                          formatstring).reshape((ht, wd)))
-    print('Creating 3D Array ...')
+    formatstring = get_format_string(bits, byte)
+    if formatstring is None:
+        print("Error in map_LEEM_Data() - unknown bit size when loading raw data")
+        print("Check for incorrect bitsize in YAML experiment file")
+        print("The paramters loaded from file were: bit size = {0}, byte order = {1}".format(bits, byte))
+        return None
+
+    paths = [os.path.join(dirname, fl) for fl in files]
+    hdln = os.path.getsize(paths[0]) - np.dtype(formatstring).itemsize * ht * wd
+    if hdln < 0:
+        raise InvalidParameterError("Error: Image parameters do not match the data file {}.".format(paths[0]))
+    print('Calculated Header Length of First File: {}'.format(hdln))
+    return MemmapStack(paths, ht, wd, formatstring, hdln)
 
-    dat_arr = np.dstack(arr_list)  # create 3D stack of all image files
-    del arr_list[:]  # clear data from list as it ahs now been stored in numpy array
-    # print('Returning New Array Shape: {}'.format(dat_arr.shape))
-    return dat_arr
 
+@functools.lru_cache(maxsize=32)
+def get_window(window_len, window_type='flat'):
+    """Get the normalized window used to smooth I(V) curves, built once for each setting.
 
+    :param window_len: even integer size of window
+    :param window_type: string for type of window function
+    :return: read-only 1d numpy array which sums to 1
+    """
+    if window_type == 'flat':  # moving average
+        w = np.ones(window_len, 'd')
+    else:
+        w = getattr(np, window_type)(window_len)
+    w = w / w.sum()
+    w.flags.writeable = False  # shared by every caller
+    return w
+
+
+@instrument.timed('smooth curve', 'smooth')
 def smooth(inpt, window_len=10, window_type='flat'):
     """Smoothing function based on Scipy Cookbook recipe for data smoothing.
 
@@ -199,19 +408,65 @@ def smooth(inpt, window_len=10, window_type='flat'):
     # w is the window matrix based on pre-defined window functions or unit matrix for flat window
 
     s = np.r_[inpt[window_len-1:0:-1], inpt, inpt[-1:-window_len:-1]]
-    # w = eval('np.'+window_type+'(window_len)')
-    if window_type == 'flat':  # moving average
-        w = np.ones(window_len, 'd')
-    else:
-        w = eval('np.'+window_type+'(window_len)')
 
     # create smoothed data via numpy.convolve using the normalized input window matrix
-    otpt = np.convolve(w/w.sum(), s, mode='valid')
+    otpt = np.convolve(get_window(window_len, window_type), s, mode='valid')
 
     # format otpt to be same size as inpt and return
     return otpt[int(window_len/2-1):-int(window_len/2)]
 
 
+@instrument.timed('smooth cube', 'smooth')
+def smooth_cube(data, window_len=10, window_type='flat', block_size=2**22, callback=None, dtype=np.float64):
+    """Smooth every I(V) curve in a 3d array along the energy axis in vectorized blocks.
+
+    Produces the same result as applying smooth() to each pixel, including the reflected
+    padding at either end of the energy axis, but convolves a block of image rows at a time
+    rather than looping over pixels in Python.
+
+    :param data: 3d numpy array or datastack.MemmapStack (height, width, image number)
+    :param window_len: even integer size of window
+    :param window_type: string for type of window function
+    :param block_size: approximate number of array elements processed per block
+    :param callback: optional callable invoked as callback(start, stop) after rows [start, stop) are smoothed
+    :param dtype: numpy float dtype of the output; float32 halves the memory used
+    :return otpt: 3d numpy float array of smoothed data with the same shape as data
+    """
+    if not (window_len % 2 == 0):
+        window_len += 1
+        print('Window length supplied is odd - using next highest integer: {}.'.format(window_len))
+
+    if window_len <= 3:
+        print('Error in data smoothing - please select a larger window length')
+        return
+
+    if window_type not in ['flat', 'hanning', 'hamming', 'bartlett', 'blackman']:
+        print('Error - Invalid window_type')
+        return
+
+    w = get_window(window_len, window_type)
+
+    ht, wd, nimg = data.shape
+    otpt = None
+    # slice of the convolved signal which lines up with the input, as in smooth()
+    keep = slice(int(window_len/2-1), -int(window_len/2))
+    rows = max(1, block_size // max(1, wd * (nimg + 2 * window_len)))
+    for start in range(0, ht, rows):
+        stop = min(start + rows, ht)
+        block = np.asarray(data[start:stop, :, :], dtype=np.float64)
+        # reflect the input at the beginning and end exactly as smooth() does
+        s = np.concatenate((block[:, :, window_len-1:0:-1], block, block[:, :, -1:-window_len:-1]), axis=2)
+        # the windows are symmetric so the convolution is a dot product over each sliding window
+        conv = np.lib.stride_tricks.sliding_window_view(s, window_len, axis=2) @ w
+        if otpt is None:
+            # matches nimg unless the window is longer than the curves, where smooth() truncates too
+            otpt = np.empty((ht, wd, conv[:, :, keep].shape[2]), dtype=dtype)
+        otpt[start:stop] = conv[:, :, keep]
+        if callback is not None:
+            callback(start, stop)
+    return otpt
+
+
 def crop_images(data, indices):
     """Crop images based on the indices specified.
 
@@ -223,12 +478,22 @@ def crop_images(data, indices):
                 indices[0][1]:indices[1][1]+1]
 
 
-def get_img_array(path, ext=None, swap=False):
+@instrument.timed('load images', 'stack')
+def get_img_array(path, ext=None, swap=False, workers=None, callback=None, crop=None, binning=1, stride=1,
+                  cancelled=None):
     """Generate a 3d numpy array of gray-scale image files.
 
     :param path: path to image files
     :param ext: file extension, default None for raw (.dat) data (not yet implemented)
     :param swap: boolean to swap the byte order of the array; default False
+    :param workers: integer number of threads used to read files; default None lets the pool decide
+    :param callback: optional callable invoked as callback(dat_3d, stop) once the array has been allocated
+                     (stop=0) and again each time images [0, stop) have been read into it.
+                     Not used when swap is True since the returned array is then a copy.
+    :param crop: optional (row start, column start, row stop, column stop) pixel region to keep
+    :param binning: integer size of the square blocks of pixels averaged together; default 1, no binning
+    :param stride: integer step between the files read; default 1, every file
+    :param cancelled: optional callable returning True once loading should stop; see fill_stack()
     :return dat_3d: 3d numpy array (height, width, image number)
     """
     if ext is None:
@@ -267,57 +532,63 @@ def get_img_array(path, ext=None, swap=False):
         # at this point we have found a list of files to parse
         print("Found {} data files to parse.".format(len(files)))
         files.sort()
-        arr_list = []
-        for fl in files:
-            arr_list.append(read_img(os.path.join(path, fl)))
+        paths = [os.path.join(path, fl) for fl in files[::check_stride(stride)]]
+        # the first image determines the shape and dtype of the preallocated 3d array;
+        # read_img() gives every image of one PIL mode the same dtype
+        first = read_img(paths[0])
+        bounds = crop_bounds(first.shape[0], first.shape[1], crop, binning)
+
+        def read_frame(fl):
+            return reduce_frame(read_img(fl), bounds, binning)
+
+        first = reduce_frame(first, bounds, binning)
+        dat_3d = np.empty(first.shape + (len(paths),), dtype=first.dtype)
+        dat_3d[:, :, 0] = first
+
+        def progress(stop):
+            # offset by the first image which was read before the pool started
+            callback(dat_3d, stop + 1)
+
+        report = callback is not None and not swap
+        if report:
+            callback(dat_3d, 0)
+            callback(dat_3d, 1)
+        fill_stack(paths[1:], read_frame, dat_3d[:, :, 1:], workers=workers, callback=progress if report else None,
+                   cancelled=cancelled)
         if swap:
-            return np.dstack(arr_list).byteswap()
+            return dat_3d.byteswap()
         else:
-            return np.dstack(arr_list)
+            return dat_3d
 
 
+@instrument.timed('read image', 'decode')
 def read_img(path):
-        """Use PIL to open an image file, convert to greyscale and output a 2D numpy array.
-
-        In principle should work for .tif, .png, .jpg,
-        and possibly anything else supported by Image.open().
-
-        :param path: path to image to be opened
-        :return:
-        """
-        # print 'opening image %s' % path
-
-        im = Image.open(path)
-
-        # Use the greyscale transformation as defined in the Python Image Library
-        # When converting from a colour image to black and white, the library uses the
-        # ITU - R 601 - 2 luma transform:
-        # L = R * 299 / 1000 + G * 587 / 1000 + B * 114 / 1000
-
-        im = im.convert('L')
-
-        pixels = list(im.getdata())
-        w, h = im.size
-        # generate list of lists of pixel values then convert to numpy array
-        pixels = [pixels[i*w:(i+1)*w] for i in range(h)]
-
-        # try to determine optimal numpy data type
-        m = max(max(pixels))
-        if 0 < m <= 255:
-            typ = np.uint8
-        elif 255 < m <= 65535:
-            typ = np.uint16
-        elif 65535 < m <= 4294967295:
-            typ = np.uint32
-        else:
-            typ = np.uint64
+    """Use PIL to open an image file and output a 2D numpy array at the native bit depth of the image.
 
-        try:
-            return np.array(pixels).astype(typ)
-        except TypeError as e:
-            print("Error reading image into numpy array")
-            print("Max value stored exceeds that of 64 bit integer")
-            raise e
+    In principle should work for .tif, .png, .jpg,
+    and possibly anything else supported by Image.open().
+
+    Greyscale images keep their bit depth: 8-bit images are returned as uint8, 16-bit images
+    (PIL modes I;16, I;16L, I;16B) as uint16 and 32-bit integer images (PIL mode I) as int32.
+    The dtype depends only on the PIL mode, never on the pixel values, so every image of a
+    stack in one mode fits the array allocated for the first. Colour and palette images are
+    converted to 8-bit greyscale. Pixel data is handed to numpy through the PIL array interface rather than
+    as Python objects.
+
+    :param path: path to image to be opened
+    :return: 2d numpy array
+    """
+    with Image.open(path) as im:
+        if im.mode in ('L', 'F', 'I') or im.mode.startswith('I;16'):
+            arr = np.asarray(im)
+        else:
+            # Use the greyscale transformation as defined in the Python Image Library
+            # When converting from a colour image to black and white, the library uses the
+            # ITU - R 601 - 2 luma transform:
+            # L = R * 299 / 1000 + G * 587 / 1000 + B * 114 / 1000
+            arr = np.asarray(im.convert('L'))
+    # 16-bit images may be decoded big-endian; always hand back native byte order
+    return arr.astype(arr.dtype.newbyteorder('='), copy=False)
 
 
 def parse_tiff_header(img, w, h, byte_depth):
@@ -0,0 +1,270 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Headless batch I(V) extraction.
+
+Extract I(V) curves from one or more experiments without starting the GUI.
+Each experiment is described by the same YAML file used to load data in the
+GUI; the regions to extract are given in a separate ROI YAML file which is
+applied to every experiment. Experiments are processed in parallel, one per
+process, and the curves for each experiment are written together in one pass
+with ivoutput; by default to a single tab delimited text file with the energy
+in the first column and one column per ROI.
+
+This module does not import PyQt and can be run on machines without a display.
+
+Usage:
+    python batch.py EXPERIMENT.yaml [EXPERIMENT.yaml ...] --rois ROIS.yaml [options]
+
+Run with --help for the full list of options.
+
+ROI YAML format (all coordinates are array coordinates of the loaded data, after any Crop and
+Binning set in the experiment: x is the column and y is the row; every section is optional):
+
+    ROIs:
+         # single pixels, [x, y]
+         Points: [[100, 120], [300, 310]]
+         # rectangles including both corner pixels, [x1, y1, x2, y2]
+         Rectangles: [[10, 10, 50, 40]]
+         # square LEED beam boxes of side 2*radius + 1, [x, y] or [x, y, radius]
+         Beams: [[250, 260], [180, 200, 10]]
+         Beam Radius: 20
+         # circles, [x, y, radius]
+         Circles: [[400, 400, 25]]
+         # polygons, list of [x, y] vertices
+         Polygons: [[[0, 0], [40, 0], [20, 30]]]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import yaml
+
+import cubecache
+import instrument
+import ivoutput
+import LEEMFUNCTIONS as LF
+import roi
+from experiment import Experiment
+
+DEFAULT_BEAM_RADIUS = 20
+
+
+def load_rois(path):
+    """Read regions of interest from an ROI YAML file.
+
+    :param path: string path to ROI YAML file
+    :return: tuple (names, rois) of a list of column names and a list of roi objects
+    """
+    with open(path, 'r') as f:
+        settings = yaml.safe_load(f)
+    if not isinstance(settings, dict) or not isinstance(settings.get('ROIs'), dict):
+        raise ValueError("ROI file {0} must contain a top level 'ROIs' section".format(path))
+    settings = settings['ROIs']
+    beam_rad = settings.get('Beam Radius', DEFAULT_BEAM_RADIUS)
+
+    names = []
+    rois = []
+    for idx, (x, y) in enumerate(settings.get('Points') or []):
+        names.append('point_{0}'.format(idx))
+        rois.append(roi.RectROI.from_center(x, y, 0))
+    for idx, (x1, y1, x2, y2) in enumerate(settings.get('Rectangles') or []):
+        tl, br = (min(x1, x2), min(y1, y2)), (max(x1, x2), max(y1, y2))
+        names.append('rect_{0}'.format(idx))
+        rois.append(roi.RectROI.from_corners(tl, br))
+    for idx, beam in enumerate(settings.get('Beams') or []):
+        rad = beam[2] if len(beam) > 2 else beam_rad
+        names.append('beam_{0}'.format(idx))
+        rois.append(roi.RectROI.from_center(beam[0], beam[1], rad))
+    for idx, (x, y, rad) in enumerate(settings.get('Circles') or []):
+        names.append('circle_{0}'.format(idx))
+        rois.append(roi.CircleROI(x, y, rad))
+    for idx, vertices in enumerate(settings.get('Polygons') or []):
+        names.append('polygon_{0}'.format(idx))
+        rois.append(roi.PolygonROI(vertices))
+    if not rois:
+        raise ValueError("ROI file {0} does not define any regions of interest".format(path))
+    return names, rois
+
+
+def load_experiment(path):
+    """Parse an experiment YAML file.
+
+    :param path: string path to experiment YAML file
+    :return: experiment.Experiment object
+    """
+    exp = Experiment()
+    exp.fromFile(path)
+    if not exp.path or not exp.data_type:
+        raise ValueError("Could not read experiment settings from {0}".format(path))
+    return exp
+
+
+def energy_list(exp, num):
+    """Generate the energy (or time) values for each image in an experiment, as the GUI does.
+
+    Only every Energy Stride-th file is loaded, so the step between images is scaled accordingly.
+
+    :param exp: experiment.Experiment object
+    :param num: number of images
+    :return: list of floats
+    """
+    if exp.time:
+        time_step = exp.time_step if exp.time_step else 1.0
+        return [k * time_step * exp.energy_stride for k in range(num)]
+    elist = [exp.mine]
+    while len(elist) < num:
+        elist.append(round(elist[-1] + exp.stepe * exp.energy_stride, 2))
+    return elist[:num]
+
+
+def load_data(exp, use_cache=True, workers=None):
+    """Load the 3d data array for an experiment, from the cube cache when possible.
+
+    Images are cropped, binned, and subsampled as set in the experiment while they are read.
+
+    :param exp: experiment.Experiment object
+    :param use_cache: if True read from and write to the persistent cube cache when the experiment allows it
+    :param workers: number of threads used to read data files; default from the experiment
+    :return: 3d numpy array (height, width, image number)
+    """
+    path = str(exp.path)
+    if workers is None:
+        workers = exp.workers
+    use_cache = use_cache and exp.cache
+    signature = None
+    if use_cache:
+        signature = cubecache.dataset_signature(path, cubecache.experiment_params(exp))
+        data = cubecache.load_cube_cache(path, signature)
+        if data is not None:
+            return data
+
+    reduction = dict(crop=exp.crop, binning=exp.binning, stride=exp.energy_stride)
+    if exp.data_type.lower() == 'raw':
+        data = LF.process_LEEM_Data(path, exp.imh, exp.imw, exp.bit, exp.byte_order, workers=workers, **reduction)
+    elif exp.data_type.lower() == 'image':
+        data = LF.get_img_array(path, ext=exp.ext, workers=workers, **reduction)
+    else:
+        raise ValueError("Unknown Data Type {0}; expected Raw or Image".format(exp.data_type))
+
+    if use_cache:
+        cubecache.write_cube_cache(path, data, signature, elist=energy_list(exp, data.shape[2]))
+    return data
+
+
+def process_experiment(exp_path, names, rois, outdir, smooth=False, window_type='flat', window_len=10,
+                       use_cache=True, workers=None, fmt='tsv'):
+    """Extract I(V) curves for every ROI from a single experiment and write them to outdir.
+
+    :param exp_path: string path to experiment YAML file
+    :param names: list of column names for each roi
+    :param rois: list of roi objects
+    :param outdir: string path to output directory
+    :param smooth: if True smooth each curve before writing
+    :param window_type: smoothing window type, see LEEMFUNCTIONS.smooth()
+    :param window_len: smoothing window length
+    :param use_cache: if True read from and write to the persistent cube cache
+    :param workers: number of threads used to read data files
+    :param fmt: output format, one of ivoutput.FORMATS
+    :return: list of string paths written
+    """
+    exp = load_experiment(exp_path)
+    data = load_data(exp, use_cache=use_cache, workers=workers)
+    curves = roi.extract_iv(data, rois)
+    xdata = energy_list(exp, data.shape[2])
+    if smooth:
+        smoothed = LF.smooth_cube(curves[:, np.newaxis, :], window_len=window_len, window_type=window_type)
+        if smoothed is not None:
+            curves = smoothed[:, 0, :]
+            xdata = xdata[:curves.shape[1]]
+
+    name = exp.name if exp.name else os.path.splitext(os.path.basename(exp_path))[0]
+    outname = os.path.join(outdir, "{0}_IV".format(name))
+    return ivoutput.write_iv(outname, xdata, curves, names, fmt=fmt, suffixes=['_' + n for n in names],
+                             xlabel='Time' if exp.time else 'E')
+
+
+def build_parser():
+    """Create the command line argument parser."""
+    parser = argparse.ArgumentParser(description="Extract I(V) curves from PLEASE experiments without the GUI.")
+    parser.add_argument('experiments', nargs='+', help="experiment YAML files")
+    parser.add_argument('--rois', required=True, help="ROI YAML file applied to every experiment")
+    parser.add_argument('--out', default=os.getcwd(), help="output directory (default: current directory)")
+    parser.add_argument('--format', default='tsv', choices=ivoutput.available_formats(),
+                        help="output format (default: tsv, one column per ROI; txt writes one file per ROI)")
+    parser.add_argument('--smooth', action='store_true', help="smooth each I(V) curve before writing")
+    parser.add_argument('--window-type', default='flat',
+                        choices=['flat', 'hanning', 'hamming', 'bartlett', 'blackman'],
+                        help="smoothing window type (default: flat)")
+    parser.add_argument('--window-len', type=int, default=10, help="smoothing window length (default: 10)")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="number of experiments processed in parallel (default: number of cores)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="threads used to read the files of each experiment (default: from the experiment)")
+    parser.add_argument('--no-cache', action='store_true', help="neither read nor write the persistent cube cache")
+    parser.add_argument('--trace', default=None,
+                        help="record timings, print a summary, and write a Chrome trace JSON file to this path; "
+                             "experiments are then processed one at a time")
+    return parser
+
+
+def main(argv=None):
+    """Run batch I(V) extraction from the command line.
+
+    :param argv: list of command line arguments; default sys.argv[1:]
+    :return: exit status, 0 if every experiment succeeded
+    """
+    args = build_parser().parse_args(argv)
+    names, rois = load_rois(args.rois)
+    os.makedirs(args.out, exist_ok=True)
+    options = dict(smooth=args.smooth, window_type=args.window_type, window_len=args.window_len,
+                   use_cache=not args.no_cache, workers=args.workers, fmt=args.format)
+
+    jobs = args.jobs if args.jobs is not None else os.cpu_count()
+    jobs = max(1, min(jobs or 1, len(args.experiments)))
+    if args.trace:
+        # timings are recorded in this process only
+        jobs = 1
+        instrument.recorder.enable()
+    status = 0
+    t0 = time.time()
+    if jobs == 1:
+        for exp_path in args.experiments:
+            try:
+                outpaths = process_experiment(exp_path, names, rois, args.out, **options)
+            except Exception as e:
+                print("Error processing {0}: {1}".format(exp_path, e))
+                status = 1
+            else:
+                print("Wrote {0}".format(", ".join(outpaths)))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(process_experiment, exp_path, names, rois, args.out, **options)
+                       for exp_path in args.experiments]
+            for exp_path, future in zip(args.experiments, futures):
+                try:
+                    outpaths = future.result()
+                except Exception as e:
+                    print("Error processing {0}: {1}".format(exp_path, e))
+                    status = 1
+                else:
+                    print("Wrote {0}".format(", ".join(outpaths)))
+    print("Processed {0} experiment(s) in {1:.2f} s".format(len(args.experiments), time.time() - t0))
+    if args.trace:
+        print(instrument.recorder.summary())
+        instrument.recorder.write_trace(args.trace)
+        print("Wrote timing trace {}".format(args.trace))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
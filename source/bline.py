@@ -15,6 +15,14 @@ a two-dimensional array.
 For vertical or horizontal lines this trivially returns the
 row or column. For diagonal lines, it discerns which array
 elements are crossed by the line and returns the points.
+
+Every function here works on many segments or polylines at
+once: the coordinates of all of them are computed by a few
+whole-array numpy operations and returned concatenated, along
+with offsets marking where each line starts. LineProfiles uses
+evenly spaced subpixel samples with bilinear interpolation so
+that the intensity along any number of lines is gathered from
+an image with a single fancy indexing operation.
 """
 
 import numpy as np
@@ -33,65 +41,186 @@ def bline(x0, y0, xf, yf):
     :param yf: int final y location of line segment
     :returns:  list of points in (x, y) format for pixels along the line segment
     """
+    xs, ys, _ = bline_many([(x0, y0, xf, yf)])
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def bline_many(segments):
+    """Bresenham points of many line segments, computed without a Python loop over points.
+
+    The points of each segment are identical to those stepped through one at a
+    time by the Bresenham Algorithm: point k of a segment lies k steps along its
+    longest axis and (longest // 2 + k * shortest) // longest steps along the other.
+
+    :param segments: sequence of (x0, y0, xf, yf) integer endpoints, or an (n, 4) integer array
+    :return: tuple (xs, ys, offsets) of integer arrays; the points of segment i are
+             xs[offsets[i]:offsets[i + 1]], ys[offsets[i]:offsets[i + 1]]
+    """
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+    x0, y0, xf, yf = segments.T
     w = xf - x0  # run
     h = yf - y0  # rise
-    dx1 = 0
-    dy1 = 0
-    dx2 = 0
-    dy2 = 0
-    # To speed up this calculation, first check for pure vertical or horizontal lines
-    if w != 0 and h == 0:
-        # horizontal line:
-        points = [(x0, y0)]
-        dx = 1*np.sign(xf - x0)
-        while len(points) < w + 1:
-            points.append((points[-1][0] + dx, y0))
-        return points
-    if w == 0 and h != 0:
-        # vertical line
-        points = [(x0, y0)]
-        dy = 1*np.sign(yf - y0)
-        while len(points) < h + 1:
-            points.append((x0, points[-1][1] + dy))
-        return points
-
-    # configure settings for which Octant the line falls in
-    if w < 0:
-        dx1 = -1
-        dx2 = -1
-    elif w > 0:
-        dx1 = 1
-        dx2 = 1
-
-    if h < 0:
-        dy1 = -1
-    elif h > 0:
-        dy1 = 1
-
-    longest = abs(w)
-    shortest = abs(h)
-    if not longest > shortest:
-        longest = abs(h)
-        shortest = abs(w)
-        if h < 0:
-            dy2 = -1
-        elif h > 0:
-            dy2 = 1
-        dx2 = 0
-
-    # start calculation
-    numerator = longest >> 1
-    x = x0
-    y = y0  # the first point appended will be the initial point of the line
-    points = []
-    for i in range(longest + 1):
-        points.append((x, y))
-        numerator += shortest
-        if not numerator < longest:
-            numerator -= longest
-            x += dx1
-            y += dy1
-        else:
-            x += dx2
-            y += dy2
-    return points
+    steep = np.abs(w) <= np.abs(h)  # step along y, including single point segments
+    longest = np.where(steep, np.abs(h), np.abs(w))
+    shortest = np.where(steep, np.abs(w), np.abs(h))
+
+    counts = longest + 1
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    seg = np.repeat(np.arange(len(segments)), counts)  # segment of every point
+    k = np.arange(offsets[-1]) - offsets[seg]  # step number of every point within its segment
+
+    longest = longest[seg]
+    diagonal = ((longest >> 1) + k * shortest[seg]) // np.maximum(longest, 1)  # steps along both axes
+    straight = k - diagonal  # steps along the longest axis only
+    xs = x0[seg] + np.sign(w)[seg] * (diagonal + np.where(steep[seg], 0, straight))
+    ys = y0[seg] + np.sign(h)[seg] * (diagonal + np.where(steep[seg], straight, 0))
+    return xs, ys, offsets
+
+
+def bline_polylines(polylines):
+    """Bresenham points of many polylines; vertices shared by consecutive segments appear once.
+
+    :param polylines: sequence of polylines, each a sequence of one or more integer (x, y) vertices
+    :return: tuple (xs, ys, offsets) of integer arrays; the points of polyline i are
+             xs[offsets[i]:offsets[i + 1]], ys[offsets[i]:offsets[i + 1]]
+    """
+    segments, firsts = _polyline_segments(polylines)
+    xs, ys, seg_offsets = bline_many(segments)
+    # drop the first point of every segment after the first of each polyline
+    keep = np.ones(len(xs), dtype=bool)
+    keep[seg_offsets[:-1][~firsts]] = False
+    counts = np.zeros(0, dtype=np.int64)
+    if len(segments):
+        counts = np.add.reduceat(keep.astype(np.int64), seg_offsets[:-1][firsts])
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return xs[keep], ys[keep], offsets
+
+
+def sample_polylines(polylines, spacing=1.0):
+    """Evenly spaced subpixel points along many polylines.
+
+    Points are placed every spacing pixels of arc length, starting at the first
+    vertex of each polyline; the last vertex is included only if the length of
+    the polyline is a multiple of spacing.
+
+    :param polylines: sequence of polylines, each a sequence of one or more (x, y) vertices
+    :param spacing: float distance in pixels between consecutive points
+    :return: tuple (xs, ys, distance, offsets); xs, ys are float coordinates, distance is the
+             arc length of each point from the start of its polyline, and the points of
+             polyline i are [offsets[i]:offsets[i + 1]]
+    """
+    if spacing <= 0:
+        raise ValueError("spacing must be positive, got {}".format(spacing))
+    segments, firsts = _polyline_segments(polylines)
+    segments = segments.astype(np.float64)
+    start = segments[:, :2]
+    delta = segments[:, 2:] - start
+    length = np.hypot(delta[:, 0], delta[:, 1])
+
+    # arc length of the end of every segment measured from the start of the first polyline
+    ends = np.cumsum(length)
+    line_start = (ends - length)[firsts]
+    line_length = np.add.reduceat(length, np.flatnonzero(firsts)) if len(length) else length
+    counts = np.floor(line_length / spacing + 1e-9).astype(np.int64) + 1
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    point_line = np.repeat(np.arange(len(counts)), counts)
+    distance = (np.arange(offsets[-1]) - offsets[point_line]) * float(spacing)
+    position = line_start[point_line] + distance
+    # the segment containing each point, kept within the point's own polyline
+    seg_first = np.flatnonzero(firsts)
+    seg_last = np.append(seg_first[1:], len(length)) - 1
+    seg = np.searchsorted(ends, position, side='right')
+    seg = np.clip(seg, seg_first[point_line], seg_last[point_line])
+    along = position - (ends - length)[seg]
+    t = np.clip(np.divide(along, length[seg], out=np.zeros_like(along), where=length[seg] > 0), 0, 1)
+    xs = start[seg, 0] + t * delta[seg, 0]
+    ys = start[seg, 1] + t * delta[seg, 1]
+    return xs, ys, distance, offsets
+
+
+def bilinear_indices(xs, ys, shape):
+    """Pixel indices and weights which interpolate an image at subpixel points.
+
+    Points are clipped to the image. The value at point i is
+    (image[rows[:, i], cols[:, i]] * weights[:, i]).sum().
+
+    :param xs: float array of x (column) coordinates
+    :param ys: float array of y (row) coordinates
+    :param shape: (height, width, ...) of the image or data set
+    :return: tuple (rows, cols, weights) of (4, n) arrays
+    """
+    ht, wd = shape[0], shape[1]
+    xs = np.clip(np.asarray(xs, dtype=np.float64), 0, wd - 1)
+    ys = np.clip(np.asarray(ys, dtype=np.float64), 0, ht - 1)
+    c0 = np.minimum(np.floor(xs).astype(np.intp), max(wd - 2, 0))
+    r0 = np.minimum(np.floor(ys).astype(np.intp), max(ht - 2, 0))
+    c1 = np.minimum(c0 + 1, wd - 1)
+    r1 = np.minimum(r0 + 1, ht - 1)
+    fx = xs - c0
+    fy = ys - r0
+    rows = np.stack([r0, r0, r1, r1])
+    cols = np.stack([c0, c1, c0, c1])
+    weights = np.stack([(1 - fy) * (1 - fx), (1 - fy) * fx, fy * (1 - fx), fy * fx])
+    return rows, cols, weights
+
+
+class LineProfiles(object):
+    """Sample positions along any number of lines, computed once and gathered from any frame."""
+
+    def __init__(self, polylines, shape, spacing=1.0):
+        """Place points every spacing pixels along each polyline of an image of the given shape.
+
+        :param polylines: sequence of polylines, each a sequence of (x, y) vertices;
+                          a line segment is a polyline with two vertices
+        :param shape: (height, width, ...) of the image or data set
+        :param spacing: float distance in pixels between consecutive samples
+        """
+        self.xs, self.ys, self.distance, self.offsets = sample_polylines(polylines, spacing)
+        self.rows, self.cols, self.weights = bilinear_indices(self.xs, self.ys, shape)
+
+    def __len__(self):
+        """Number of lines."""
+        return len(self.offsets) - 1
+
+    def gather(self, frame):
+        """Interpolate a 2d image at every sample of every line with one fancy indexing operation.
+
+        :param frame: 2d numpy array
+        :return: 1d float array of values, concatenated in the order of self.offsets
+        """
+        return (np.asarray(frame)[self.rows, self.cols] * self.weights).sum(axis=0)
+
+    def profiles(self, frame):
+        """Get the profile of each line through a 2d image.
+
+        :param frame: 2d numpy array
+        :return: list of (distance, values) tuples of 1d arrays, one per line
+        """
+        values = self.gather(frame)
+        return [(self.distance[a:b], values[a:b]) for a, b in zip(self.offsets[:-1], self.offsets[1:])]
+
+
+def _polyline_segments(polylines):
+    """Split polylines into segments.
+
+    :return: tuple of an (n, 4) array of (x0, y0, xf, yf) segments and a boolean array
+             marking the first segment of each polyline; a polyline with a single vertex
+             becomes one segment of zero length
+    """
+    segments = []
+    firsts = []
+    for vertices in polylines:
+        vertices = np.asarray(vertices).reshape(-1, 2)
+        if len(vertices) == 0:
+            raise ValueError("A polyline needs at least one vertex")
+        if len(vertices) == 1:
+            vertices = np.concatenate([vertices, vertices])
+        segments.append(np.hstack([vertices[:-1], vertices[1:]]))
+        firsts.append(np.arange(len(vertices) - 1) == 0)
+    if not segments:
+        return np.zeros((0, 4)), np.zeros(0, dtype=bool)
+    return np.concatenate(segments), np.concatenate(firsts)
@@ -26,8 +26,11 @@ import pprint
 import sys
 import subprocess
 
-# 3rd party imports
-import pendulum
+# local project imports
+from lazyimport import lazy_import
+
+# 3rd party imports; only needed once a config file is written
+pendulum = lazy_import('pendulum')
 
 
 def output_environment_config():
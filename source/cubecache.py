@@ -0,0 +1,299 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Persistent cache of loaded data sets.
+
+The first time a data set is loaded, the 3d data array is written to a single
+contiguous .npy file alongside a small JSON sidecar holding the energy list,
+dtype, shape, and a signature of the source files. Subsequent loads of the same
+Data Path open the .npy file as a read-only memory map, which takes milliseconds
+regardless of the number of files in the data set.
+
+The signature records the name, size, and modification time of every file in
+the Data Path along with the parameters used to load the data. Any change to
+either invalidates the cache.
+
+By default caches are stored in ~/.please/cache. Set the environment variable
+PLEASE_CACHE_DIR to use a different location.
+
+The caches together use at most MAX_CACHE_BYTES of disk space, or the number of
+megabytes given by the environment variable PLEASE_CACHE_SIZE. Writing a new
+cache removes the least recently used caches beyond that size, and data sets
+larger than the limit are not cached at all.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+import instrument
+
+CACHE_VERSION = 1
+CUBE_FILE = "cube.npy"
+SIDECAR_FILE = "cube.json"
+MAX_CACHE_BYTES = 2**34  # default upper bound on the disk space used by every cache together
+
+
+def get_cache_limit():
+    """Get the number of bytes all data set caches together may use."""
+    size = os.environ.get("PLEASE_CACHE_SIZE")
+    if size:
+        try:
+            return int(float(size) * 2**20)
+        except ValueError:
+            print("Error: PLEASE_CACHE_SIZE must be a number of megabytes; using the default.")
+    return MAX_CACHE_BYTES
+
+
+def get_cache_root():
+    """Get the directory under which all data set caches are stored."""
+    root = os.environ.get("PLEASE_CACHE_DIR")
+    if not root:
+        root = os.path.join(os.path.expanduser("~"), ".please", "cache")
+    return root
+
+
+def get_cache_dir(data_path, cache_root=None):
+    """Get the cache directory for the data set located at data_path.
+
+    :param data_path: string path to directory containing the data files
+    :param cache_root: string path to root cache directory; default from get_cache_root()
+    :return: string path to cache directory unique to data_path
+    """
+    if cache_root is None:
+        cache_root = get_cache_root()
+    key = os.path.normcase(os.path.abspath(data_path))
+    return os.path.join(cache_root, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+
+def experiment_params(exp):
+    """Collect the experiment settings which determine the contents of the loaded data array.
+
+    :param exp: experiment.Experiment object
+    :return: dictionary of JSON serializable load parameters for dataset_signature()
+    """
+    params = {'Type': str(exp.data_type),
+              'File Format': str(exp.ext),
+              'Height': exp.imh,
+              'Width': exp.imw,
+              'Bit Size': exp.bit,
+              'Byte Order': exp.byte_order}
+    # load-time reductions are only recorded when used so that existing caches remain valid
+    if exp.crop is not None:
+        params['Crop'] = list(exp.crop)
+    if exp.binning != 1:
+        params['Binning'] = exp.binning
+    if exp.energy_stride != 1:
+        params['Energy Stride'] = exp.energy_stride
+    return params
+
+
+def dataset_signature(data_path, params=None):
+    """Generate a signature which changes whenever the data set or its load parameters change.
+
+    :param data_path: string path to directory containing the data files
+    :param params: dictionary of JSON serializable parameters used to load the data
+    :return: dictionary with sorted (name, size, mtime) for each file and the load parameters
+    """
+    files = []
+    for entry in os.scandir(data_path):
+        if entry.name.startswith(".") or not entry.is_file():
+            continue
+        stat = entry.stat()
+        files.append([entry.name, stat.st_size, stat.st_mtime_ns])
+    files.sort()
+    return {"version": CACHE_VERSION,
+            "files": files,
+            "params": params if params is not None else {}}
+
+
+@instrument.timed('read cube cache', 'read')
+def load_cube_cache(data_path, signature, cache_root=None):
+    """Open a cached data set as a read-only memory map if the cache is still valid.
+
+    :param data_path: string path to directory containing the data files
+    :param signature: dictionary from dataset_signature() describing the current data set
+    :param cache_root: string path to root cache directory; default from get_cache_root()
+    :return: 3d np.memmap of data or None if there is no valid cache
+    """
+    cache_dir = get_cache_dir(data_path, cache_root)
+    try:
+        with open(os.path.join(cache_dir, SIDECAR_FILE), 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("signature") != signature:
+        return None
+
+    try:
+        cube = np.load(os.path.join(cache_dir, CUBE_FILE), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if list(cube.shape) != meta.get("shape") or cube.dtype.str != meta.get("dtype"):
+        return None
+    try:
+        os.utime(os.path.join(cache_dir, SIDECAR_FILE))  # mark as recently used
+    except OSError:
+        pass
+    return cube
+
+
+def load_cube_metadata(data_path, cache_root=None):
+    """Read the JSON sidecar for a cached data set without validating it.
+
+    :return: dictionary of cache metadata or None if no cache exists
+    """
+    try:
+        with open(os.path.join(get_cache_dir(data_path, cache_root), SIDECAR_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@instrument.timed('prefetch cube cache', 'read')
+def prefetch_cube_cache(data_path, cache_root=None, block_size=2**24, cancelled=None):
+    """Read a cached data set from disk so the operating system holds it in memory for a later load.
+
+    The cache is not validated; load_cube_cache() still checks it before use.
+    :param data_path: string path to directory containing the data files
+    :param cache_root: string path to root cache directory; default from get_cache_root()
+    :param block_size: integer number of bytes read at a time
+    :param cancelled: optional callable returning True once reading should stop
+    :return: integer number of bytes read; 0 if there is no cache
+    """
+    buf = bytearray(block_size)
+    nbytes = 0
+    try:
+        with open(os.path.join(get_cache_dir(data_path, cache_root), CUBE_FILE), 'rb', buffering=0) as f:
+            while not (cancelled is not None and cancelled()):
+                n = f.readinto(buf)
+                if not n:
+                    break
+                nbytes += n
+    except OSError:
+        pass
+    return nbytes
+
+
+@instrument.timed('write cube cache', 'write')
+def write_cube_cache(data_path, data, signature, elist=None, cache_root=None, max_bytes=None, block_size=2**24):
+    """Write a data set to a single contiguous .npy file plus JSON sidecar.
+
+    The cube is written to a temporary file and renamed into place before the
+    sidecar is written, so an interrupted write never produces a valid cache.
+    The data is copied a block of image rows at a time, so that each block is
+    written to one contiguous part of the file. Least recently used caches are
+    then removed until every cache fits within max_bytes.
+
+    :param data_path: string path to directory containing the data files
+    :param data: 3d numpy array or datastack.MemmapStack (height, width, image number)
+    :param signature: dictionary from dataset_signature() taken before the data was loaded
+    :param elist: list of energy (or time) values corresponding to the third axis of data
+    :param cache_root: string path to root cache directory; default from get_cache_root()
+    :param max_bytes: upper bound on the disk space used by every cache together; default from get_cache_limit()
+    :param block_size: approximate number of array elements copied at a time
+    :return: string path to the cache directory, or None if the data set is larger than max_bytes
+    """
+    if max_bytes is None:
+        max_bytes = get_cache_limit()
+    dtype = np.dtype(data.dtype)
+    ht, wd, nimg = data.shape
+    if ht * wd * nimg * dtype.itemsize > max_bytes:
+        return None
+    cache_dir = get_cache_dir(data_path, cache_root)
+    os.makedirs(cache_dir, exist_ok=True)
+    sidecar = os.path.join(cache_dir, SIDECAR_FILE)
+    if os.path.exists(sidecar):
+        os.remove(sidecar)  # invalidate before touching the cube
+
+    cube_path = os.path.join(cache_dir, CUBE_FILE)
+    tmp_path = cube_path + ".tmp"
+    out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype, shape=tuple(data.shape))
+    rows = max(1, block_size // max(1, wd * nimg))
+    for start in range(0, ht, rows):
+        out[start:start + rows] = data[start:start + rows]
+    out.flush()
+    del out
+    os.replace(tmp_path, cube_path)
+
+    meta = {"data_path": os.path.abspath(data_path),
+            "shape": list(data.shape),
+            "dtype": dtype.str,
+            "elist": [float(e) for e in elist] if elist is not None else [],
+            "signature": signature}
+    with open(sidecar + ".tmp", 'w') as f:
+        json.dump(meta, f)
+    os.replace(sidecar + ".tmp", sidecar)
+    evict_cube_caches(max_bytes, cache_root=cache_root, keep=cache_dir)
+    return cache_dir
+
+
+def evict_cube_caches(max_bytes, cache_root=None, keep=None):
+    """Remove the least recently used data set caches until all of them fit within max_bytes.
+
+    :param max_bytes: upper bound on the disk space used by every cache together
+    :param cache_root: string path to root cache directory; default from get_cache_root()
+    :param keep: optional string path to a cache directory which is never removed
+    :return: list of string paths to the cache directories removed
+    """
+    if cache_root is None:
+        cache_root = get_cache_root()
+    caches = []  # (time last used, size in bytes, cache directory)
+    try:
+        entries = list(os.scandir(cache_root))
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        size = 0
+        used = 0.0
+        for name in (CUBE_FILE, SIDECAR_FILE):
+            try:
+                stat = os.stat(os.path.join(entry.path, name))
+            except OSError:
+                continue
+            size += stat.st_size
+            used = max(used, stat.st_mtime)
+        caches.append((used or time.time(), size, entry.path))
+    caches.sort()
+    total = sum(size for _, size, _ in caches)
+    removed = []
+    for _, size, cache_dir in caches:
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.normcase(cache_dir) == os.path.normcase(keep):
+            continue
+        remove_cache_dir(cache_dir)
+        total -= size
+        removed.append(cache_dir)
+    return removed
+
+
+def remove_cache_dir(cache_dir):
+    """Remove the cache files in cache_dir, then the directory itself if nothing else is left in it."""
+    for name in (SIDECAR_FILE, CUBE_FILE, CUBE_FILE + ".tmp", SIDECAR_FILE + ".tmp"):
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    try:
+        os.rmdir(cache_dir)
+    except OSError:
+        pass
+
+
+def clear_cube_cache(data_path, cache_root=None):
+    """Remove the cached data set for data_path if it exists."""
+    cache_dir = get_cache_dir(data_path, cache_root)
+    for name in (SIDECAR_FILE, CUBE_FILE):
+        path = os.path.join(cache_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
@@ -23,7 +23,9 @@ class LeedData(object):
 
     def __init__(self, br=20):
         """Initialize LEEDData object."""
-        self.dat3d = None  # placeholder for main data; overwritten on load
+        self.dat3d = None  # placeholder for main data (datastack.DataStack); overwritten on load
+        self.version = 0  # incremented each time new data is stored in dat3d
+        self.loaded = 0  # number of images along the third axis of dat3d which have been read
         self.elist = []  # list of energy values
         self.ilist = []
         self.data_dir = ''  # placeholder for path to currently stored data
@@ -45,9 +47,12 @@ class LeemData(object):
         self.wd = 0  # image width to be set by User
         self.hdln = 0  # image header length to be set by User
         # Data
-        self.dat3d = None  # placeholder for main data; overwritten on load
+        self.dat3d = None  # placeholder for main data (datastack.DataStack); overwritten on load
+        self.version = 0  # incremented each time new data is stored in dat3d
+        self.loaded = 0  # number of images along the third axis of dat3d which have been read
         self.elist = []  # list of energy values
         self.ilist = []
+        self.smoothed = None  # smoothcache.SmoothingCache of smoothed I(V) curves; overwritten on load
         self.e_step = 0
         # Directories and Image index
         self.data_dir = ''
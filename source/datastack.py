@@ -0,0 +1,306 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Storage for loaded LEEM/LEED data sets.
+
+A MemmapStack presents a directory of raw binary data files as a 3d array
+with the same (height, width, image number) layout as the array returned by
+LEEMFUNCTIONS.process_LEEM_Data(). Each file is memory mapped the first time
+it is indexed and image data is only paged in from disk when it is accessed.
+Thus opening a data set costs almost no RAM regardless of its size. Only the
+most recently used maps are kept open, so indexing every file, as reading the
+I(V) curve of one pixel does, never runs out of file handles.
+
+A DataStack holds a loaded data set, either a numpy array or a MemmapStack,
+in a storage layout suited to how it is accessed. It provides frame(i) for
+displaying an image and spectrum(y, x) for the I(V) curve of one pixel.
+Indexing a DataStack always uses the (height, width, image number) axes.
+
+A GrowableStack is a DataStack which images are appended to one at a time
+as they are acquired, for watching a directory during data acquisition.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_OPEN_MAPS = 64  # most files a MemmapStack keeps mapped at once; each map holds an open file handle
+
+
+def max_open_maps():
+    """Get the number of files a MemmapStack may keep mapped, well below the open file limit of the process."""
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, OSError, ValueError):
+        # resource is not available on Windows
+        return MAX_OPEN_MAPS
+    if soft == resource.RLIM_INFINITY:
+        return MAX_OPEN_MAPS
+    return max(1, min(MAX_OPEN_MAPS, soft // 4))
+
+
+class MemmapStack(object):
+    """Read-only 3d view of a stack of raw data files backed by np.memmap.
+
+    Indexing follows numpy semantics for the (row, column, image) axes and
+    returns regular numpy arrays, so code written for the 3d array produced by
+    process_LEEM_Data() can use a MemmapStack unchanged.
+
+    Note: every mapped file holds an open file handle, so only the max_open
+    most recently used maps are kept and older ones are closed.
+    """
+
+    def __init__(self, files, ht, wd, formatstring, hdln, max_open=None):
+        """Setup mapping parameters; no files are opened until they are indexed.
+
+        :param files: list of string paths to data files sorted by image number
+        :param ht: integer pixel height of image
+        :param wd: integer pixel width of image
+        :param formatstring: numpy dtype string such as '<u2'
+        :param hdln: integer header length in bytes preceding the image data in each file
+        :param max_open: integer number of files kept mapped at once; default None uses max_open_maps()
+        """
+        self.files = list(files)
+        self.hdln = hdln
+        self.dtype = np.dtype(formatstring)
+        self.shape = (ht, wd, len(self.files))
+        self.ndim = 3
+        self.max_open = max_open_maps() if max_open is None else max(1, int(max_open))
+        self._maps = OrderedDict()  # file number -> np.memmap, least recently used first
+
+    def __len__(self):
+        """Match len() of a 3d numpy array: the length of the first axis."""
+        return self.shape[0]
+
+    @property
+    def size(self):
+        """Total number of elements in the stack."""
+        return self.shape[0] * self.shape[1] * self.shape[2]
+
+    @property
+    def nbytes(self):
+        """Total number of bytes of image data in the stack."""
+        return self.size * self.dtype.itemsize
+
+    def frame(self, idx):
+        """Return the 2d memory mapped image for file number idx."""
+        idx = range(self.shape[2])[idx]  # normalize negative indices and raise IndexError
+        mm = self._maps.get(idx)
+        if mm is not None:
+            self._maps.move_to_end(idx)
+            return mm
+        mm = np.memmap(self.files[idx], dtype=self.dtype, mode='r',
+                       offset=self.hdln, shape=self.shape[:2])
+        self._maps[idx] = mm
+        while len(self._maps) > self.max_open:
+            # the file handle is closed once no array returned from the map is still in use
+            self._maps.popitem(last=False)
+        return mm
+
+    def __getitem__(self, key):
+        """Index the stack as if it were a 3d numpy array."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 3:
+            raise IndexError("Too many indices for MemmapStack: {}".format(key))
+        key = key + (slice(None),) * (3 - len(key))
+        rows, cols, images = key
+
+        if isinstance(images, (int, np.integer)):
+            return np.asarray(self.frame(images)[rows, cols])
+
+        indices = np.arange(self.shape[2])[images]
+        if indices.size == 0:
+            shape = np.empty(self.shape[:2], dtype=self.dtype)[rows, cols].shape
+            return np.empty(shape + (0,), dtype=self.dtype)
+        return np.stack([self.frame(idx)[rows, cols] for idx in indices], axis=-1)
+
+    def __array__(self, dtype=None, copy=None):
+        """Materialize the full stack into memory as a numpy array."""
+        out = np.empty(self.shape, dtype=self.dtype)
+        for idx in range(self.shape[2]):
+            out[:, :, idx] = self.frame(idx)
+        if dtype is not None:
+            out = out.astype(dtype, copy=False)
+        return out
+
+    def copy(self):
+        """Return an in-memory copy of the stack, mirroring ndarray.copy()."""
+        return np.asarray(self)
+
+
+LAYOUTS = ('spectrum', 'frame', 'both')
+
+
+class DataStack(object):
+    """3d data set indexed as (height, width, image number) with a choice of storage layout.
+
+    Storage layouts:
+        spectrum - (height, width, image number); the I(V) curve of each pixel is contiguous in memory.
+                   This is the layout produced by the loaders and suits spectrum(y, x) and smoothing.
+        frame    - (image number, height, width); each image is contiguous in memory.
+                   This suits frame(i) when stepping through the images.
+        both     - a copy in each layout is kept, doubling the memory used.
+
+    The loaders fill the data in the spectrum layout; arrange() then builds the
+    requested layout once every image has been read. Memory mapped stacks
+    already store each image in its own file and are never copied.
+    """
+
+    def __init__(self, data, layout='spectrum'):
+        """Wrap loaded data; no copies are made until arrange() is called.
+
+        :param data: 3d numpy array or MemmapStack (height, width, image number)
+        :param layout: string storage layout, one of LAYOUTS
+        """
+        if layout not in LAYOUTS:
+            raise ValueError("Invalid layout {0}; valid layouts are {1}".format(layout, ", ".join(LAYOUTS)))
+        self.layout = layout
+        self.mapped = isinstance(data, MemmapStack)
+        self.dtype = np.dtype(data.dtype)
+        self.shape = tuple(data.shape)
+        self.ndim = 3
+        self._spectra = data
+        self._frames = None
+
+    def __len__(self):
+        """Match len() of a 3d numpy array: the length of the first axis."""
+        return self.shape[0]
+
+    @property
+    def size(self):
+        """Total number of elements in the data set."""
+        return self.shape[0] * self.shape[1] * self.shape[2]
+
+    @property
+    def nbytes(self):
+        """Total number of bytes held in memory across the stored layouts."""
+        nbytes = 0
+        if self._spectra is not None and not self.mapped:
+            nbytes += self._spectra.nbytes
+        if self._frames is not None:
+            nbytes += self._frames.nbytes
+        return nbytes
+
+    @property
+    def array(self):
+        """The data as a (height, width, image number) array or view, whichever layout is stored."""
+        if self._spectra is not None:
+            return self._spectra
+        return self._frames.transpose(1, 2, 0)
+
+    def arrange(self, block_size=2**24):
+        """Build the frame layout if requested, dropping the spectrum layout for layout 'frame'.
+
+        Call once every image has been read, before the stack is shared with other threads;
+        use arranged() for a stack which may already be in use. The copy is made a block of
+        rows at a time so that both the reads and writes stay close together in memory.
+        :param block_size: approximate number of elements copied per block
+        """
+        if self.mapped or self.layout == 'spectrum' or self._frames is not None:
+            return
+        ht, wd, nimg = self.shape
+        frames = np.empty((nimg, ht, wd), dtype=self.dtype)
+        rows = max(1, block_size // max(1, wd * nimg))
+        for start in range(0, ht, rows):
+            stop = min(start + rows, ht)
+            frames[:, start:stop, :] = np.moveaxis(self._spectra[start:stop], 2, 0)
+        self._frames = frames
+        if self.layout == 'frame':
+            self._spectra = None
+
+    def arranged(self, block_size=2**24):
+        """Return a new DataStack of the same data with the requested layout built, leaving this stack unchanged.
+
+        Unlike arrange(), this is safe while other threads read this stack.
+        :param block_size: approximate number of elements copied per block
+        :return: DataStack; self if there is no layout to build
+        """
+        if self.mapped or self.layout == 'spectrum' or self._frames is not None:
+            return self
+        stack = DataStack(self._spectra, layout=self.layout)
+        stack.arrange(block_size=block_size)
+        return stack
+
+    def frame(self, idx):
+        """Return the 2d image (height, width) for image number idx."""
+        if self._frames is not None:
+            return self._frames[idx]
+        if self.mapped:
+            return self._spectra.frame(idx)
+        return self._spectra[:, :, idx]
+
+    def spectrum(self, y, x):
+        """Return the 1d I(V) curve for the pixel at row y and column x."""
+        if self._spectra is not None:
+            return self._spectra[y, x, :]
+        return self._frames[:, y, x]
+
+    def __getitem__(self, key):
+        """Index the data as if it were a 3d (height, width, image number) numpy array."""
+        return self.array[key]
+
+    def __array__(self, dtype=None, copy=None):
+        """Return the data as a (height, width, image number) numpy array."""
+        out = np.asarray(self.array)
+        if dtype is not None:
+            out = out.astype(dtype, copy=False)
+        return out
+
+    def copy(self):
+        """Return an in-memory copy of the data, mirroring ndarray.copy()."""
+        return np.array(self.array)
+
+
+class GrowableStack(DataStack):
+    """DataStack which images can be appended to as they are acquired.
+
+    Images are stored in the spectrum layout in a buffer with spare capacity along the image axis.
+    When the buffer is full its capacity is doubled, so appending n images copies O(n) images in
+    total. The stored data is always the view of the images appended so far; views returned before
+    an append are not extended by it.
+    """
+
+    def __init__(self, first, capacity=16):
+        """Start a stack from its first image.
+
+        :param first: 2d numpy array (height, width) of the first image
+        :param capacity: initial number of images the buffer holds before it is grown
+        """
+        first = np.asarray(first)
+        self._buffer = np.empty(first.shape + (max(1, capacity),), dtype=first.dtype)
+        self._buffer[:, :, 0] = first
+        super(GrowableStack, self).__init__(self._buffer[:, :, :1], layout='spectrum')
+
+    @property
+    def capacity(self):
+        """Number of images the stack can hold before its buffer is grown."""
+        return self._buffer.shape[2]
+
+    def append(self, frame):
+        """Append an image to the end of the stack.
+
+        :param frame: 2d numpy array (height, width) matching the shape of the stack
+        :return: integer image number of the appended image
+        """
+        ht, wd, nimg = self.shape
+        if np.shape(frame) != (ht, wd):
+            raise ValueError("Image shape {0} does not match stack shape {1}".format(np.shape(frame), (ht, wd)))
+        if nimg == self.capacity:
+            grown = np.empty((ht, wd, 2 * self.capacity), dtype=self.dtype)
+            grown[:, :, :nimg] = self._buffer[:, :, :nimg]
+            self._buffer = grown
+        self._buffer[:, :, nimg] = frame
+        self._spectra = self._buffer[:, :, :nimg + 1]
+        self.shape = (ht, wd, nimg + 1)
+        return nimg
+
+    def arrange(self, block_size=2**24):
+        """Images keep being appended, so the stack stays in the spectrum layout."""
+        return
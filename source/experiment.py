@@ -8,9 +8,12 @@ Generic LEEM / LEED experiment object
 Used for serializing experiment configuration data
 """
 import os
-import yaml
 import pprint
 
+from lazyimport import lazy_import
+
+yaml = lazy_import('yaml')  # only needed to read or write a config file
+
 pp = pprint.PrettyPrinter(indent=4)
 
 
@@ -37,6 +40,16 @@ class Experiment(object):
         self.num_files = ''
         self.imw = ''
         self.imh = ''
+        self.mmap = False  # flag to memory map raw data rather than reading it into memory
+        self.cache = True  # flag to store loaded data in the persistent cube cache
+        self.workers = None  # number of threads used to read data files; None lets the pool decide
+        self.stream = False  # flag to display data while it is being loaded
+        self.layout = 'spectrum'  # storage layout of loaded data, one of datastack.LAYOUTS
+        self.table_memory = None  # megabytes available for the window I(V) summed-area table; None uses the default
+        self.crop = None  # (row start, column start, row stop, column stop) kept from each image when loading
+        self.binning = 1  # size of the square blocks of pixels averaged together when loading
+        self.energy_stride = 1  # step between the data files loaded
+        self.watch = False  # flag to keep adding images as new data files are written to the data path
 
         self.loaded_settings = None
 
@@ -91,7 +104,7 @@ class Experiment(object):
         :return:
         """
         with open(fl, 'r') as f:
-            self.loaded_settings = yaml.load(f)
+            self.loaded_settings = yaml.safe_load(f)
         try:
             # Parse Settings into sub groups
             exp_settings = self.loaded_settings['Experiment']
@@ -116,11 +129,51 @@ class Experiment(object):
             self.bit = exp_settings['Bit Size']
             if self.data_type == 'Raw':
                 self.byte_order = exp_settings['Byte Order']
+                try:
+                    self.mmap = exp_settings["Memory Map"]
+                except KeyError:
+                    self.mmap = False  # default to reading raw data into memory
             self.mine = eng_settings['Min']
             self.maxe = eng_settings['Max']
             self.stepe = eng_settings['Step']
             self.imw = img_settings['Width']
             self.imh = img_settings['Height']
+            try:
+                self.cache = exp_settings["Cache"]
+            except KeyError:
+                self.cache = True  # default to caching loaded data
+            try:
+                self.workers = exp_settings["Workers"]
+            except KeyError:
+                self.workers = None  # default to the thread pool's choice of worker count
+            try:
+                self.stream = exp_settings["Stream"]
+            except KeyError:
+                self.stream = False  # default to displaying data once it is fully loaded
+            try:
+                self.layout = str(exp_settings["Layout"]).lower()
+            except KeyError:
+                self.layout = 'spectrum'  # default to a single copy of the data; 'both' doubles the memory used
+            try:
+                self.table_memory = float(exp_settings["Window Table Memory"])
+            except KeyError:
+                self.table_memory = None  # default to integral.MAX_TABLE_BYTES
+            try:
+                self.crop = self.parseCrop(exp_settings["Crop"])
+            except KeyError:
+                self.crop = None  # default to loading full images
+            try:
+                self.binning = int(exp_settings["Binning"])
+            except KeyError:
+                self.binning = 1  # default to full resolution images
+            try:
+                self.energy_stride = int(exp_settings["Energy Stride"])
+            except KeyError:
+                self.energy_stride = 1  # default to loading every data file
+            try:
+                self.watch = exp_settings["Watch"]
+            except KeyError:
+                self.watch = False  # default to loading the data files present when the experiment is loaded
 
             # self.loaded_settings = None
             # pp.pprint(vars(self))
@@ -132,6 +185,24 @@ class Experiment(object):
             print("Valid Experiment Parameters are: name, path, type, ext, bits, byteo, mine, maxe, stepe, and numf")
             print("Please refer to experiment.py docstrings for explanation of valid YAML parameter files.")
 
+    @staticmethod
+    def parseCrop(settings):
+        """Convert the Crop section of a YAML file to the region passed to the data loaders.
+
+        The YAML section holds the first and last rows (Top, Bottom) and columns (Left, Right)
+        to keep, in array coordinates; any edge which is not given is left at the image edge.
+        :param settings: dictionary with optional keys Top, Bottom, Left, and Right, or None
+        :return: tuple (row start, column start, row stop, column stop) with the stops excluded, or None
+        """
+        if not settings:
+            return None
+
+        def edge(key, offset=0):
+            value = settings.get(key)
+            return None if value is None else int(value) + offset
+
+        return (edge('Top'), edge('Left'), edge('Bottom', 1), edge('Right', 1))
+
     # TODO update tests for Time Series flags.
     def test_load(self):
         """Test Loading a pre-made file with hard coded path.
@@ -139,7 +210,7 @@ class Experiment(object):
         """
         test_file = '/Users/Maxwell/Desktop/141020_03_LEEM-IV_50FOV.yaml'
         with open(test_file, 'r') as f:
-            self.loaded_settings = yaml.load(f)
+            self.loaded_settings = yaml.safe_load(f)
         self._Test = True
 
     def test_fill(self):
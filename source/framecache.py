@@ -0,0 +1,178 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Cache of display-ready frames for stepping quickly through a data set.
+
+Displaying an image with pyqtgraph requires flipping and transposing the
+data array (see Viewer.update_LEEM_img_after_load()), computing the display
+levels, and scaling the data to 8 bits. A FrameCache does this once per frame
+and keeps the resulting uint8 images in a bounded least recently used cache.
+Each time a frame is requested, the next few frames in the direction the user
+is stepping are rendered on a background thread, so that holding down an
+arrow key only ever displays frames which are already prepared.
+
+Frames may be taken from a pyramid.ImagePyramid at any of its bin factors;
+frames for each factor are cached separately.
+"""
+
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import instrument
+
+LEVELS = (0, 255)  # display levels of rendered frames
+
+
+def display_frame(frame):
+    """Convert a 2d image to a display-ready uint8 array for pg.ImageItem.
+
+    The image is flipped and transposed to match the orientation used throughout the Viewer
+    and scaled so that its minimum and maximum map to 0 and 255, matching the automatic
+    levels pg.ImageItem would otherwise compute for each image.
+    :param frame: 2d numpy array (height, width)
+    :return: 2d C-contiguous uint8 numpy array (width, height)
+    """
+    frame = np.asarray(frame)[::-1, :].T
+    if frame.dtype.kind == 'f':
+        lo, hi = np.nanmin(frame), np.nanmax(frame)
+    else:
+        lo, hi = frame.min(), frame.max()
+    out = np.empty(frame.shape, dtype=np.uint8)
+    if not hi > lo:
+        out.fill(0)
+        return out
+    scaled = (frame.astype(np.float32) - np.float32(lo)) * np.float32(255.0 / (float(hi) - float(lo)))
+    np.clip(scaled, 0, 255, out=scaled)
+    out[...] = scaled
+    return out
+
+
+class FrameCache(object):
+    """Bounded LRU cache of display-ready frames with prefetching in the scroll direction.
+
+    The cache holds frames for a single data set at a time; call reset() whenever new data is loaded.
+    """
+
+    def __init__(self, max_bytes=2**28, prefetch=8):
+        """Create an empty cache.
+
+        :param max_bytes: approximate upper bound on the memory used by cached frames
+        :param prefetch: number of frames rendered ahead of the current frame in the scroll direction
+        """
+        self.max_bytes = max_bytes
+        self.prefetch = prefetch
+        self.capacity = 0
+        self._stack = None
+        self._key = None
+        self._last = None
+        self._frames = collections.OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def __len__(self):
+        """Number of frames currently cached."""
+        return len(self._frames)
+
+    def __contains__(self, idx):
+        """True if full resolution frame idx is cached."""
+        return (idx, 1) in self._frames
+
+    def reset(self, stack=None, key=None):
+        """Discard every cached frame and start caching frames of a new data set.
+
+        :param stack: datastack.DataStack, pyramid.ImagePyramid, or None
+        :param key: hashable value identifying the contents of stack, such as the data version;
+                    frames rendered for a previous key are never stored
+        """
+        with self._lock:
+            self._stack = stack
+            self._key = key
+            self._last = None
+            self._frames.clear()
+            self._pending.clear()
+            if stack is not None:
+                frame_bytes = max(1, stack.shape[0] * stack.shape[1])
+                self.capacity = max(2 * self.prefetch + 1, self.max_bytes // frame_bytes)
+
+    def get(self, idx, limit=None, factor=1):
+        """Return the display-ready frame idx and prefetch the frames which follow in the scroll direction.
+
+        :param idx: integer image number
+        :param limit: number of images which may be displayed or prefetched, e.g. while data is
+                      streamed in; default every image
+        :param factor: bin factor of the frame; other than 1 requires the cache to hold an ImagePyramid
+        :return: 2d uint8 numpy array to be displayed with levels LEVELS
+        """
+        stack, key = self._stack, self._key
+        with self._lock:
+            frame = self._frames.get((idx, factor))
+            if frame is not None:
+                self._frames.move_to_end((idx, factor))
+            direction = 0 if self._last is None else int(np.sign(idx - self._last))
+            self._last = idx
+        instrument.count('frame cache hit' if frame is not None else 'frame cache miss')
+        if frame is None:
+            frame = self._render(stack, idx, factor)
+            self._store(key, (idx, factor), frame)
+
+        if limit is None:
+            limit = stack.shape[2]
+        if direction == 0:
+            direction = 1  # assume the user steps forward through a newly displayed data set
+        stop = idx + direction * (self.prefetch + 1)
+        self._schedule(stack, key, [(i, factor) for i in range(idx + direction, stop, direction) if 0 <= i < limit])
+        return frame
+
+    @staticmethod
+    @instrument.timed('render frame', 'display')
+    def _render(stack, idx, factor):
+        """Render frame idx at the given bin factor."""
+        if factor == 1:
+            return display_frame(stack.frame(idx))
+        return display_frame(stack.frame(idx, factor))
+
+    def _store(self, key, item, frame):
+        """Add a rendered frame stored under item = (idx, factor), evicting least recently used frames."""
+        with self._lock:
+            if key != self._key:
+                return  # rendered for data which has since been replaced
+            self._frames[item] = frame
+            self._frames.move_to_end(item)
+            while len(self._frames) > self.capacity:
+                self._frames.popitem(last=False)
+
+    def _schedule(self, stack, key, items):
+        """Render (idx, factor) frames which are neither cached nor already queued on the background thread."""
+        with self._lock:
+            items = [item for item in items if item not in self._frames and item not in self._pending]
+            self._pending.update(items)
+        if not items:
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1)
+        for item in items:
+            self._pool.submit(self._prefetch, stack, key, item)
+
+    def _prefetch(self, stack, key, item):
+        """Render and store a single frame on the background thread."""
+        try:
+            if key == self._key:
+                self._store(key, item, self._render(stack, *item))
+        finally:
+            with self._lock:
+                if key == self._key:
+                    self._pending.discard(item)
+
+    def wait(self):
+        """Block until all queued prefetching has finished."""
+        if self._pool is not None:
+            self._pool.submit(lambda: None).result()
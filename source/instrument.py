@@ -0,0 +1,250 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Opt-in timers and counters for the hot paths of PLEASE.
+
+File reads, image decoding, stacking, smoothing, frame display, hover I(V)
+updates, and output writes are wrapped in named spans. While instrumentation
+is disabled (the default) a span costs a single attribute check. Once enabled,
+from the Help menu or by setting the environment variable PLEASE_INSTRUMENT=1
+before starting PLEASE, each span adds to running statistics which can be
+printed as a summary, and is recorded as an event which can be saved as a
+trace in the Chrome trace event format. Traces open in chrome://tracing,
+https://ui.perfetto.dev, and https://www.speedscope.app.
+
+This module does not import PyQt so it can also be used by batch.py.
+"""
+
+import collections
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+MAX_EVENTS = 500000  # trace events kept; older events are discarded first
+RECENT = 240  # number of recent calls kept per span for rate and latency readouts
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class SpanStats(object):
+    """Running statistics of every call of a single named span."""
+
+    __slots__ = ('category', 'count', 'total', 'min', 'max', 'recent')
+
+    def __init__(self, category):
+        """Statistics start empty."""
+        self.category = category
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.recent = collections.deque(maxlen=RECENT)  # (end time, duration) of the latest calls
+
+    def add(self, end, duration):
+        """Record a call which finished at time end (seconds) and lasted duration seconds."""
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        self.recent.append((end, duration))
+
+
+class Span(object):
+    """Context manager timing one call of a named span."""
+
+    __slots__ = ('recorder', 'name', 'category', 'args', 'start')
+
+    def __init__(self, recorder, name, category, args):
+        """."""
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        """Start timing."""
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Stop timing and record the call; exceptions are not suppressed."""
+        self.recorder.add_span(self.name, self.category, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class Recorder(object):
+    """Collect span timings and counters from any thread."""
+
+    def __init__(self, enabled=False, max_events=MAX_EVENTS):
+        """Create an empty recorder.
+
+        :param enabled: boolean to start recording straight away
+        :param max_events: integer number of trace events kept
+        """
+        self.enabled = False
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self.reset()
+        if enabled:
+            self.enable()
+
+    def reset(self):
+        """Discard every recorded timing, counter, and trace event."""
+        with self._lock:
+            self.origin = time.perf_counter()
+            self.stats = collections.OrderedDict()
+            self.counters = collections.OrderedDict()
+            self.events = collections.deque(maxlen=self.max_events)
+            self.threads = {}
+
+    def enable(self):
+        """Start recording; timings from a previous recording are kept."""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording; recorded timings are kept until reset()."""
+        self.enabled = False
+
+    def span(self, name, category='misc', **args):
+        """Time the body of a with statement as one call of span name.
+
+        :param name: string name of the span, e.g. 'read raw frame'
+        :param category: string group of related spans, e.g. 'read' or 'display'
+        :param args: values stored with the trace event, e.g. a file name
+        :return: context manager
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    def timed(self, name, category='misc'):
+        """Decorator timing every call of a function as span name."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, name, category, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def add_span(self, name, category, start, end, args=None):
+        """Record a call of span name which ran from start to end (time.perf_counter() seconds)."""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = SpanStats(category)
+            stats.add(end, end - start)
+            self.threads.setdefault(thread.ident, thread.name)
+            self.events.append((name, category, start, end, thread.ident, args or None))
+
+    def count(self, name, n=1):
+        """Add n to counter name."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        thread = threading.current_thread()
+        with self._lock:
+            total = self.counters.get(name, 0) + n
+            self.counters[name] = total
+            self.threads.setdefault(thread.ident, thread.name)
+            self.events.append((name, 'counter', now, None, thread.ident, total))
+
+    def rate(self, name, window=1.0):
+        """Get the number of calls per second of span name over the last window seconds."""
+        stats = self.stats.get(name)
+        if stats is None:
+            return 0.0
+        now = time.perf_counter()
+        calls = sum(1 for end, _ in list(stats.recent) if now - end <= window)
+        return calls / window
+
+    def latency(self, name, calls=30):
+        """Get the mean duration in seconds of the last calls of span name, or None if it was never called."""
+        stats = self.stats.get(name)
+        if stats is None or not stats.recent:
+            return None
+        recent = list(stats.recent)[-calls:]
+        return sum(duration for _, duration in recent) / len(recent)
+
+    def summary(self):
+        """Format the statistics of every span and counter as a table.
+
+        :return: string
+        """
+        with self._lock:
+            stats = list(self.stats.items())
+            counters = list(self.counters.items())
+            elapsed = time.perf_counter() - self.origin
+        lines = ["Performance summary ({:.1f} s recorded):".format(elapsed)]
+        if not stats and not counters:
+            lines.append("  Nothing recorded; enable instrumentation then use PLEASE as normal.")
+            return "\n".join(lines)
+        if stats:
+            lines.append("  {:<10} {:<28} {:>7} {:>11} {:>9} {:>9} {:>9}".format(
+                "category", "span", "calls", "total ms", "mean ms", "min ms", "max ms"))
+            for name, s in sorted(stats, key=lambda item: (item[1].category, -item[1].total)):
+                lines.append("  {:<10} {:<28} {:>7} {:>11.1f} {:>9.2f} {:>9.2f} {:>9.2f}".format(
+                    s.category, name, s.count, 1000 * s.total, 1000 * s.total / s.count,
+                    1000 * s.min, 1000 * s.max))
+        for name, total in counters:
+            lines.append("  {:<10} {:<28} {:>7}".format("counter", name, total))
+        return "\n".join(lines)
+
+    def trace(self):
+        """Build a trace of every recorded event in the Chrome trace event format.
+
+        Spans are complete ('X') events and counters are counter ('C') events, with
+        timestamps in microseconds since the recording started.
+        :return: dictionary which can be serialized with json
+        """
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+            origin = self.origin
+        pid = os.getpid()
+        trace = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'PLEASE'}}]
+        for tid, name in threads.items():
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        for name, category, start, end, tid, args in events:
+            event = {'name': name, 'cat': category, 'pid': pid, 'tid': tid,
+                     'ts': round(1e6 * (start - origin), 3)}
+            if end is None:
+                event.update(ph='C', args={name: args})
+            else:
+                event.update(ph='X', dur=round(1e6 * (end - start), 3))
+                if args:
+                    event['args'] = {key: str(value) for key, value in args.items()}
+            trace.append(event)
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, path):
+        """Write the trace to a JSON file which Chrome tracing, Perfetto, or speedscope can open.
+
+        :param path: string path to the output file
+        :return: number of events written
+        """
+        trace = self.trace()
+        with open(path, 'w') as f:
+            json.dump(trace, f)
+        return len(trace['traceEvents'])
+
+
+# recorder shared by every module; instrumentation is enabled at startup by PLEASE_INSTRUMENT=1
+recorder = Recorder(enabled=os.environ.get('PLEASE_INSTRUMENT', '') not in ('', '0'))
+span = recorder.span
+timed = recorder.timed
+count = recorder.count
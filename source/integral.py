@@ -0,0 +1,152 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Summed-area tables (integral images) for fast rectangular window I(V).
+
+For each image in a data set the table stores the cumulative sum of all pixels
+above and to the left of each position. The sum over any rectangle is then
+given by four lookups per image, independent of the size of the rectangle,
+and the lookups for every energy and every rectangle are done in a single
+vectorized numpy operation.
+
+Rectangles are given in array coordinates as (row start, column start,
+row stop, column stop) with the stop values excluded, matching the slice
+data[row start:row stop, column start:column stop, :].
+
+A table takes one to four times the memory of the data it is built for, so
+the GUI only builds one, in the background, when it fits within a memory
+budget (MAX_TABLE_BYTES by default); until then, and for larger data sets,
+windows are summed directly.
+"""
+
+import numpy as np
+
+MAX_TABLE_BYTES = 2**28  # default upper bound on the memory used by a summed-area table built by the GUI
+
+
+def get_table_dtype(data):
+    """Choose a numpy dtype for the summed-area table which can hold the sum of every pixel in an image.
+
+    :param data: 3d numpy array or datastack.MemmapStack (height, width, image number)
+    :return: numpy dtype
+    """
+    dtype = np.dtype(data.dtype)
+    if dtype.kind not in 'ui':
+        return np.dtype(np.float64)
+    bound = int(np.iinfo(dtype).max) * data.shape[0] * data.shape[1]
+    if dtype.kind == 'u' and bound < 2**32:
+        return np.dtype(np.uint32)
+    return np.dtype(np.int64)
+
+
+def clip_rects(rects, shape):
+    """Convert rectangles to an integer array clipped to lie within an image of the given shape.
+
+    :param rects: sequence of (row start, column start, row stop, column stop)
+    :param shape: tuple (height, width, ...) of the data
+    :return: (n_rect, 4) integer numpy array
+    """
+    rects = np.array(rects, dtype=np.intp).reshape(-1, 4)
+    rects[:, [0, 2]] = np.clip(rects[:, [0, 2]], 0, shape[0])
+    rects[:, [1, 3]] = np.clip(rects[:, [1, 3]], 0, shape[1])
+    # empty rectangles where stop precedes start
+    rects[:, 2] = np.maximum(rects[:, 0], rects[:, 2])
+    rects[:, 3] = np.maximum(rects[:, 1], rects[:, 3])
+    return rects
+
+
+class SummedAreaTable(object):
+    """Lazily built per-image summed-area table for a 3d data array.
+
+    The table is only computed the first time sums() is called and is then
+    reused for every subsequent query on the same data.
+    """
+
+    def __init__(self, data, key=None, block_size=2**24):
+        """Store a reference to the data; the table is not yet built.
+
+        :param data: 3d numpy array or datastack.MemmapStack (height, width, image number)
+        :param key: optional hashable value identifying the contents of data, used by callers
+                    to decide whether a cached table is still valid
+        :param block_size: approximate number of array elements processed per block while building
+        """
+        self.data = data
+        self.key = key
+        self.block_size = block_size
+        self.shape = tuple(data.shape)
+        self.dtype = get_table_dtype(data)
+        self._table = None
+
+    @property
+    def built(self):
+        """True once the table has been computed."""
+        return self._table is not None
+
+    @property
+    def nbytes(self):
+        """Number of bytes the table occupies once built."""
+        return (self.shape[0] + 1) * (self.shape[1] + 1) * self.shape[2] * self.dtype.itemsize
+
+    def build(self, cancelled=None):
+        """Compute the table, padded with a leading row and column of zeros, a block of images at a time.
+
+        :param cancelled: optional callable returning True to stop building before the table is complete
+        :return: 3d numpy array, or None if building was cancelled
+        """
+        if self._table is not None:
+            return self._table
+        ht, wd, nimg = self.shape
+        table = np.zeros((ht + 1, wd + 1, nimg), dtype=self.dtype)
+        step = max(1, self.block_size // max(1, ht * wd))
+        for start in range(0, nimg, step):
+            if cancelled is not None and cancelled():
+                return None
+            stop = min(start + step, nimg)
+            block = table[1:, 1:, start:stop]
+            np.cumsum(self.data[:, :, start:stop], axis=0, dtype=self.dtype, out=block)
+            np.cumsum(block, axis=1, out=block)
+        self._table = table
+        return table
+
+    def sums(self, rects):
+        """Sum the data over each rectangle for every image.
+
+        :param rects: sequence of (row start, column start, row stop, column stop), stop excluded;
+                      rectangles are clipped to the image
+        :return: (n_rect, n_image) numpy array of window sums
+        """
+        table = self.build()
+        rects = clip_rects(rects, self.shape)
+        r0, c0, r1, c1 = rects.T
+        sums = table[r1, c1] - table[r0, c1] - table[r1, c0] + table[r0, c0]
+        if self.dtype.kind == 'u':
+            # differences wrap in unsigned arithmetic but the final sums are exact and non-negative
+            return sums.astype(np.int64)
+        return sums
+
+
+def window_sums(data, rects, table=None):
+    """Sum the data over each rectangle for every image.
+
+    Uses the summed-area table when one is supplied; otherwise each window is
+    summed directly, which avoids building a table for one-off queries.
+
+    :param data: 3d numpy array or datastack.MemmapStack (height, width, image number)
+    :param rects: sequence of (row start, column start, row stop, column stop), stop excluded
+    :param table: optional SummedAreaTable for data
+    :return: (n_rect, n_image) numpy array of window sums
+    """
+    if table is not None:
+        return table.sums(rects)
+    rects = clip_rects(rects, data.shape)
+    sums = np.zeros((len(rects), data.shape[2]), dtype=get_table_dtype(data))
+    for idx, (r0, c0, r1, c1) in enumerate(rects):
+        sums[idx] = np.asarray(data[r0:r1, c0:c1, :]).sum(axis=(0, 1), dtype=sums.dtype)
+    if sums.dtype.kind == 'u':
+        return sums.astype(np.int64)
+    return sums
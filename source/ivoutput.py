@@ -0,0 +1,138 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Bulk output of I(V) curves.
+
+All curves selected for output are written together in a single pass in one
+of the following formats:
+    txt  - one tab delimited text file per curve with columns E and I (the original PLEASE layout)
+    tsv  - one tab delimited text file with the energy in the first column and one column per curve
+    csv  - as tsv but comma delimited
+    npz  - numpy archive with arrays 'energy', 'curves' (n_curve, n_energy), and 'names'
+    hdf5 - HDF5 file with the same datasets as npz; requires h5py
+
+This module does not import PyQt so it can also be used by batch.py.
+"""
+
+import os
+
+import numpy as np
+
+import instrument
+
+try:
+    import h5py
+except ImportError:
+    h5py = None  # HDF5 output is unavailable
+
+FORMATS = ('txt', 'tsv', 'csv', 'npz', 'hdf5')
+EXTENSIONS = {'txt': '.txt', 'tsv': '.txt', 'csv': '.csv', 'npz': '.npz', 'hdf5': '.h5'}
+
+
+def available_formats():
+    """Get the output formats which can be written with the installed packages."""
+    return [fmt for fmt in FORMATS if fmt != 'hdf5' or h5py is not None]
+
+
+def write_per_curve_text(outname, elist, curves, suffixes, callback=None):
+    """Write each curve to its own tab delimited text file with columns E and I.
+
+    :param outname: string path prefix; curve k is written to outname + suffixes[k] + '.txt'
+    :param elist: list of energy (or time) values
+    :param curves: sequence of I(V) curves, each the same length as elist
+    :param suffixes: list of file name suffixes for each curve
+    :param callback: optional function called as callback(curves written, total curves)
+    :return: list of string paths written
+    """
+    paths = []
+    for idx, (suffix, ilist) in enumerate(zip(suffixes, curves)):
+        filename = outname + suffix + '.txt'
+        with open(filename, 'w') as f:
+            f.write('E' + '\t' + 'I' + '\n')
+            f.writelines(str(item) + '\t' + str(ilist[index]) + '\n' for index, item in enumerate(elist))
+        paths.append(filename)
+        if callback is not None:
+            callback(idx + 1, len(suffixes))
+    return paths
+
+
+def write_delimited(path, elist, curves, names, delimiter='\t', xlabel='E'):
+    """Write all curves to a single delimited text file with one column per curve.
+
+    :param path: string path to output file
+    :param elist: list of energy (or time) values
+    :param curves: (n_curve, n_energy) array of I(V) curves
+    :param names: list of column names for each curve
+    :param delimiter: column separator
+    :param xlabel: column name for elist
+    """
+    table = np.column_stack([np.asarray(elist, dtype=float), np.asarray(curves, dtype=float).T])
+    np.savetxt(path, table, delimiter=delimiter, header=delimiter.join([xlabel] + list(names)), comments='')
+
+
+def write_npz(path, elist, curves, names):
+    """Write all curves to a numpy .npz archive.
+
+    :param path: string path to output file
+    :param elist: list of energy (or time) values
+    :param curves: (n_curve, n_energy) array of I(V) curves
+    :param names: list of names for each curve
+    """
+    np.savez(path, energy=np.asarray(elist, dtype=float), curves=np.asarray(curves, dtype=float),
+             names=np.array(names, dtype=str))
+
+
+def write_hdf5(path, elist, curves, names):
+    """Write all curves to an HDF5 file.
+
+    :param path: string path to output file
+    :param elist: list of energy (or time) values
+    :param curves: (n_curve, n_energy) array of I(V) curves
+    :param names: list of names for each curve
+    """
+    if h5py is None:
+        raise ImportError("h5py is required for HDF5 output")
+    with h5py.File(path, 'w') as f:
+        f.create_dataset('energy', data=np.asarray(elist, dtype=float))
+        f.create_dataset('curves', data=np.asarray(curves, dtype=float))
+        f.create_dataset('names', data=[name.encode('utf-8') for name in names])
+
+
+@instrument.timed('write I(V)', 'write')
+def write_iv(outname, elist, curves, names, fmt='tsv', suffixes=None, xlabel='E', callback=None):
+    """Write a set of I(V) curves in the requested format.
+
+    :param outname: string path to output file without extension; for the txt format this is the prefix
+                    of every file name
+    :param elist: list of energy (or time) values
+    :param curves: (n_curve, n_energy) array or sequence of I(V) curves
+    :param names: list of names for each curve, used as column or dataset labels
+    :param fmt: one of FORMATS
+    :param suffixes: list of file name suffixes for the txt format; default names
+    :param xlabel: column name for elist in the tsv and csv formats
+    :param callback: optional function called as callback(curves written, total curves)
+    :return: list of string paths written
+    """
+    if fmt not in FORMATS:
+        raise ValueError("Unknown output format {0}; valid formats are {1}".format(fmt, ", ".join(FORMATS)))
+    if fmt == 'txt':
+        return write_per_curve_text(outname, elist, curves, suffixes if suffixes is not None else names,
+                                    callback=callback)
+
+    path = outname if os.path.splitext(outname)[1] == EXTENSIONS[fmt] else outname + EXTENSIONS[fmt]
+    if fmt == 'tsv':
+        write_delimited(path, elist, curves, names, delimiter='\t', xlabel=xlabel)
+    elif fmt == 'csv':
+        write_delimited(path, elist, curves, names, delimiter=',', xlabel=xlabel)
+    elif fmt == 'npz':
+        write_npz(path, elist, curves, names)
+    else:
+        write_hdf5(path, elist, curves, names)
+    if callback is not None:
+        callback(len(names), len(names))
+    return [path]
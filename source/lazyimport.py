@@ -0,0 +1,71 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Deferred imports of heavy dependencies.
+
+lazy_import() returns a stand-in for a module which imports the real module
+the first time one of its attributes is used. Dependencies which only some
+features need, such as yaml, pyqtgraph, PIL, pendulum, and the YAML output
+widget, are imported this way so that importing the GUI module, or using
+LEEMFUNCTIONS from batch.py, does not pay for all of them up front.
+
+Attributes are copied onto the stand-in as they are first used, so later
+lookups cost the same as on the real module. Changes made to an attribute of
+the real module after it was first used through the stand-in are not seen by
+the stand-in.
+"""
+
+import importlib
+import threading
+import types
+
+_lock = threading.RLock()  # modules may first be used from a worker thread
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module which is imported on first attribute access."""
+
+    def __init__(self, name):
+        """:param name: string absolute name of the module, e.g. 'PIL.Image'"""
+        super(LazyModule, self).__init__(name)
+        self.__dict__['_lazy_target'] = None
+
+    def _load(self):
+        """Import the real module if it has not been imported yet and return it."""
+        module = self.__dict__['_lazy_target']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_lazy_target']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_target'] = module
+        return module
+
+    def __getattr__(self, attr):
+        """Look up an attribute of the real module, importing it first if needed."""
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __dir__(self):
+        """List the attributes of the real module."""
+        return dir(self._load())
+
+    def __repr__(self):
+        """."""
+        state = 'loaded' if self.__dict__['_lazy_target'] is not None else 'not loaded'
+        return "<lazy module {0!r} ({1})>".format(self.__name__, state)
+
+
+def lazy_import(name):
+    """Get a module which is only imported once one of its attributes is used.
+
+    :param name: string absolute name of the module
+    :return: LazyModule
+    """
+    return LazyModule(name)
@@ -7,21 +7,43 @@ Version 1.0.0
 Date: April, 2017
 Entrypoint for PLEASE.
 Usage:
-    python /path/to/main.py
+    python /path/to/main.py [--profile-startup]
     This will load the application and instantiate the GUI.
+
+While the splash screen is shown the heavy dependencies are imported and the
+main window is built in stages, each reported by the progress bar. The cube
+cache of the last experiment loaded is read in a background thread meanwhile,
+so loading that experiment again is quick. --profile-startup prints the time
+taken by every stage.
 """
 # Stdlib and Scientific Stack imports
+import argparse
+import functools
+import importlib
+import multiprocessing
 import os
 import sys
+import threading
 import time
 import traceback
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 # Local Project imports
-from please import MainWindow
+import instrument
 
 
 __Version = '1.0.0'
+MIN_PYTHON = (3, 8)  # multiprocessing.shared_memory is used to smooth data in worker processes
+
+# modules imported while the splash screen is shown, in order
+IMPORT_STAGES = [
+    ("Importing numpy", ['numpy']),
+    ("Importing pyqtgraph", ['pyqtgraph']),
+    ("Importing yaml", ['yaml']),
+    ("Importing data handling", ['LEEMFUNCTIONS', 'datastack', 'cubecache', 'taskpool', 'qthreads']),
+    ("Importing user interface", ['please']),
+]
+WINDOW_STAGES = 6  # building the main window, and the stages run by MainWindow and Viewer
 
 
 def custom_exception_handler(exc_type, exc_value, exc_traceback):
@@ -34,11 +56,99 @@ def custom_exception_handler(exc_type, exc_value, exc_traceback):
                                              exc_traceback)))
 
 
+class StartupProfile(object):
+    """Run the stages of startup, timing each one and reporting progress on the splash screen."""
+
+    def __init__(self, total, splashscreen=None, progressbar=None):
+        """Start timing.
+
+        :param total: integer number of stages expected
+        :param splashscreen: optional QSplashScreen showing the name of the running stage
+        :param progressbar: optional QProgressBar showing the fraction of stages completed
+        """
+        self.total = total
+        self.splashscreen = splashscreen
+        self.progressbar = progressbar
+        self.stages = []  # [name, nesting depth, seconds or None while running]
+        self.depth = 0
+        self.start = time.perf_counter()
+
+    def run(self, name, func):
+        """Run func() as the named stage of startup and return its result; stages may be nested."""
+        if self.splashscreen is not None:
+            self.splashscreen.showMessage("{} ...".format(name), QtCore.Qt.AlignBottom | QtCore.Qt.AlignHCenter)
+            QtWidgets.QApplication.processEvents()
+        stage = [name, self.depth, None]
+        self.stages.append(stage)  # listed in the order stages start, so nested stages follow their parent
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            with instrument.span(name, 'startup'):
+                result = func()
+        finally:
+            self.depth -= 1
+        stage[2] = time.perf_counter() - start
+        if self.progressbar is not None:
+            completed = sum(1 for _, _, seconds in self.stages if seconds is not None)
+            self.progressbar.setValue(min(100, 100 * completed // self.total))
+            QtWidgets.QApplication.processEvents()
+        return result
+
+    def summary(self):
+        """Format the time taken by each stage as a table; nested stages are indented below their parent."""
+        lines = ["Startup profile:", "  {:<36} {:>9}".format("stage", "ms")]
+        for name, depth, seconds in self.stages:
+            if seconds is not None:
+                lines.append("  {:<36} {:>9.1f}".format("  " * depth + name, 1000 * seconds))
+        lines.append("  {:<36} {:>9.1f}".format("total", 1000 * (time.perf_counter() - self.start)))
+        return "\n".join(lines)
+
+
+def import_modules(names):
+    """Import each module in names."""
+    for name in names:
+        importlib.import_module(name)
+
+
+def prefetch_last_experiment():
+    """Read the cube cache of the last experiment loaded in a background thread.
+
+    :return: the started threading.Thread, or None if there is nothing to prefetch
+    """
+    import cubecache
+    import please
+    from experiment import Experiment
+    config = please.get_settings().value(please.LAST_EXPERIMENT_KEY)
+    if not config or not os.path.isfile(str(config)):
+        return None
+    exp = Experiment()
+    try:
+        exp.fromFile(str(config))
+    except Exception as e:
+        # the prefetch is optional; a config file edited since it was last loaded must not stop PLEASE starting
+        print("Warning: not prefetching the last experiment {0}: {1}".format(config, e))
+        return None
+    if not getattr(exp, 'cache', False) or not getattr(exp, 'path', None):
+        return None
+    thread = threading.Thread(target=cubecache.prefetch_cube_cache, args=(str(exp.path),),
+                              name="cube cache prefetch", daemon=True)
+    thread.start()
+    return thread
+
+
 def main():
     """Start Qt Event Loop and display main window."""
+    if sys.version_info < MIN_PYTHON:
+        sys.exit("PLEASE requires Python {0}.{1} or newer; this is Python {2}.{3}.".format(
+            *(MIN_PYTHON + tuple(sys.version_info[:2]))))
     sys.excepthook = custom_exception_handler
 
-    app = QtWidgets.QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="PLEASE - The Python Low-energy Electron Analysis SuitE")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print the time taken by each stage of startup")
+    args, qtargs = parser.parse_known_args()
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qtargs)
 
     # Setup QSplashScreen
     thispath = __file__
@@ -61,18 +171,19 @@ def main():
     splashscreen.show()
     app.processEvents()
 
-    p = 0
-    while p <= 100:
-        app.processEvents()
-        progressbar.setValue(p)
-        app.processEvents()
-        time.sleep(1)
-        app.processEvents()
-        p += 20
+    profile = StartupProfile(len(IMPORT_STAGES) + 1 + WINDOW_STAGES, splashscreen, progressbar)
+    for name, modules in IMPORT_STAGES:
+        profile.run(name, functools.partial(import_modules, modules))
+    profile.run("Prefetching last experiment", prefetch_last_experiment)
 
-    mw = MainWindow(v=__Version)
+    import please
+    mw = profile.run("Building main window", lambda: please.MainWindow(v=__Version, stage=profile.run))
+    progressbar.setValue(100)
     mw.showMaximized()
     splashscreen.finish(mw)
+    if args.profile_startup:
+        # the message console has taken over sys.stdout
+        print(profile.summary(), file=sys.__stdout__)
 
     # This is a big fix for PyQt5 on macOS
     # When running a PyQt5 application that is not bundled into a
@@ -82,7 +193,6 @@ def main():
     # cmd.scpt which automates the keystroke "Cmd+Tab" twice to swap
     # applications then immediately swap back and set Focus to the main window.
     if "darwin" in sys.platform:
-        import please
         sourcepath = os.path.dirname(please.__file__)
         cmdpath = os.path.join(sourcepath, 'cmd.scpt')
         cmd = """osascript {0}""".format(cmdpath)
@@ -94,4 +204,5 @@ def main():
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # smoothing worker processes in frozen builds
     main()
@@ -18,23 +18,51 @@ semiconductors to metals in bulk or thin film as well as single layer 2D materia
 # Stdlib and Scientific Stack imports
 import os
 import sys
-import yaml
 import numpy as np
-import pyqtgraph as pg
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 # local project imports
+import cubecache
+import framecache
+import instrument
+import integral
+import ivoutput
 import LEEMFUNCTIONS as LF
-from bline import bline
+import pyramid
+import roi
+import taskpool
+import watchfolder
+from bline import LineProfiles
 from colors import Palette
 from data import LeedData, LeemData
+from datastack import LAYOUTS, DataStack, GrowableStack
 from experiment import Experiment
-from qthreads import WorkerThread
+from qthreads import WatchThread, WorkerThread
+from ratelimit import Coalescer
+from scheduler import BACKGROUND, CANCELLED, EXPORT, INTERACTIVE, Task, TaskScheduler
+from smoothcache import SmoothingCache
+from lazyimport import lazy_import
 from terminal import MessageConsole
-from yamloutput import ExperimentYAMLOutput
+
+# imported on first use, which main.py schedules while the splash screen is shown
+pg = lazy_import('pyqtgraph')
+yaml = lazy_import('yaml')
+yamloutput = lazy_import('yamloutput')
 
 __Version = '1.0.0'
 
+LAST_EXPERIMENT_KEY = 'lastExperiment'  # QSettings key holding the path of the last YAML config file loaded
+
+
+def get_settings():
+    """Get the settings which persist between sessions of PLEASE, such as the last experiment loaded."""
+    return QtCore.QSettings("PLEASE", "PLEASE")
+
+
+def run_stage(name, func):
+    """Run one stage of building the main window; main.py substitutes a function which reports progress."""
+    return func()
+
 
 class ExtendedCrossHair(QtCore.QObject):
     """Set of perpindicular InfiniteLines tracking mouse postion."""
@@ -66,22 +94,29 @@ class MainWindow(QtWidgets.QMainWindow):
     Provides Menubar
     """
 
-    def __init__(self, v=None):
-        """Parameter v tracks the current PLEASE version number."""
+    def __init__(self, v=None, stage=run_stage):
+        """Parameter v tracks the current PLEASE version number.
+
+        :param stage: callable invoked as stage(name, func) to run each step of construction
+        """
         super(QtWidgets.QMainWindow, self).__init__()
         if v is not None:
             self.setWindowTitle("PLEASE v. {}".format(v))
         else:
             self.setWindowTitle("PLEASE")
-        self.viewer = Viewer(parent=self)
+        self.viewer = Viewer(parent=self, stage=stage)
         self.setCentralWidget(self.viewer)
+        # watch threads poll until stopped and smoothing runs in worker processes; stop both before exiting
+        QtWidgets.QApplication.instance().aboutToQuit.connect(lambda: self.viewer.stop_watching())
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.viewer.stop_background_tasks)
 
         self.menubar = self.menuBar()
-        self.setupMenu()
+        stage("Building menus", self.setupMenu)
 
-        self.setupDockableWidgets()
+        stage("Building docks", self.setupDockableWidgets)
         self.addDockWidget(QtCore.Qt.LeftDockWidgetArea, self.dockwidget)
         self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.bottomdock)
+        self.setupStatusBar()
 
     def setupDockableWidgets(self):
         """Dock control and information widgets to main window."""
@@ -113,6 +148,33 @@ class MainWindow(QtWidgets.QMainWindow):
         self.console = MessageConsole()  # intercepts messges from sys.stdout
         self.bottomdock.setWidget(self.console)
 
+    def setupStatusBar(self):
+        """Show the running tasks, the progress of the most important one, and a button to cancel them all."""
+        self.taskLabel = QtWidgets.QLabel()
+        self.taskProgress = QtWidgets.QProgressBar()
+        self.taskProgress.setMaximumWidth(200)
+        self.cancelTasksButton = QtWidgets.QPushButton("Cancel")
+        self.cancelTasksButton.clicked.connect(self.viewer.scheduler.cancel_all)
+        self.statusBar().addPermanentWidget(self.taskLabel, 1)
+        self.statusBar().addPermanentWidget(self.taskProgress)
+        self.statusBar().addPermanentWidget(self.cancelTasksButton)
+        self.viewer.scheduler.tasksChanged.connect(self.update_task_status)
+        self.update_task_status()
+
+    @QtCore.pyqtSlot()
+    def update_task_status(self):
+        """Refresh the status bar from the task scheduler."""
+        scheduler = self.viewer.scheduler
+        tasks = scheduler.tasks()
+        self.taskLabel.setText(scheduler.status())
+        self.taskProgress.setVisible(bool(tasks))
+        self.cancelTasksButton.setVisible(bool(tasks))
+        if tasks:
+            done, total = tasks[0].progress
+            # a busy indicator until the task reports its progress
+            self.taskProgress.setRange(0, total)
+            self.taskProgress.setValue(done)
+
     def setupMenu(self):
         """Set Menu actions for LEEM and LEED."""
         fileMenu = self.menubar.addMenu("File")
@@ -125,6 +187,14 @@ class MainWindow(QtWidgets.QMainWindow):
         self.createYAMLAction.triggered.connect(self.viewer.createExperimentConfigFile)
         fileMenu.addAction(self.createYAMLAction)
 
+        self.cancelTasksAction = QtWidgets.QAction("Cancel Running Tasks", self)
+        self.cancelTasksAction.triggered.connect(lambda: self.viewer.scheduler.cancel_all())
+        fileMenu.addAction(self.cancelTasksAction)
+
+        self.stopWatchingAction = QtWidgets.QAction("Stop Watching Data Path", self)
+        self.stopWatchingAction.triggered.connect(lambda: self.viewer.stop_watching())
+        fileMenu.addAction(self.stopWatchingAction)
+
         self.exitAction = QtWidgets.QAction("Exit", self)
         self.exitAction.setShortcut('Ctrl+Q')
         self.exitAction.triggered.connect(self.quit)
@@ -210,6 +280,25 @@ class MainWindow(QtWidgets.QMainWindow):
         self.genConfigInfoFileAction.triggered.connect(self.viewer.generateConfigInfo)
         helpMenu.addAction(self.genConfigInfoFileAction)
 
+        performanceMenu = helpMenu.addMenu("Performance")
+        self.instrumentAction = QtWidgets.QAction("Record Timings", self)
+        self.instrumentAction.setCheckable(True)
+        self.instrumentAction.setChecked(instrument.recorder.enabled)
+        self.instrumentAction.toggled.connect(self.viewer.set_instrumentation)
+        performanceMenu.addAction(self.instrumentAction)
+
+        self.performanceSummaryAction = QtWidgets.QAction("Print Timing Summary", self)
+        self.performanceSummaryAction.triggered.connect(self.viewer.print_performance_summary)
+        performanceMenu.addAction(self.performanceSummaryAction)
+
+        self.saveTraceAction = QtWidgets.QAction("Save Timing Trace ...", self)
+        self.saveTraceAction.triggered.connect(self.viewer.save_performance_trace)
+        performanceMenu.addAction(self.saveTraceAction)
+
+        self.resetTimingsAction = QtWidgets.QAction("Reset Timings", self)
+        self.resetTimingsAction.triggered.connect(instrument.recorder.reset)
+        performanceMenu.addAction(self.resetTimingsAction)
+
     @staticmethod
     def quit():
         """."""
@@ -219,11 +308,12 @@ class MainWindow(QtWidgets.QMainWindow):
 class Viewer(QtWidgets.QWidget):
     """Main Container for Viewing LEEM and LEED data."""
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, stage=run_stage):
         """Initialize main LEEM and LEED data stucts.
 
         Setup Tab structure
         Connect key/mouse event hooks to image plot widgets
+        :param stage: callable invoked as stage(name, func) to run each step of construction
         """
         super(QtWidgets.QWidget, self).__init__(parent=parent)
         self.initData()
@@ -233,14 +323,15 @@ class Viewer(QtWidgets.QWidget):
         self.LEEMTab = QtWidgets.QWidget()
         self.LEEDTab = QtWidgets.QWidget()
         self.ConfigTab = QtWidgets.QWidget()
-        self.initLEEMTab()
-        self.initLEEDTab()
-        self.initConfigTab()
+        stage("Building LEEM tab", self.initLEEMTab)
+        stage("Building LEED tab", self.initLEEDTab)
+        stage("Building Config tab", self.initConfigTab)
         self.tabs.addTab(self.LEEMTab, "LEEM-I(V)")
         self.initLEEMEventHooks()
         self.initLEEDEventHooks()
         self.tabs.addTab(self.LEEDTab, "LEED-I(V)")
         self.tabs.addTab(self.ConfigTab, "Config")
+        self.initPerformanceOverlay()
 
         self.layout.addWidget(self.tabs)
         self.setLayout(self.layout)
@@ -266,13 +357,31 @@ class Viewer(QtWidgets.QWidget):
         self.LEEDclickpos = []  # container for position of LEED clicks in array coordinate system
         self.boxrad = 20  # USER configurable setting for LEED integration window: 2*boxrad x 2*boxrad
 
-        self.threads = []  # container for QThread objects used for outputting files
+        # runs every WorkerThread: loading before background smoothing before output and cache writes
+        self.scheduler = TaskScheduler(parent=self)
+        self.outputFormat = 'txt'  # one of ivoutput.FORMATS; default to one text file per curve
+        # (data path, signature, data version) of data sets to be written to the cube cache once loaded
+        self.pendingCubeCache = {'LEEM': None, 'LEED': None}
+        self.LEEMSmoothKey = None  # (window type, window length, data version) of the requested LEEM smoothing
+        # summed-area tables for window I(V), built on first use for each data set
+        self.summedAreaTables = {'LEEM': None, 'LEED': None}
+        # display-ready images for stepping through each data set with the arrow keys
+        self.frameCaches = {'LEEM': framecache.FrameCache(), 'LEED': framecache.FrameCache()}
+        self.LEEMPyramid = None  # mean-binned LEEM images for display of large detectors
+        self.LEEMDisplayFactor = 1  # bin factor of the displayed LEEM image
+        # QThread objects watching the Data Path for newly acquired images and the stacks they fill
+        self.watchthreads = {'LEEM': None, 'LEED': None}
+        self.liveStacks = {'LEEM': None, 'LEED': None}
 
         self.colors = Palette().color_palette
         self.qcolors = Palette().qcolors
         self.leemdat = LeemData()
         self.leeddat = LeedData()
         self.LEEMselections = []  # store coords of leem clicks in array coordinates
+        self.LEEMclickcurves = []  # (x, y, PlotDataItem) for each I(V) curve plotted from a LEEM click
+        self.currentLEEMPos = None  # (x, y) array coordinates of the mouse in the LEEM image
+        self.LEEMHoverCurve = None  # PlotDataItem reused for the I(V) curve under the mouse
+        self.LEEMHoverX = (None, None)  # (key, x data array) of the hover I(V) plot
         self.LEEDclickpos = []  # store coords of leed clicks in array coordinates
         self.LEEMRects = []
         self.LEEMRectWindowEnabled = False
@@ -336,6 +445,9 @@ class Viewer(QtWidgets.QWidget):
         self.LEEMimageplotwidget = pg.PlotWidget()
         # disable mouse pan on left click
         self.LEEMimageplotwidget.getPlotItem().getViewBox().setMouseEnabled(x=False, y=False)
+        # show a binned image whenever the widget is too small to display every pixel
+        self.LEEMimageplotwidget.getPlotItem().getViewBox().sigRangeChanged.connect(self.update_LEEM_display_level)
+        self.LEEMimageplotwidget.getPlotItem().getViewBox().sigResized.connect(self.update_LEEM_display_level)
 
         self.LEEMimageplotwidget.hideAxis("bottom")
         self.LEEMimageplotwidget.hideAxis("left")
@@ -530,6 +642,29 @@ class Viewer(QtWidgets.QWidget):
 
         configTabVBox.addWidget(LEED_settings_groupbox)
         configTabVBox.addWidget(self.h_line())
+
+        # I(V) File Output settings
+        output_format_groupbox = QtWidgets.QGroupBox()
+        output_format_hbox = QtWidgets.QHBoxLayout()
+        output_format_vbox = QtWidgets.QVBoxLayout()
+        output_format_label = QtWidgets.QLabel("Select I(V) File Output Format")
+        output_format_vbox.addWidget(output_format_label)
+        self.output_format_menu = QtWidgets.QComboBox()
+        format_labels = {'txt': "Text - one file per curve",
+                         'tsv': "Text - all curves, tab delimited",
+                         'csv': "CSV - all curves",
+                         'npz': "NumPy .npz - all curves",
+                         'hdf5': "HDF5 - all curves"}
+        for fmt in ivoutput.available_formats():
+            self.output_format_menu.addItem(format_labels[fmt], fmt)
+        self.output_format_menu.currentIndexChanged.connect(self.set_output_format)
+        output_format_vbox.addWidget(self.output_format_menu)
+        output_format_hbox.addLayout(output_format_vbox)
+        output_format_hbox.addStretch()
+        output_format_groupbox.setLayout(output_format_hbox)
+
+        configTabVBox.addWidget(output_format_groupbox)
+        configTabVBox.addWidget(self.h_line())
         """
         # crosshair settings
         crosshairSettingsGroupBox = QtWidgets.QGroupBox()
@@ -654,6 +789,25 @@ class Viewer(QtWidgets.QWidget):
         self.LEEDTabLayout.addLayout(self.ivvbox)
         self.LEEDTab.setLayout(self.LEEDTabLayout)
 
+    def initPerformanceOverlay(self):
+        """Setup the frame rate and latency readouts drawn over the LEEM and LEED images.
+
+        The readouts are children of the view boxes rather than plot items, so they stay
+        in the top left corner of each image widget when the view is zoomed and survive
+        the plot being cleared when new data is loaded.
+        """
+        self.performanceOverlays = {}
+        for datatype, widget in (('LEEM', self.LEEMimageplotwidget), ('LEED', self.LEEDimagewidget)):
+            overlay = pg.TextItem(color='y', anchor=(0, 0))
+            overlay.setParentItem(widget.getPlotItem().getViewBox())
+            overlay.setPos(4, 4)
+            overlay.setZValue(100)
+            self.performanceOverlays[datatype] = overlay
+        self.performanceTimer = QtCore.QTimer(self)
+        self.performanceTimer.setInterval(500)
+        self.performanceTimer.timeout.connect(self.update_performance_overlay)
+        self.set_instrumentation(instrument.recorder.enabled)
+
     def initLEEMEventHooks(self):
         """Setup event hooks for mouse click and mouse move.
 
@@ -667,6 +821,8 @@ class Viewer(QtWidgets.QWidget):
 
         self.sigmcLEEM.connect(self.handleLEEMClick)
         self.sigmmvLEEM.connect(self.handleLEEMMouseMoved)
+        # mouse moves arrive far more often than the display refreshes; plot only the latest
+        self.LEEMHover = Coalescer(self.plot_LEEM_hover_IV, parent=self)
 
     def initLEEDEventHooks(self):
         """Setup event hooks for mouse click in LEEDimagewidget."""
@@ -691,13 +847,8 @@ class Viewer(QtWidgets.QWidget):
 
     def generateConfigInfo(self):
         """Call configinfo.output_environment_config() but push output to separate thread."""
-        self.thread = WorkerThread(task="GEN_CONFIG_INFO")
-        try:
-            self.thread.disconnect()
-        except TypeError:
-            # nothing to disconnect
-            pass
-        self.thread.start()
+        self.scheduler.submit(Task(WorkerThread(task="GEN_CONFIG_INFO"), "Writing user config file",
+                                   priority=INTERACTIVE))
 
     def validateWidth(self):
         """Check user input and set crosshair line width."""
@@ -737,10 +888,11 @@ class Viewer(QtWidgets.QWidget):
             print("Warning: Setting plot linewidth > 10 may cause visibility problems. Defaulting to 10.")
             lw = 10
         self.LEEM_Linewidth = lw
+        self.LEEMHoverCurve = None  # drawn again with the new pen on the next mouse move
 
     def createExperimentConfigFile(self):
         """Get User settings and generate a .yaml file."""
-        self.yamlwidget = ExperimentYAMLOutput()
+        self.yamlwidget = yamloutput.ExperimentYAMLOutput()
         self.yamlwidget.userData.connect(self.recieveYAMLSettings)
 
     @QtCore.pyqtSlot(object)
@@ -749,13 +901,9 @@ class Viewer(QtWidgets.QWidget):
         # self.userYAMLSettings = settings
         # print(settings)
         print("Recieved user Experiment settings.")
-        self.thread = WorkerThread(task="CREATE_YAML", settings=settings)
-        try:
-            self.thread.disconnect()
-        except TypeError:
-            pass
-        self.thread.yamlFileOutput.connect(self.experimentConfigWritten)
-        self.thread.start()
+        thread = WorkerThread(task="CREATE_YAML", settings=settings)
+        thread.yamlFileOutput.connect(self.experimentConfigWritten)
+        self.scheduler.submit(Task(thread, "Writing experiment config file", priority=INTERACTIVE))
 
     @staticmethod
     @QtCore.pyqtSlot(bool)
@@ -803,6 +951,7 @@ class Viewer(QtWidgets.QWidget):
         self.exp = Experiment()
         # path_to_config = os.path.join(new_dir, config)
         self.exp.fromFile(config)
+        get_settings().setValue(LAST_EXPERIMENT_KEY, config)  # prefetched by main.py at the next startup
         print("New Data Path loaded from file: {}".format(self.exp.path))
         print("Loaded the following settings:")
 
@@ -824,6 +973,10 @@ class Viewer(QtWidgets.QWidget):
         """Load LEEM data from settings described by YAML config file."""
         if self.exp is None:
             return
+        self.stop_watching(datatype='LEEM')
+        # a new data set supersedes loading and smoothing the previous one
+        self.scheduler.cancel(key=('load', 'LEEM'))
+        self.scheduler.cancel(key=('smooth', 'LEEM'))
         self.LEEM_tab_active_exp = self.exp
         self.tabs.setCurrentIndex(0)
         if str(self.LEEMimtitle.text) != "LEEM Real Space Image":
@@ -848,22 +1001,30 @@ class Viewer(QtWidgets.QWidget):
             self.LEEMivplotwidget.setLabel('bottom', 'Energy', units='eV', **self.labelStyle)
             self.currentLEEMTime = False
 
+        if self.exp.watch:
+            self.watch_data_path(datatype='LEEM')
+            return
+
+        if self.load_cube_cache(datatype='LEEM'):
+            return
+
         if self.exp.data_type.lower() == 'raw':
             try:
                 # use settings from self.sexp
-                self.thread = WorkerThread(task='LOAD_LEEM',
-                                           path=str(self.exp.path),
-                                           imht=self.exp.imh,
-                                           imwd=self.exp.imw,
-                                           bits=self.exp.bit,
-                                           byte=self.exp.byte_order)
-                try:
-                    self.thread.disconnect()
-                except TypeError:
-                    pass  # no signals connected, that's OK, continue as needed
-                self.thread.connectOutputSignal(self.retrieve_LEEM_data)
-                self.thread.finished.connect(self.update_LEEM_img_after_load)
-                self.thread.start()
+                thread = WorkerThread(task='LOAD_LEEM',
+                                      path=str(self.exp.path),
+                                      imht=self.exp.imh,
+                                      imwd=self.exp.imw,
+                                      bits=self.exp.bit,
+                                      byte=self.exp.byte_order,
+                                      mmap=self.exp.mmap,
+                                      workers=self.exp.workers,
+                                      stream=self.exp.stream,
+                                      layout=self.exp.layout,
+                                      crop=self.exp.crop,
+                                      binning=self.exp.binning,
+                                      stride=self.exp.energy_stride)
+                self.start_load(thread, datatype='LEEM')
             except ValueError:
                 print("Error loading LEEM Experiment:")
                 print("Please Verify Experiment Config Settings.")
@@ -871,16 +1032,16 @@ class Viewer(QtWidgets.QWidget):
 
         elif self.exp.data_type.lower() == 'image':
             try:
-                self.thread = WorkerThread(task='LOAD_LEEM_IMAGES',
-                                           path=self.exp.path,
-                                           ext=self.exp.ext)
-                try:
-                    self.thread.disconnect()
-                except TypeError:
-                    pass  # no signals connected, that's OK, continue as needed
-                self.thread.connectOutputSignal(self.retrieve_LEEM_data)
-                self.thread.finished.connect(self.update_LEEM_img_after_load)
-                self.thread.start()
+                thread = WorkerThread(task='LOAD_LEEM_IMAGES',
+                                      path=self.exp.path,
+                                      ext=self.exp.ext,
+                                      workers=self.exp.workers,
+                                      stream=self.exp.stream,
+                                      layout=self.exp.layout,
+                                      crop=self.exp.crop,
+                                      binning=self.exp.binning,
+                                      stride=self.exp.energy_stride)
+                self.start_load(thread, datatype='LEEM')
             except ValueError:
                 print('Error loading LEEM data from images.')
                 print('Please check YAML experiment config file')
@@ -893,6 +1054,8 @@ class Viewer(QtWidgets.QWidget):
         """Load LEED data from settings described by YAML config file."""
         if self.exp is None:
             return
+        self.stop_watching(datatype='LEED')
+        self.scheduler.cancel(key=('load', 'LEED'))  # a new data set supersedes loading the previous one
         self.LEED_tab_active_exp = self.exp
         self.tabs.setCurrentIndex(1)
 
@@ -905,41 +1068,48 @@ class Viewer(QtWidgets.QWidget):
             print("Loading data as Time Series")
             self.LEEDivplotwidget.setLabel('bottom', 'Time', units='s', **self.labelStyle)
             self.currentLEEDTime = True
+
+        if self.exp.watch:
+            self.watch_data_path(datatype='LEED')
+            return
+
+        if self.load_cube_cache(datatype='LEED'):
+            return
+
         if self.exp.data_type.lower() == 'raw':
             try:
                 # use settings from self.exp
-                self.thread = WorkerThread(task='LOAD_LEED',
-                                           path=str(self.exp.path),
-                                           imht=self.exp.imh,
-                                           imwd=self.exp.imw,
-                                           bits=self.exp.bit,
-                                           byte=self.exp.byte_order)
-                try:
-                    self.thread.disconnect()
-                except TypeError:
-                    # no signal connections - this is OK
-                    pass
-                self.thread.connectOutputSignal(self.retrieve_LEED_data)
-                self.thread.finished.connect(self.update_LEED_img_after_load)
-                self.thread.start()
+                thread = WorkerThread(task='LOAD_LEED',
+                                      path=str(self.exp.path),
+                                      imht=self.exp.imh,
+                                      imwd=self.exp.imw,
+                                      bits=self.exp.bit,
+                                      byte=self.exp.byte_order,
+                                      mmap=self.exp.mmap,
+                                      workers=self.exp.workers,
+                                      stream=self.exp.stream,
+                                      layout=self.exp.layout,
+                                      crop=self.exp.crop,
+                                      binning=self.exp.binning,
+                                      stride=self.exp.energy_stride)
+                self.start_load(thread, datatype='LEED')
             except ValueError:
                 print('Error Loading LEED Data: Please Recheck YAML Settings')
                 return
 
         elif self.exp.data_type.lower() == 'image':
             try:
-                self.thread = WorkerThread(task='LOAD_LEED_IMAGES',
-                                           ext=self.exp.ext,
-                                           path=self.exp.path,
-                                           byte=self.exp.byte_order)
-                try:
-                    self.thread.disconnect()
-                except TypeError:
-                    # no signals were connected - this is OK
-                    pass
-                self.thread.connectOutputSignal(self.retrieve_LEED_data)
-                self.thread.finished.connect(self.update_LEED_img_after_load)
-                self.thread.start()
+                thread = WorkerThread(task='LOAD_LEED_IMAGES',
+                                      ext=self.exp.ext,
+                                      path=self.exp.path,
+                                      byte=self.exp.byte_order,
+                                      workers=self.exp.workers,
+                                      stream=self.exp.stream,
+                                      layout=self.exp.layout,
+                                      crop=self.exp.crop,
+                                      binning=self.exp.binning,
+                                      stride=self.exp.energy_stride)
+                self.start_load(thread, datatype='LEED')
             except ValueError:
                 print('Error Loading LEED Experiment from image files.')
                 print('Please Check YAML settings in experiment config file')
@@ -947,6 +1117,206 @@ class Viewer(QtWidgets.QWidget):
                 print('Valid data extenstions: \'.tif\', \'.png\', \'.jpg\'')
                 return
 
+    def start_load(self, thread, datatype=None):
+        """Submit a data loading I/O thread to the scheduler, superseding any load of the same datatype.
+
+        :param thread: WorkerThread with one of the LOAD tasks
+        :param datatype: string 'LEEM' or 'LEED'
+        """
+        task = Task(thread, "Loading {} data".format(datatype), priority=INTERACTIVE, key=('load', datatype))
+        self.connect_load_signals(task, datatype=datatype)
+        self.scheduler.submit(task)
+
+    def connect_load_signals(self, task, datatype=None):
+        """Connect the signals of a data loading task to the retrieve/display slots.
+
+        When streaming, the first image is displayed as soon as it has been read rather than
+        when the thread finishes. Nothing is delivered once the task is cancelled or superseded.
+        :param task: scheduler.Task wrapping a data loading WorkerThread
+        :param datatype: string 'LEEM' or 'LEED'
+        """
+        if datatype == 'LEEM':
+            retrieve_data, retrieve_chunk = self.retrieve_LEEM_data, self.retrieve_LEEM_chunk
+            update_img = self.update_LEEM_img_after_load
+        else:
+            retrieve_data, retrieve_chunk = self.retrieve_LEED_data, self.retrieve_LEED_chunk
+            update_img = self.update_LEED_img_after_load
+
+        thread = task.thread
+        if thread.isStreaming():
+            # the emitted array is empty until chunkReady reports images as read
+            task.connect(thread.outputSIGNAL, lambda data: retrieve_data(data, loaded=0))
+            task.connect(thread.chunkReady, retrieve_chunk)
+            task.connect(thread.arrangedSIGNAL, lambda stack: self.replace_stack(stack, datatype=datatype))
+        else:
+            task.connect(thread.outputSIGNAL, retrieve_data)
+            task.finished.connect(update_img)
+        task.finished.connect(lambda: self.write_cube_cache(datatype=datatype))
+        if datatype == 'LEEM':
+            task.finished.connect(self.smooth_LEEM_in_background)
+
+    def watch_data_path(self, datatype=None):
+        """Display the images of the current experiment as their files are written to the Data Path.
+
+        Files already in the directory are read first. Each new image is appended to a
+        datastack.GrowableStack by append_live_frame(), which extends the image navigation,
+        hover I(V), and selected I(V) curves to include it.
+        :param datatype: string 'LEEM' or 'LEED'
+        """
+        try:
+            poller, read_frame = watchfolder.experiment_poller(self.exp)
+        except LF.InvalidParameterError as e:
+            print(e)
+            return
+        thread = WatchThread(poller, read_frame)
+        thread.frameReady.connect(lambda frame: self.append_live_frame(frame, datatype=datatype, thread=thread))
+        self.watchthreads[datatype] = thread
+        self.liveStacks[datatype] = None
+        thread.start()
+
+    def stop_watching(self, datatype=None):
+        """Stop watching the Data Path for new images.
+
+        :param datatype: string 'LEEM' or 'LEED'; default None stops both
+        """
+        for key in ('LEEM', 'LEED') if datatype is None else (datatype,):
+            thread = self.watchthreads.get(key)
+            if thread is None:
+                continue
+            thread.stop()
+            thread.wait()
+            self.watchthreads[key] = None
+            self.liveStacks[key] = None
+            print("Stopped watching {} for new data files.".format(thread.poller.path))
+
+    def append_live_frame(self, frame, datatype=None, thread=None):
+        """Add an image read by a WatchThread to the end of the LEEM or LEED data set.
+
+        If the last image was displayed, the new image is displayed in its place.
+        :param frame: 2d numpy array
+        :param datatype: string 'LEEM' or 'LEED'
+        :param thread: the WatchThread which read the image
+        """
+        if thread is None or thread is not self.watchthreads.get(datatype):
+            return  # the watch was stopped after the image was read
+        stack = self.liveStacks[datatype]
+        if stack is None:
+            # first image: display the new data set
+            stack = GrowableStack(frame)
+            self.liveStacks[datatype] = stack
+            if datatype == 'LEEM':
+                self.retrieve_LEEM_data(stack)
+                self.update_LEEM_img_after_load()
+            else:
+                self.retrieve_LEED_data(stack)
+                self.update_LEED_img_after_load()
+            return
+
+        if datatype == 'LEEM':
+            dat, exp, curIndex = self.leemdat, self.LEEM_tab_active_exp, self.curLEEMIndex
+        else:
+            dat, exp, curIndex = self.leeddat, self.LEED_tab_active_exp, self.curLEEDIndex
+        follow = curIndex == stack.shape[2] - 1
+        stack.append(frame)
+        dat.loaded = stack.shape[2]
+        # one image is loaded every energy_stride files
+        dat.elist.append(round(dat.elist[-1] + exp.stepe * exp.energy_stride, 2))
+        if (self.currentLEEMTime if datatype == 'LEEM' else self.currentLEEDTime):
+            dat.timelist.append(len(dat.timelist) * exp.time_step * exp.energy_stride)
+        if datatype == 'LEEM':
+            # smoothed curves change near the end as points are added; smooth again on demand
+            dat.smoothed = SmoothingCache(stack.shape)
+
+        if datatype == 'LEEM':
+            if follow:
+                self.curLEEMIndex = stack.shape[2] - 1
+                self.showLEEMImage(self.curLEEMIndex)
+                self.update_LEEM_title()
+            self.update_LEEM_live_IV()
+        else:
+            if follow:
+                self.curLEEDIndex = stack.shape[2] - 1
+                self.showLEEDImage(self.curLEEDIndex)
+                self.update_LEED_title()
+            if self.LEEDclickpos and self.LEEDivplotwidget.getPlotItem().listDataItems():
+                self.LEEDivplotwidget.clear()
+                self.processLEEDIV()
+
+    def update_LEEM_live_IV(self):
+        """Redraw the LEEM I(V) curves currently shown so they include every image."""
+        xdata = self.leemdat.timelist if self.currentLEEMTime else self.leemdat.elist
+        for x, y, pdi in self.LEEMclickcurves:
+            pdi.setData(xdata, self.get_LEEM_pixel_IV(x, y))
+        if self.LEEMRectWindowEnabled:
+            if self.LEEMRects and self.LEEMivplotwidget.getPlotItem().listDataItems():
+                self.extractLEEMWindows()
+        elif not self.LEEMLineProfileEnabled and self.currentLEEMPos is not None:
+            self.plot_LEEM_hover_IV(*self.currentLEEMPos)
+
+    def get_cube_cache_params(self):
+        """Collect the experiment settings which determine the contents of the loaded data array."""
+        return cubecache.experiment_params(self.exp)
+
+    def load_cube_cache(self, datatype=None):
+        """Display data from the persistent cube cache if a valid cache exists for the current experiment.
+
+        If there is no valid cache, the data set is marked to be cached once it has been loaded.
+        :param datatype: string 'LEEM' or 'LEED'
+        :return: True if data was loaded from the cache
+        """
+        self.pendingCubeCache[datatype] = None
+        if self.exp is None or not self.exp.cache:
+            return False
+        try:
+            signature = cubecache.dataset_signature(str(self.exp.path), self.get_cube_cache_params())
+        except OSError as e:
+            print("Error reading data directory while checking data cache:")
+            print(e)
+            return False
+        data = cubecache.load_cube_cache(str(self.exp.path), signature)
+        if data is None:
+            dat = self.leemdat if datatype == 'LEEM' else self.leeddat
+            self.pendingCubeCache[datatype] = (str(self.exp.path), signature, dat.version)
+            return False
+
+        print("Loading {0} data from cache for {1} ...".format(datatype, self.exp.path))
+        # the cached cube is in the spectrum layout; any other layout is built off the GUI thread
+        stack = DataStack(data, layout=self.exp.layout if self.exp.layout in LAYOUTS else 'spectrum')
+        if datatype == 'LEEM':
+            self.retrieve_LEEM_data(stack)
+            self.update_LEEM_img_after_load()
+            self.smooth_LEEM_in_background()
+        else:
+            self.retrieve_LEED_data(stack)
+            self.update_LEED_img_after_load()
+        if stack.layout != 'spectrum':
+            thread = WorkerThread(task='ARRANGE', data=stack)
+            # keyed as a load so that loading new data supersedes it
+            task = Task(thread, "Arranging {} data".format(datatype), priority=INTERACTIVE, key=('load', datatype))
+            task.connect(thread.arrangedSIGNAL, lambda arranged: self.replace_stack(arranged, datatype=datatype))
+            self.scheduler.submit(task)
+        return True
+
+    @QtCore.pyqtSlot()
+    def write_cube_cache(self, datatype=None):
+        """Write freshly loaded data to the persistent cube cache via QThread."""
+        pending = self.pendingCubeCache.get(datatype)
+        self.pendingCubeCache[datatype] = None
+        dat = self.leemdat if datatype == 'LEEM' else self.leeddat
+        if pending is None or dat.dat3d is None:
+            return
+        path, signature, version = pending
+        if dat.version == version:
+            return  # loading failed; dat3d still holds the previous data set
+        if dat.loaded != dat.dat3d.shape[2]:
+            return  # streamed load stopped before every image was read
+        thread = WorkerThread(task='WRITE_CACHE',
+                              path=path,
+                              data=dat.dat3d,
+                              elist=list(dat.elist),
+                              signature=signature)
+        self.scheduler.submit(Task(thread, "Writing {} data cache".format(datatype), priority=EXPORT))
+
     def load_PEEM_experiment(self):
         """Shim function to load PEEM images as ``LEEM'' data."""
         self.load_LEEM_experiment()
@@ -959,59 +1329,22 @@ class Viewer(QtWidgets.QWidget):
                 self.LEEMIVTitle.setText("PEEM I(V)")
 
     def outputIV(self, datatype=None):
-        """Output current I(V) plots as tab delimited text files.
+        """Output current I(V) curves in a single pass via one QThread.
 
+        Curves are written in the format selected in the Config tab, either one tab delimited
+        text file per curve or every curve together in a single file.
         :param: datatype- String desginating either 'LEEM' or 'LEED' data to output
         """
         if datatype is None:
             return
         elif datatype == 'LEEM' and self.hasdisplayedLEEMdata and self.LEEMselections:
-            outdir = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Output Directory",
-                                                                options=QtWidgets.QFileDialog.ShowDirsOnly)
-            try:
-                outdir = outdir[0]
-            except IndexError:
-                print("Error selecting output file directory.")
-                return
-            outdir = str(outdir)  # cast from QString to string
-
-            # Query User for output file name
-            msg = "Enter name for output file(s)."
-            outname = QtWidgets.QFileDialog.getSaveFileName(self, msg)
-
-            try:
-                outname = outname[0]
-            except IndexError:
-                print("Error getting output file name.")
-                return
-            outname = str(outname)  # cast from QString ot string
-            if not outname:
-                return  # User clicked cancel
-
-            outfile = os.path.join(outdir, outname)
-            if self.threads:
-                # there are still thread objects in the container
-                for thread in self.threads:
-                    if not thread.isFinished():
-                        print("Error: One or more threads has not finished file I/O ...")
-                        return
-            self.threads = []
-            for idx, tup in enumerate(self.LEEMselections):
-                outfile = os.path.join(outdir, outname+str(idx)+'.txt')
-                x = tup[0]
-                y = tup[1]
-                ilist = self.leemdat.dat3d[y, x, :]
-                if self.smoothLEEMoutput:
-                    ilist = LF.smooth(ilist,
-                                      window_len=self.LEEMWindowLen,
-                                      window_type=self.LEEMWindowType)
-                thread = WorkerThread(task='OUTPUT_TO_TEXT',
-                                           elist=self.leemdat.elist,
-                                           ilist=ilist,
-                                           name=outfile)
-                thread.finished.connect(self.output_complete)
-                self.threads.append(thread)
-                thread.start()
+            elist = self.leemdat.elist
+            rois = [roi.RectROI.from_center(x, y, 0) for x, y in self.LEEMselections]
+            curves = roi.extract_iv(self.leemdat.dat3d, rois)
+            names = ['x{0}_y{1}'.format(x, y) for x, y in self.LEEMselections]
+            suffixes = [str(idx) for idx in range(len(names))]
+            smooth = self.smoothLEEMoutput
+            window_type, window_len = self.LEEMWindowType, self.LEEMWindowLen
 
         elif datatype == 'LEED' and self.hasdisplayedLEEDdata and self.LEEDclickpos:
             if self.outputLEEDAverage and not self.LEEDAverageIV:
@@ -1020,54 +1353,14 @@ class Viewer(QtWidgets.QWidget):
                 print("However, no average has been calculated.")
                 print("Please disable averaging or average current I(V) curves.")
                 return
-            # Query User for output directory
-            # PyQt5 - This method now returns a tuple - we want only the first element
-            outdir = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Output Directory",
-                                                                options=QtWidgets.QFileDialog.ShowDirsOnly)
-            try:
-                outdir = outdir[0]
-            except IndexError:
-                print("Error selecting output file directory.")
-                return
-            outdir = str(outdir)  # cast from QString to string
-
-            # Query User for output file name
-            msg = "Enter name for output file(s)."
-            outname = QtWidgets.QFileDialog.getSaveFileName(self, msg)
-
-            try:
-                outname = outname[0]
-            except IndexError:
-                print("Error getting output file name.")
-                return
-            outname = str(outname)  # cast from QString ot string
-            if not outname:
-                return  # User clicked cancel
-
-            outfile = os.path.join(outdir, outname)
-            if self.threads:
-                # there are still thread objects in the container
-                for thread in self.threads:
-                    if not thread.isFinished():
-                        print("Error: One or more threads has not finished file I/O ...")
-                        return
-            self.threads = []
+            elist = self.leeddat.elist
+            smooth = self.smoothLEEDoutput
+            window_type, window_len = self.LEEDWindowType, self.LEEDWindowLen
             if self.outputLEEDAverage and self.LEEDAverageIV:
                 # output single curve
-                outfile = os.path.join(outdir, outname+'.txt')
-                if self.smoothLEEDoutput:
-                    ilist = LF.smooth(self.LEEDAverageIV,
-                                      window_len=self.LEEDWindowLen,
-                                      window_type=self.LEEDWindowType)
-                else:
-                    ilist = self.LEEDAverageIV
-                thread = WorkerThread(task='OUTPUT_TO_TEXT',
-                                           elist=self.leeddat.elist,
-                                           ilist=ilist,
-                                           name=outfile)
-                thread.finished.connect(self.output_complete)
-                self.threads.append(thread)
-                thread.start()
+                curves = np.array([self.LEEDAverageIV], dtype=float)
+                names = ['average']
+                suffixes = ['']
             else:
                 # output multiple curves
                 if len(self.LEEDrects) != len(self.LEEDclickpos):
@@ -1083,71 +1376,71 @@ class Viewer(QtWidgets.QWidget):
                     print("Error: Mismatch between number of beam selections and number of background selections.")
                     return
 
+                # get average intensity per window for every beam and background in one pass
+                rois = self.get_LEED_rois() + self.get_LEED_background_rois()
+                curves = self.extract_ROI_IV(rois, datatype='LEED')
+                nbeams = len(self.LEEDclickpos)
                 if self.LEEDBackgroundrects:
-                    # There are background curves to output and all sizes match
-                    for beam_idx, tup in enumerate(self.LEEDclickpos):
-                        outfile = os.path.join(outdir, outname+'beam_'+str(beam_idx)+'.txt')
-                        rad = int(self.LEEDrects[beam_idx][3])
-                        x = int(tup[0])
-                        y = int(tup[1])
-                        int_window = self.leeddat.dat3d[y - rad:y + rad + 1,
-                                                        x - rad:x + rad + 1, :]
-                        # get average intensity per window
-                        ilist = [img.sum()/(2*rad*2*rad) for img in np.rollaxis(int_window, 2)]
-                        if self.smoothLEEDoutput:
-                            ilist = LF.smooth(ilist,
-                                              window_len=self.LEEDWindowLen,
-                                              window_type=self.LEEDWindowType)
-                        thread = WorkerThread(task='OUTPUT_TO_TEXT',
-                                                   elist=self.leeddat.elist,
-                                                   ilist=ilist,
-                                                   name=outfile)
-                        thread.finished.connect(self.output_complete)
-                        self.threads.append(thread)
-                        thread.start()
-                        for idx, tup in enumerate(self.LEEDBackgroundcenters[beam_idx:
-                                                                             beam_idx+self.num_background_per_beam]):
-                            outfile = os.path.join(outdir, outname+'beam_'+str(beam_idx)+'bkgd_'+str(idx)+'.txt')
-                            rad = int(self.LEEDBackgroundrects[idx][3])
-                            x = int(tup[0])
-                            y = int(tup[1])
-                            int_window = self.leeddat.dat3d[y - rad:y + rad + 1,
-                                                            x - rad:x + rad + 1, :]
-                            # get average intensity per window
-                            ilist = [img.sum()/(2*rad*2*rad) for img in np.rollaxis(int_window, 2)]
-                            if self.smoothLEEDoutput:
-                                ilist = LF.smooth(ilist,
-                                                  window_len=self.LEEDWindowLen,
-                                                  window_type=self.LEEDWindowType)
-                            thread = WorkerThread(task='OUTPUT_TO_TEXT',
-                                                       elist=self.leeddat.elist,
-                                                       ilist=ilist,
-                                                       name=outfile)
-                            thread.finished.connect(self.output_complete)
-                            self.threads.append(thread)
-                            thread.start()
+                    # each beam is followed by its background boxes, which are stored consecutively for each beam
+                    order, names, suffixes = [], [], []
+                    for beam_idx in range(nbeams):
+                        order.append(beam_idx)
+                        names.append('beam_{0}'.format(beam_idx))
+                        suffixes.append('beam_{0}'.format(beam_idx))
+                        first = nbeams + beam_idx * self.num_background_per_beam
+                        for idx in range(self.num_background_per_beam):
+                            order.append(first + idx)
+                            names.append('beam_{0}_bkgd_{1}'.format(beam_idx, idx))
+                            suffixes.append('beam_{0}bkgd_{1}'.format(beam_idx, idx))
+                    curves = curves[order]
                 else:
                     # There are no background curves to output
-                    for idx, tup in enumerate(self.LEEDclickpos):
-                        outfile = os.path.join(outdir, outname+str(idx)+'.txt')
-                        rad = int(self.LEEDrects[idx][3])
-                        x = int(tup[0])
-                        y = int(tup[1])
-                        int_window = self.leeddat.dat3d[y - rad:y + rad + 1,
-                                                        x - rad:x + rad + 1, :]
-                        # get average intensity per window
-                        ilist = [img.sum()/(2*rad*2*rad) for img in np.rollaxis(int_window, 2)]
-                        if self.smoothLEEDoutput:
-                            ilist = LF.smooth(ilist,
-                                              window_len=self.LEEDWindowLen,
-                                              window_type=self.LEEDWindowType)
-                        thread = WorkerThread(task='OUTPUT_TO_TEXT',
-                                                   elist=self.leeddat.elist,
-                                                   ilist=ilist,
-                                                   name=outfile)
-                        thread.finished.connect(self.output_complete)
-                        self.threads.append(thread)
-                        thread.start()
+                    curves = curves[:nbeams]
+                    names = ['beam_{0}'.format(idx) for idx in range(nbeams)]
+                    suffixes = [str(idx) for idx in range(nbeams)]
+        else:
+            return
+
+        # Query User for output file name
+        msg = "Enter name for output file(s)."
+        outname = QtWidgets.QFileDialog.getSaveFileName(self, msg)
+        try:
+            outname = outname[0]
+        except IndexError:
+            print("Error getting output file name.")
+            return
+        outname = str(outname)  # cast from QString ot string
+        if not outname:
+            return  # User clicked cancel
+
+        if smooth:
+            smoothed = LF.smooth_cube(np.asarray(curves, dtype=float)[:, np.newaxis, :],
+                                      window_len=window_len, window_type=window_type)
+            if smoothed is not None:
+                curves = smoothed[:, 0, :]
+        elist = list(elist)[:np.shape(curves)[1]]
+
+        thread = WorkerThread(task='OUTPUT_IV',
+                              name=outname,
+                              elist=elist,
+                              curves=curves,
+                              names=names,
+                              suffixes=suffixes,
+                              format=self.outputFormat)
+        thread.connectProgressSignal(self.output_progress)
+        task = Task(thread, "Writing {} I(V)".format(datatype), priority=EXPORT)
+        task.finished.connect(self.output_complete)
+        self.scheduler.submit(task)
+
+    @staticmethod
+    @QtCore.pyqtSlot(int, int)
+    def output_progress(done, total):
+        """Report the number of I(V) curves written by an output QThread."""
+        print("Wrote {0} of {1} I(V) curve(s)".format(done, total))
+
+    def set_output_format(self):
+        """Store the I(V) output format selected in the Config tab."""
+        self.outputFormat = self.output_format_menu.currentData()
 
     def validate_smoothing_settings(self, but=None):
         """Validate User input from Config Tab smoothing settings."""
@@ -1185,12 +1478,11 @@ class Viewer(QtWidgets.QWidget):
         else:
             self.LEEMWindowType = window_type.lower()
             self.LEEMWindowLen = window_len
-            # Changing the LEEM smoothing settings means we need to
-            # reset our position mask array which declared if we had
-            # previously calculated the smoothed data for a given point (x, y)
+            # curves smoothed with the previous settings are kept in self.leemdat.smoothed
+            # so switching back to them is instant
             if self.hasdisplayedLEEMdata:
                 # if we haven't displayed data yet, don't bother with this step.
-                self.leemdat.posMask.fill(0)
+                self.smooth_LEEM_in_background()
         return
 
     def toggleReflectivity(self, data=None):
@@ -1235,11 +1527,60 @@ class Viewer(QtWidgets.QWidget):
             if self.smoothLEEMCheckBox.isChecked():
                 self.smoothLEEMplot = True
                 self.smoothLEEMoutput = True
+                self.smooth_LEEM_in_background()
             else:
                 self.smoothLEEMplot = False
                 self.smoothLEEMoutput = False
             return
 
+    @QtCore.pyqtSlot()
+    def smooth_LEEM_in_background(self):
+        """Smooth every I(V) curve in the LEEM data set via QThread.
+
+        Once finished, smoothed I(V) curves are looked up from self.leemdat.smoothed rather than
+        computed per pixel on mouse movement. Data sets whose smoothed curves would not fit within
+        the memory of the smoothing cache are only smoothed a pixel at a time.
+        """
+        if not self.smoothLEEMplot or self.leemdat.dat3d is None or not self.leemdat.smoothed.fits():
+            return
+        if self.leemdat.loaded != self.leemdat.dat3d.shape[2] or isinstance(self.leemdat.dat3d, GrowableStack):
+            return  # data is still being streamed in or acquired
+        key = (self.LEEMWindowType, self.LEEMWindowLen, self.leemdat.version)
+        if key == self.LEEMSmoothKey:
+            return  # already smoothed or in progress with these settings
+        self.LEEMSmoothKey = key
+        store = self.leemdat.smoothed.get(key)
+        if store is not None and store.full is not None:
+            # smoothed earlier with these settings; cancel smoothing with other settings
+            self.scheduler.cancel(key=('smooth', 'LEEM'))
+            return
+        thread = WorkerThread(task='SMOOTH',
+                              data=self.leemdat.dat3d,
+                              window_type=self.LEEMWindowType,
+                              window_len=self.LEEMWindowLen)
+        # supersedes smoothing with older settings or data
+        task = Task(thread, "Smoothing LEEM data", priority=BACKGROUND, key=('smooth', 'LEEM'))
+        task.connect(thread.outputSIGNAL, lambda smth: self.retrieve_LEEM_smoothed(smth, key))
+        task.stateChanged.connect(lambda state: self.smoothing_state_changed(state, key))
+        self.scheduler.submit(task)
+
+    def smoothing_state_changed(self, state, key):
+        """Allow smoothing with the same settings to be requested again if it was cancelled by the User."""
+        if state == CANCELLED and key == self.LEEMSmoothKey:
+            self.LEEMSmoothKey = None
+
+    def stop_background_tasks(self):
+        """Cancel every scheduled task, wait for their threads, and stop the smoothing worker processes."""
+        self.scheduler.cancel_all()
+        self.scheduler.wait()
+        taskpool.shutdown()
+
+    def retrieve_LEEM_smoothed(self, smth, key):
+        """Store the smoothed LEEM data set under its smoothing settings unless the data changed meanwhile."""
+        if key[2] != self.leemdat.version or smth.shape != self.leemdat.dat3d.shape:
+            return
+        self.leemdat.smoothed.fill(key, smth)
+
     @QtCore.pyqtSlot()
     def averageStateChanged(self):
         """Toggle boolean flag for outputting average LEED IV."""
@@ -1254,17 +1595,26 @@ class Viewer(QtWidgets.QWidget):
         """Recieved a finished() SIGNAL from a QThread object."""
         print('File output successfully')
 
-    @QtCore.pyqtSlot(np.ndarray)
-    def retrieve_LEEM_data(self, data):
-        """Grab the 3d numpy array emitted from the data loading I/O thread."""
+    @QtCore.pyqtSlot(object)
+    def retrieve_LEEM_data(self, data, loaded=None):
+        """Grab the DataStack emitted from the data loading I/O thread or a 3d array from the cube cache."""
+        if not isinstance(data, DataStack):
+            data = DataStack(data)
+        self.LEEMHover.cancel()  # a position waiting to be plotted may lie outside the new data
         self.leemdat.dat3d = data
-        self.leemdat.dat3ds = data.copy()
-        self.leemdat.posMask = np.zeros((self.leemdat.dat3d.shape[0],
-                                         self.leemdat.dat3d.shape[1]))
+        self.leemdat.version += 1
+        self.LEEMPyramid = pyramid.ImagePyramid(data)
+        self.LEEMDisplayFactor = 1
+        self.frameCaches['LEEM'].reset(self.LEEMPyramid, key=self.leemdat.version)
+        # number of images which hold data; streamed loads start at 0 and grow via retrieve_LEEM_chunk()
+        self.leemdat.loaded = data.shape[2] if loaded is None else loaded
+        # smoothed curves are stored for the pixels visited, for each recent smoothing setting
+        self.leemdat.smoothed = SmoothingCache(data.shape)
         if self.currentLEEMTime:
             # populate self.leemdat.timelist via settings from self.exp
             try:
-                time_step = self.exp.time_step
+                # one image is loaded every energy_stride files
+                time_step = self.exp.time_step * self.exp.energy_stride
             except AttributeError:
                 print("Error: No Time Step setting found in loaded experiment settings.")
                 print("Defaulting to 1.0s per image.")
@@ -1273,19 +1623,23 @@ class Viewer(QtWidgets.QWidget):
             self.leemdat.timelist = [k * time_step for k in range(self.leemdat.dat3d.shape[2])]
         return
 
-    @QtCore.pyqtSlot(np.ndarray)
-    def retrieve_LEED_data(self, data):
-        """Grab the numpy array emitted from the data loading I/O thread."""
+    @QtCore.pyqtSlot(object)
+    def retrieve_LEED_data(self, data, loaded=None):
+        """Grab the DataStack emitted from the data loading I/O thread or a 3d array from the cube cache."""
         # data = [np.fliplr(np.rot90(np.rot90(img))) for img in np.rollaxis(data, 2)]
         # data = np.dstack(data)
+        if not isinstance(data, DataStack):
+            data = DataStack(data)
         self.leeddat.dat3d = data
-        self.leeddat.dat3ds = data.copy()
-        self.leeddat.posMask = np.zeros((self.leeddat.dat3d.shape[0],
-                                         self.leeddat.dat3d.shape[1]))
+        self.leeddat.version += 1
+        self.frameCaches['LEED'].reset(data, key=self.leeddat.version)
+        # number of images which hold data; streamed loads start at 0 and grow via retrieve_LEED_chunk()
+        self.leeddat.loaded = data.shape[2] if loaded is None else loaded
         if self.currentLEEDTime:
             # populate self.leeddat.timelist via settings from self.exp
             try:
-                time_step = self.exp.time_step
+                # one image is loaded every energy_stride files
+                time_step = self.exp.time_step * self.exp.energy_stride
             except AttributeError:
                 print("Error: No Time Step setting found in loaded experiment settings.")
                 print("Defaulting to 1.0s per image.")
@@ -1294,6 +1648,35 @@ class Viewer(QtWidgets.QWidget):
             self.leeddat.timelist = [k * time_step for k in range(self.leeddat.dat3d.shape[2])]
         return
 
+    def replace_stack(self, stack, datatype=None):
+        """Display a DataStack holding the images streamed in, now in its requested storage layout.
+
+        The images are unchanged, so the data version, selections, and smoothed curves are kept.
+        :param stack: datastack.DataStack of the same shape as the current data
+        :param datatype: string 'LEEM' or 'LEED'
+        """
+        if datatype == 'LEEM':
+            self.leemdat.dat3d = stack
+            self.LEEMPyramid = pyramid.ImagePyramid(stack)
+            self.frameCaches['LEEM'].reset(self.LEEMPyramid, key=self.leemdat.version)
+        else:
+            self.leeddat.dat3d = stack
+            self.frameCaches['LEED'].reset(stack, key=self.leeddat.version)
+
+    @QtCore.pyqtSlot(int, int)
+    def retrieve_LEEM_chunk(self, start, stop):
+        """Make images [start, stop) streamed in by the data loading I/O thread available for display."""
+        self.leemdat.loaded = stop
+        if start == 0:
+            self.update_LEEM_img_after_load()
+
+    @QtCore.pyqtSlot(int, int)
+    def retrieve_LEED_chunk(self, start, stop):
+        """Make images [start, stop) streamed in by the data loading I/O thread available for display."""
+        self.leeddat.loaded = stop
+        if start == 0:
+            self.update_LEED_img_after_load()
+
     @QtCore.pyqtSlot()
     def update_LEEM_img_after_load(self):
         """Called upon data loading I/O thread emitting finished signal."""
@@ -1307,6 +1690,7 @@ class Viewer(QtWidgets.QWidget):
             self.LEEMimageplotwidget.getPlotItem().clear()
 
         self.curLEEMIndex = 0
+        self.LEEMDisplayFactor = 1  # the new image item starts at full resolution
 
         # pyqtgraph displays the array rotated 90 degrees CCW. To force the display to match the original array we
         # display a rotated + flipped array so that the image is displayed correctly
@@ -1315,7 +1699,9 @@ class Viewer(QtWidgets.QWidget):
         # Pyqtgraph interprets array data as [width, height]. So we apply a horizontal flip via [::-1, :]
         # then transpose the flipped array. This is equivalent to a 90 degree rotation in the CCW direction.
 
-        self.LEEMimage = pg.ImageItem(self.leemdat.dat3d[::-1, :, self.curLEEMIndex].T)
+        # frames from the frame cache are already flipped, transposed, and scaled to 8 bits
+        self.LEEMimage = pg.ImageItem(self.frameCaches['LEEM'].get(self.curLEEMIndex, limit=self.leemdat.loaded),
+                                      levels=framecache.LEVELS)
         self.LEEMimageplotwidget.addItem(self.LEEMimage)
         self.LEEMimageplotwidget.hideAxis('bottom')
         self.LEEMimageplotwidget.hideAxis('left')
@@ -1334,7 +1720,7 @@ class Viewer(QtWidgets.QWidget):
 
         self.leemdat.elist = [self.exp.mine]
         while len(self.leemdat.elist) < self.leemdat.dat3d.shape[2]:
-            nextEnergy = self.leemdat.elist[-1] + self.exp.stepe
+            nextEnergy = self.leemdat.elist[-1] + self.exp.stepe * self.exp.energy_stride
             self.leemdat.elist.append(round(nextEnergy, 2))
         self.checkDataSize(datatype="LEEM")
         self.hasdisplayedLEEMdata = True
@@ -1376,14 +1762,16 @@ class Viewer(QtWidgets.QWidget):
         # Pyqtgraph interprets array data as [width, height]. So we apply a horizontal flip via [::-1, :]
         # then transpose the flipped array. This is equivalent to a 90 degree rotation in the CCW direction.
 
-        self.LEEDimage = pg.ImageItem(self.leeddat.dat3d[::-1, :, self.curLEEDIndex].T)
+        # frames from the frame cache are already flipped, transposed, and scaled to 8 bits
+        self.LEEDimage = pg.ImageItem(self.frameCaches['LEED'].get(self.curLEEDIndex, limit=self.leeddat.loaded),
+                                      levels=framecache.LEVELS)
         self.LEEDimagewidget.addItem(self.LEEDimage)
         self.LEEDimagewidget.hideAxis('bottom')
         self.LEEDimagewidget.hideAxis('left')
 
         self.leeddat.elist = [self.exp.mine]
         while len(self.leeddat.elist) < self.leeddat.dat3d.shape[2]:
-            newEnergy = self.leeddat.elist[-1] + self.exp.stepe
+            newEnergy = self.leeddat.elist[-1] + self.exp.stepe * self.exp.energy_stride
             self.leeddat.elist.append(round(newEnergy, 2))
         self.hasdisplayedLEEDdata = True
         title = "Reciprocal Space LEED Image: {} eV"
@@ -1397,10 +1785,8 @@ class Viewer(QtWidgets.QWidget):
             return
         elif datatype == 'LEEM':
             mainshape = self.leemdat.dat3d.shape
-            if self.leemdat.dat3ds.shape != mainshape:
-                self.leemdat.dat3ds = np.zeros(mainshape)
-            if self.leemdat.posMask.shape != (mainshape[0], mainshape[1]):
-                self.leemdat.posMask = np.zeros((mainshape[0], mainshape[1]))
+            if self.leemdat.smoothed is None or self.leemdat.smoothed.shape != mainshape:
+                self.leemdat.smoothed = SmoothingCache(mainshape)
         elif datatype == 'LEED':
             pass
         else:
@@ -1415,6 +1801,7 @@ class Viewer(QtWidgets.QWidget):
             return
         # disable mouse movement tracking
         # reroute mouse click signal to new handle
+        self.LEEMHover.cancel()
         try:
             self.sigmmvLEEM.disconnect()
         except:
@@ -1551,6 +1938,7 @@ class Viewer(QtWidgets.QWidget):
         if not self.hasdisplayedLEEMdata or not self.LEEMRects or self.LEEMRectCount == 0:
             return
         self.LEEMivplotwidget.clear()
+        rois = []
         for tup in self.LEEMRects:
             topleft = tup[3]
             bottomright = tup[4]
@@ -1561,9 +1949,10 @@ class Viewer(QtWidgets.QWidget):
             # print("Topleft: {}".format(topleft))
             # print("Bottomright: {}".format(bottomright))
             print("Window Selected: X={0}, Y={1}, Width={2}, Height={3}".format(xtl, ytl, width, height))
-            window = self.leemdat.dat3d[ytl:ytl + height + 1,
-                                        xtl:xtl + width + 1, :]
-            ilist = [img.sum()/(width*height) for img in np.rollaxis(window, 2)]
+            rois.append(roi.RectROI.from_corners(topleft, bottomright))
+        # average every window at every energy in one pass
+        curves = self.extract_ROI_IV(rois, datatype='LEEM')
+        for tup, ilist in zip(self.LEEMRects, curves):
             if self.smoothLEEMplot:
                 ilist = LF.smooth(ilist, window_len=self.LEEMWindowLen, window_type=self.LEEMWindowType)
             if self.currentLEEMTime:
@@ -1579,6 +1968,7 @@ class Viewer(QtWidgets.QWidget):
 
         Disable/reroute current LEEM mouse behavaiour to stop tracking mouse motion and implement a new click hadler.
         """
+        self.LEEMHover.cancel()
         try:
             self.sigmmvLEEM.disconnect()
         except:
@@ -1698,23 +2088,24 @@ class Viewer(QtWidgets.QWidget):
             self.LEEMclicks = 0
 
     def extractLEEMLineProfiles(self):
-        """Use Bressenham Algorithm to get all array points along the User selected lines."""
-        if not self.hasdisplayedLEEMdata or not self.LEEMLineProfileEnabled:
+        """Sample the current LEEM image every pixel along all of the User selected lines.
+
+        Sample positions are interpolated bilinearly between pixels, and the profiles of
+        every line are gathered from the image at once.
+        """
+        if not self.hasdisplayedLEEMdata or not self.LEEMLineProfileEnabled or not self.LEEMLines:
             return
         self.LEEMivplotwidget.clear()
-        for idx, item in enumerate(self.LEEMLines):
-            pt1 = item[1]
-            pt2 = item[2]
-            points = bline(pt1[0], pt1[1], pt2[0], pt2[1])
-            ilist = []
-            for point in points:
-                ilist.append(self.leemdat.dat3d[point[1], point[0], self.curLEEMIndex])
+        lines = [(item[1], item[2]) for item in self.LEEMLines]
+        profiles = LineProfiles(lines, self.leemdat.dat3d.shape)
+        frame = self.leemdat.dat3d.frame(self.curLEEMIndex)
+        for idx, (distance, ilist) in enumerate(profiles.profiles(frame)):
             if self.smoothLEEMplot:
                 ilist = LF.smooth(ilist, window_len=self.LEEMWindowLen, window_type=self.LEEMWindowType)
             pen = pg.mkPen(self.qcolors[idx], width=self.LEEM_Linewidth)
-            pdi = pg.PlotDataItem(list(range(len(points))), ilist, pen=pen)
+            pdi = pg.PlotDataItem(distance, ilist, pen=pen)
             self.LEEMivplotwidget.addItem(pdi)
-            self.LEEMivplotwidget.setLabel('bottom', 'Distance Along Line', units='[arb. units]', **self.labelStyle)
+        self.LEEMivplotwidget.setLabel('bottom', 'Distance Along Line', units='[pixels]', **self.labelStyle)
 
     def handleLEEMClick(self, event):
         """User click registered in LEEMimage area.
@@ -1743,7 +2134,8 @@ class Viewer(QtWidgets.QWidget):
         self.LEEMclicks += 1
 
         pos = event.pos()
-        mappedPos = self.LEEMimage.mapFromScene(pos)
+        # map through the view box: view coordinates are full resolution pixels at every pyramid level
+        mappedPos = self.LEEMimageplotwidget.getPlotItem().getViewBox().mapSceneToView(pos)
         xmapfs = int(mappedPos.x())
         ymapfs = int(mappedPos.y())
 
@@ -1764,9 +2156,7 @@ class Viewer(QtWidgets.QWidget):
             print("Error: Failed to get currentLEEMPos for LEEMClick().")
             return
         xdata = self.leemdat.elist
-        ydata = self.leemdat.dat3d[ymp, xmp, :]
-        if self.smoothLEEMplot:
-            ydata = LF.smooth(ydata, window_len=self.LEEMWindowLen, window_type=self.LEEMWindowType)
+        ydata = self.get_LEEM_pixel_IV(xmp, ymp)
 
         brush = QtGui.QBrush(self.qcolors[self.LEEMclicks - 1])
         rad = 8
@@ -1780,6 +2170,7 @@ class Viewer(QtWidgets.QWidget):
 
         pen = pg.mkPen(self.qcolors[self.LEEMclicks - 1], width=self.LEEM_Linewidth)
         pdi = pg.PlotDataItem(xdata, ydata, pen=pen)
+        self.LEEMclickcurves.append((xmp, ymp, pdi))
 
         yaxis = self.staticLEEMplot.getAxis("left")
         # y axis is 'arbitrary units'; we don't want kilo or mega arbitrary units etc...
@@ -1793,6 +2184,18 @@ class Viewer(QtWidgets.QWidget):
         if not self.staticLEEMplot.isVisible():
             self.staticLEEMplot.show()
 
+    def get_LEEM_pixel_IV(self, x, y):
+        """Get the I(V) curve of a single LEEM pixel as plotted for a click, smoothed if enabled.
+
+        :param x: integer array column
+        :param y: integer array row
+        :return: 1d numpy array
+        """
+        ydata = self.leemdat.dat3d.spectrum(y, x)
+        if self.smoothLEEMplot:
+            ydata = LF.smooth(ydata, window_len=self.LEEMWindowLen, window_type=self.LEEMWindowType)
+        return ydata
+
     def handleLEEMMouseMoved(self, pos):
         """Track mouse movement within LEEM image area and display I(V) from mouse location."""
         if not self.hasdisplayedLEEMdata:
@@ -1806,7 +2209,8 @@ class Viewer(QtWidgets.QWidget):
                 return
         # else pos is a QPointF object which can be mapped directly
 
-        mappedPos = self.LEEMimage.mapFromScene(pos)
+        # map through the view box: view coordinates are full resolution pixels at every pyramid level
+        mappedPos = self.LEEMimageplotwidget.getPlotItem().getViewBox().mapSceneToView(pos)
         xmp = int(mappedPos.x())
         ymp = int(mappedPos.y())
         if xmp < 0 or \
@@ -1824,31 +2228,55 @@ class Viewer(QtWidgets.QWidget):
         ymp = self.leemdat.dat3d.shape[0] - 1 - ymp
         self.currentLEEMPos = (xmp, ymp)  # used for handleLEEMClick()
         # print("Mouse moved to: {0}, {1}".format(xmp, ymp))  # array coordinates
-
-        # update IV plot
-        if self.currentLEEMTime:
-            xdata = self.leemdat.timelist
-        else:
-            xdata = self.leemdat.elist
-        ydata = self.leemdat.dat3d[ymp, xmp, :]  # raw unsmoothed data
-
-        if self.rescaleLEEMIntensity:
-            ydata = [point/float(max(ydata)) for point in ydata]
-        if self.smoothLEEMplot and not self.leemdat.posMask[ymp, xmp]:
-            # We want to plot smoothed dat but the I(V) of the current pixel position
-            # has not yet been smoothed
-            ydata = LF.smooth(ydata, window_type=self.LEEMWindowType, window_len=self.LEEMWindowLen)
-            self.leemdat.dat3ds[ymp, xmp, :] = ydata
-            self.leemdat.posMask[ymp, xmp] = 1
-
-        elif self.smoothLEEMplot and self.leemdat.posMask[ymp, xmp]:
-            # We want to plot smoothed data and have already calculated it for this pixel position
-            ydata = self.leemdat.dat3ds[ymp, xmp, :]
-
-        pen = pg.mkPen(self.qcolors[0], width=self.LEEM_Linewidth)
-        pdi = pg.PlotDataItem(xdata, ydata, pen=pen)
-        self.LEEMivplotwidget.getPlotItem().clear()
-        self.LEEMivplotwidget.getPlotItem().addItem(pdi, clear=True)
+        self.LEEMHover.request(xmp, ymp)
+
+    @instrument.timed('hover I(V)', 'hover')
+    def plot_LEEM_hover_IV(self, xmp, ymp):
+        """Plot the I(V) curve of the LEEM pixel under the mouse in array coordinates (top edge is y=0)."""
+        # while data is streamed in, only the images read so far are plotted
+        loaded = self.leemdat.loaded
+        xdata = self.get_LEEM_hover_xdata(loaded)
+        ydata = self.leemdat.dat3d.spectrum(ymp, xmp)[:loaded]  # raw unsmoothed data
+        # smoothing is linear, so rescaling after smoothing by the raw maximum matches rescaling first
+        ymax = float(ydata.max()) if len(ydata) else 0.0
+
+        # smoothing is applied once every image has been read
+        smooth = self.smoothLEEMplot and loaded == self.leemdat.dat3d.shape[2]
+        if smooth:
+            store = self.leemdat.smoothed.store((self.LEEMWindowType, self.LEEMWindowLen, self.leemdat.version))
+            smoothed = store.get(ymp, xmp)
+            if smoothed is None:
+                # the I(V) of the current pixel position has not yet been smoothed
+                smoothed = LF.smooth(ydata, window_type=self.LEEMWindowType, window_len=self.LEEMWindowLen)
+                if smoothed is not None:
+                    store.put(ymp, xmp, smoothed)
+            if smoothed is not None:
+                ydata = smoothed
+
+        if self.rescaleLEEMIntensity and ymax:
+            ydata = np.divide(ydata, ymax, dtype=np.float64)
+
+        plotitem = self.LEEMivplotwidget.getPlotItem()
+        curve = self.LEEMHoverCurve
+        if curve is None or curve not in plotitem.listDataItems():
+            # the plot was cleared, e.g. by a line profile, or the line width changed
+            curve = pg.PlotDataItem(pen=pg.mkPen(self.qcolors[0], width=self.LEEM_Linewidth))
+            plotitem.clear()
+            plotitem.addItem(curve)
+            self.LEEMHoverCurve = curve
+        curve.setData(xdata, ydata)
+
+    def get_LEEM_hover_xdata(self, loaded):
+        """Get the energies, or times, of the first loaded LEEM images as an array, reusing the last array built.
+
+        :param loaded: integer number of images plotted
+        :return: 1d numpy array
+        """
+        xlist = self.leemdat.timelist if self.currentLEEMTime else self.leemdat.elist
+        key = (id(xlist), len(xlist), loaded, self.leemdat.version)
+        if self.LEEMHoverX[0] != key:
+            self.LEEMHoverX = (key, np.asarray(xlist[:loaded], dtype=np.float64))
+        return self.LEEMHoverX[1]
 
     def handleLEEDClick(self, event):
         """User click registered in LEEDimage area."""
@@ -2120,56 +2548,78 @@ class Viewer(QtWidgets.QWidget):
             print("Error: Number of LEED windows does not match number of stored click positions")
             return
 
-        # loop over user slections
-        for idx, tup in enumerate(self.LEEDclickpos):
-            # center coordinates
-            xc = tup[0]
-            yc = tup[1]
-
-            # the lengths of LEEDclickpos and LEEDrects are ensured to be equal now
-            rad = int(self.LEEDrects[idx][3])  # cast to int to ensure array indexing uses ints
-
-            # top left corner in array coordinates
-            xtl = xc - rad
-            ytl = yc - rad
-
-            int_window = self.leeddat.dat3d[ytl:ytl + 2*rad + 1,
-                                            xtl:xtl + 2*rad + 1, :]
-            # store average intensity per window
-            ilist = [img.sum()/(2*rad*2*rad) for img in np.rollaxis(int_window, 2)]
-            # ilist = [img.sum() for img in np.rollaxis(int_window, 2)]
+        # average intensity per window for every beam and background selection in one pass
+        curves = self.extract_ROI_IV(self.get_LEED_rois() + self.get_LEED_background_rois(), datatype='LEED')
+        beam_ilists = curves[:len(self.LEEDclickpos)]
+        bkgd_ilists = curves[len(self.LEEDclickpos):]
+        for idx, ilist in enumerate(beam_ilists):
             if self.smoothLEEDplot:
                 ilist = LF.smooth(ilist, window_type=self.LEEDWindowType, window_len=self.LEEDWindowLen)
             # self.LEEDivplotwidget.plot(self.leeddat.elist, ilist, pen=pg.mkPen(self.qcolors[idx], width=4))
             self.LEEDivplotwidget.plot(self.leeddat.elist,
                                        ilist,
                                        pen=pg.mkPen(self.LEEDrects[idx][2].color(), width=4))
-            if self.LEEDBackgroundrects:
-                for idx, tup in enumerate(self.LEEDBackgroundcenters):
-                    # center coordinates
-                    xc = tup[0]
-                    yc = tup[1]
-
-                    # the lengths of LEEDclickpos and LEEDrects are ensured to be equal now
-                    rad = int(self.LEEDBackgroundrects[idx][3])  # cast to int to ensure array indexing uses ints
-
-                    # top left corner in array coordinates
-                    xtl = xc - rad
-                    ytl = yc - rad
-
-                    int_window = self.leeddat.dat3d[ytl:ytl + 2*rad + 1,
-                                                    xtl:xtl + 2*rad + 1, :]
-                    # store average intensity per window
-                    ilist = [img.sum()/(2*rad*2*rad) for img in np.rollaxis(int_window, 2)]
-                    # ilist = [img.sum() for img in np.rollaxis(int_window, 2)]
-                    if self.smoothLEEDplot:
-                        ilist = LF.smooth(ilist, window_type=self.LEEDWindowType, window_len=self.LEEDWindowLen)
-                    # self.LEEDivplotwidget.plot(self.leeddat.elist, ilist, pen=pg.mkPen(self.qcolors[idx], width=4))
-
-                    # width set to 6 for image clarity; reset to 4 if needed
-                    self.LEEDivplotwidget.plot(self.leeddat.elist,
-                                               ilist,
-                                               pen=pg.mkPen(self.LEEDBackgroundrects[idx][2].color(), width=6))
+        if self.LEEDBackgroundrects:
+            for idx, ilist in enumerate(bkgd_ilists):
+                if self.smoothLEEDplot:
+                    ilist = LF.smooth(ilist, window_type=self.LEEDWindowType, window_len=self.LEEDWindowLen)
+                # width set to 6 for image clarity; reset to 4 if needed
+                self.LEEDivplotwidget.plot(self.leeddat.elist,
+                                           ilist,
+                                           pen=pg.mkPen(self.LEEDBackgroundrects[idx][2].color(), width=6))
+
+    def get_LEED_rois(self):
+        """Build a square ROI of side 2*rad + 1 for each LEED beam selection."""
+        return [roi.RectROI.from_center(x, y, rect[3]) for (x, y), rect in zip(self.LEEDclickpos, self.LEEDrects)]
+
+    def get_LEED_background_rois(self):
+        """Build a square ROI of side 2*rad + 1 for each automatically selected LEED background box."""
+        return [roi.RectROI.from_center(x, y, rect[3])
+                for (x, y), rect in zip(self.LEEDBackgroundcenters, self.LEEDBackgroundrects)]
+
+    @instrument.timed('window I(V)', 'extract')
+    def extract_ROI_IV(self, rois, datatype=None):
+        """Calculate the average intensity per energy within each ROI using the cached summed-area table.
+
+        :param rois: list of ROI objects from roi.py
+        :param datatype: string 'LEEM' or 'LEED'
+        :return: (n_roi, n_energy) numpy array
+        """
+        dat = self.leemdat if datatype == 'LEEM' else self.leeddat
+        if not rois:
+            return np.zeros((0, dat.dat3d.shape[2]))
+        return roi.extract_iv(dat.dat3d, rois, table=self.get_summed_area_table(datatype))
+
+    def get_summed_area_table(self, datatype=None):
+        """Get the summed-area table for the current LEEM or LEED data once it has been built.
+
+        The first time windows are extracted from new data, a table is built in the background if it
+        fits within the Window Table Memory of the experiment; windows are summed directly until then.
+        Memory mapped data sets are not given a table since it would hold several times the data in RAM.
+        Nor are data sets still being acquired, since the table would be rebuilt for every new image.
+        :param datatype: string 'LEEM' or 'LEED'
+        :return: integral.SummedAreaTable or None
+        """
+        dat = self.leemdat if datatype == 'LEEM' else self.leeddat
+        if dat.dat3d is None or dat.dat3d.mapped or isinstance(dat.dat3d, GrowableStack):
+            return None
+        key = (dat.version, dat.loaded)
+        table = self.summedAreaTables.get(datatype)
+        if table is None or table.key != key:
+            table = integral.SummedAreaTable(dat.dat3d, key=key)
+            self.summedAreaTables[datatype] = table
+            if table.nbytes <= self.get_table_budget():
+                thread = WorkerThread(task='BUILD_TABLE', table=table)
+                self.scheduler.submit(Task(thread, "Indexing {} data for window I(V)".format(datatype),
+                                           priority=BACKGROUND, key=('table', datatype)))
+        return table if table.built else None
+
+    def get_table_budget(self):
+        """Get the number of bytes a summed-area table may use from the experiment settings."""
+        megabytes = getattr(self.exp, 'table_memory', None)
+        if megabytes is None:
+            return integral.MAX_TABLE_BYTES
+        return int(megabytes * 2**20)
 
     def averageLEEDIV(self):
         """Extract IV from current user selections and average the curves."""
@@ -2181,25 +2631,8 @@ class Viewer(QtWidgets.QWidget):
         if len(self.LEEDrects) == 1:
             print("Averaging LEED I(V) curves requires more than one selection.")
             return
-        curves = []
-        for idx, tup in enumerate(self.LEEDclickpos):
-            # center coordinates
-            xc = tup[0]
-            yc = tup[1]
-
-            # the lengths of LEEDclickpos and LEEDrects are ensured to be equal now
-            rad = int(self.LEEDrects[idx][3])  # cast to int to ensure array indexing uses ints
-
-            # top left corner in array coordinates
-            xtl = int(xc - rad)
-            ytl = int(yc - rad)
-            int_window = self.leeddat.dat3d[ytl:ytl + 2*rad + 1,
-                                            xtl:xtl + 2*rad + 1, :]
-            # store average intensity per window
-            ilist = [img.sum()/(2*rad*2*rad) for img in np.rollaxis(int_window, 2)]
-            # ilist = [img.sum() for img in np.rollaxis(int_window, 2)]
-            curves.append(ilist)
-        self.LEEDAverageIV = list(map(lambda l: sum(l)/float(len(l)), zip(*curves)))
+        curves = self.extract_ROI_IV(self.get_LEED_rois(), datatype='LEED')
+        self.LEEDAverageIV = list(curves.mean(axis=0))
         # clear current I(V) plot then plot the averaged I(V) data
         self.LEEDivplotwidget.clear()
         if self.smoothLEEDplot:
@@ -2256,6 +2689,7 @@ class Viewer(QtWidgets.QWidget):
             self.staticLEEMplot.setWindowFlags(QtCore.Qt.WindowStaysOnTopHint)
         self.LEEMclicks = 0
         self.LEEMselections = []
+        self.LEEMclickcurves = []
         self.LEEMcircs = []
 
     def clearLEEMWindows(self):
@@ -2291,7 +2725,8 @@ class Viewer(QtWidgets.QWidget):
         if self.tabs.currentIndex() == 0 and \
            self.hasdisplayedLEEMdata:
             # handle LEEM navigation
-            maxIdx = self.leemdat.dat3d.shape[2] - 1
+            # restrict navigation to images which have been read while data is streamed in
+            maxIdx = self.leemdat.loaded - 1
             minIdx = 0
             if (event.key() == QtCore.Qt.Key_Left) and \
                (self.curLEEMIndex >= minIdx + 1):
@@ -2319,21 +2754,12 @@ class Viewer(QtWidgets.QWidget):
                 # self.LEEMimageplotwidget.setTitle(title.format(energy))
                 self.LEEMimtitle.setText(title)
                 """
-            title = "Real Space {0} Image: {1} {2}"
-            energy = LF.filenumber_to_energy(self.leemdat.elist, self.curLEEMIndex)
-            if self.currentLEEMTime:
-                energy = self.leemdat.timelist[self.curLEEMIndex]  # this is a time
-                unit = "s"
-            else:
-                unit = "eV"
-            self.LEEMimtitle.setText(title.format(self.LEEM_tab_active_exp.exp_type,
-                                                  energy,
-                                                  unit))
+            self.update_LEEM_title()
         # LEED Tab is active
         elif (self.tabs.currentIndex() == 1) and \
              (self.hasdisplayedLEEDdata):
             # handle LEED navigation
-            maxIdx = self.leeddat.dat3d.shape[2] - 1
+            maxIdx = self.leeddat.loaded - 1
             minIdx = 0
             if (event.key() == QtCore.Qt.Key_Left) and \
                (self.curLEEDIndex >= minIdx + 1):
@@ -2357,31 +2783,112 @@ class Viewer(QtWidgets.QWidget):
                                                  self.curLEEDIndex)
                 self.LEEDTitle.setText(title.format(energy))
                 """
-            title = "Reciprocal Space {0} Image: {1} {2}"
-            energy = LF.filenumber_to_energy(self.leeddat.elist, self.curLEEDIndex)
-            if self.currentLEEDTime:
-                energy = self.leeddat.timelist[self.curLEEDIndex]  # this is a time
-                unit = "s"
-            else:
-                unit = "eV"
-            self.LEEDTitle.setText(title.format(self.LEED_tab_active_exp.exp_type,
-                                                  energy,
-                                                  unit))
+            self.update_LEED_title()
+
+    @QtCore.pyqtSlot(bool)
+    def set_instrumentation(self, enabled):
+        """Start or stop recording timings and show or hide the frame rate overlays."""
+        if enabled:
+            instrument.recorder.enable()
+            self.performanceTimer.start()
+            self.update_performance_overlay()
+        else:
+            instrument.recorder.disable()
+            self.performanceTimer.stop()
+        for overlay in self.performanceOverlays.values():
+            overlay.setVisible(enabled)
+
+    def update_performance_overlay(self):
+        """Show the display rate and the recent latency of image display and hover I(V) over each image."""
+        recorder = instrument.recorder
+        for datatype, overlay in self.performanceOverlays.items():
+            text = "{:.0f} fps".format(recorder.rate('display ' + datatype))
+            spans = [('display ' + datatype, 'frame')]
+            if datatype == 'LEEM':
+                spans.append(('hover I(V)', 'hover'))
+            for name, label in spans:
+                latency = recorder.latency(name)
+                if latency is not None:
+                    text += "  {0} {1:.1f} ms".format(label, 1000 * latency)
+            overlay.setText(text)
+
+    def print_performance_summary(self):
+        """Print the recorded timings to the message console."""
+        print(instrument.recorder.summary())
+
+    def save_performance_trace(self):
+        """Write the recorded timings to a trace file for Chrome tracing, Perfetto, or speedscope."""
+        msg = "Enter name for trace file."
+        outname = QtWidgets.QFileDialog.getSaveFileName(self, msg, "please-trace.json", "JSON (*.json)")[0]
+        if not outname:
+            return  # User clicked cancel
+        try:
+            written = instrument.recorder.write_trace(str(outname))
+        except OSError as e:
+            print("Error writing timing trace:")
+            print(e)
+            return
+        print("Wrote {0} trace events to {1}".format(written, outname))
 
+    def update_LEEM_title(self):
+        """Show the energy (or time) of the current LEEM image in the image title."""
+        title = "Real Space {0} Image: {1} {2}"
+        energy = LF.filenumber_to_energy(self.leemdat.elist, self.curLEEMIndex)
+        if self.currentLEEMTime:
+            energy = self.leemdat.timelist[self.curLEEMIndex]  # this is a time
+            unit = "s"
+        else:
+            unit = "eV"
+        self.LEEMimtitle.setText(title.format(self.LEEM_tab_active_exp.exp_type,
+                                              energy,
+                                              unit))
+
+    def update_LEED_title(self):
+        """Show the energy (or time) of the current LEED image in the image title."""
+        title = "Reciprocal Space {0} Image: {1} {2}"
+        energy = LF.filenumber_to_energy(self.leeddat.elist, self.curLEEDIndex)
+        if self.currentLEEDTime:
+            energy = self.leeddat.timelist[self.curLEEDIndex]  # this is a time
+            unit = "s"
+        else:
+            unit = "eV"
+        self.LEEDTitle.setText(title.format(self.LEED_tab_active_exp.exp_type,
+                                            energy,
+                                            unit))
+
+    @instrument.timed('display LEEM', 'display')
     def showLEEMImage(self, idx):
         """Display LEEM image from main data array at index=idx."""
-        if idx not in range(self.leemdat.dat3d.shape[2] - 1):
+        if idx not in range(self.leemdat.dat3d.shape[2]):
             return
 
         # see note in instance method update_LEEM_img_after_load()
-        # for why the displayed image uses a horizontal flip + transpose
-        self.LEEMimage.setImage(self.leemdat.dat3d[::-1, :, idx].T)
-
+        # for why the displayed image uses a horizontal flip + transpose;
+        # cached frames are already oriented and scaled so levels need not be recomputed
+        # binned images are stretched over the full resolution pixels they average, see pyramid.py
+        frame = self.frameCaches['LEEM'].get(idx, limit=self.leemdat.loaded, factor=self.LEEMDisplayFactor)
+        self.LEEMimage.setImage(frame, autoLevels=False, levels=framecache.LEVELS)
+        self.LEEMimage.setRect(QtCore.QRectF(*self.LEEMPyramid.rect(self.LEEMDisplayFactor)))
+
+    def update_LEEM_display_level(self, *args):
+        """Display the LEEM image at the pyramid level matching the current view scale."""
+        if not self.hasdisplayedLEEMdata or self.LEEMPyramid is None:
+            return
+        # number of full resolution image pixels covered by one screen pixel
+        pixel_size = min(self.LEEMimageplotwidget.getPlotItem().getViewBox().viewPixelSize())
+        factor = self.LEEMPyramid.choose_factor(pixel_size, current=self.LEEMDisplayFactor)
+        if factor != self.LEEMDisplayFactor:
+            self.LEEMDisplayFactor = factor
+            self.showLEEMImage(self.curLEEMIndex)
+
+    @instrument.timed('display LEED', 'display')
     def showLEEDImage(self, idx):
         """Display LEED image from main data array at index=idx."""
-        if idx not in range(self.leeddat.dat3d.shape[2] - 1):
+        if idx not in range(self.leeddat.dat3d.shape[2]):
             return
 
         # see note in instance method update_LEED_img_after_load()
-        # for why the displayed image uses a horizontal flip + transpose
-        self.LEEDimage.setImage(self.leeddat.dat3d[::-1, :, idx].T)
+        # for why the displayed image uses a horizontal flip + transpose;
+        # cached frames are already oriented and scaled so levels need not be recomputed
+        frame = self.frameCaches['LEED'].get(idx, limit=self.leeddat.loaded)
+        self.LEEDimage.setImage(frame, autoLevels=False, levels=framecache.LEVELS)
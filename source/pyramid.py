@@ -0,0 +1,99 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Multi-resolution image pyramid for displaying large detector images.
+
+A 2048x2048 image shown in a 600 pixel wide widget is downsampled by Qt on
+every redraw after the full resolution image has been converted and copied.
+An ImagePyramid instead provides copies of each image mean-binned by 2, 4,
+and 8, so the display can show the coarsest level which still has at least one
+image pixel per screen pixel. Binned images are not kept: they are binned each
+time they are requested, and the display-ready frames are held in the bounded
+framecache.FrameCache, so memory use does not grow as the user steps through
+the images.
+
+Binned images drop the rows at the top of the image and the columns at the
+right of the image which do not fill a whole bin. Displayed with the
+rectangle from rect(), bin (i, j) then covers exactly the full resolution
+pixels it averages, so view coordinates always refer to full resolution
+array pixels whichever level is shown.
+"""
+
+import numpy as np
+
+FACTORS = (2, 4, 8)
+
+
+def bin_frame(frame, factor):
+    """Mean-bin a 2d image by factor along both axes.
+
+    :param frame: 2d numpy array (height, width)
+    :param factor: integer bin size
+    :return: 2d numpy array (height // factor, width // factor); integer data keeps its dtype
+    """
+    frame = np.asarray(frame)
+    ht, wd = frame.shape[0] // factor, frame.shape[1] // factor
+    # drop the top rows and right columns which do not fill a bin; see the module docstring
+    block = frame[frame.shape[0] - ht * factor:, :wd * factor]
+    binned = block.reshape(ht, factor, wd, factor).mean(axis=(1, 3))
+    if frame.dtype.kind in 'ui':
+        return np.rint(binned).astype(frame.dtype)
+    return binned
+
+
+class ImagePyramid(object):
+    """Mean-binned copies of every image in a data set, binned on request."""
+
+    def __init__(self, stack, factors=FACTORS):
+        """Store the data set.
+
+        :param stack: datastack.DataStack or any object with frame(idx) and shape (height, width, image number)
+        :param factors: increasing integer bin sizes; levels smaller than one pixel are skipped
+        """
+        self.stack = stack
+        self.factors = tuple(f for f in factors if stack.shape[0] // f and stack.shape[1] // f)
+
+    @property
+    def shape(self):
+        """Shape of the data set; images appended to a datastack.GrowableStack are included."""
+        return tuple(self.stack.shape)
+
+    def frame(self, idx, factor=1):
+        """Return image idx mean-binned by factor; factor 1 returns the full resolution image."""
+        if factor == 1:
+            return self.stack.frame(idx)
+        if factor not in self.factors:
+            raise ValueError("Invalid bin factor {0}; valid factors are {1}".format(factor, self.factors))
+        idx = range(self.shape[2])[idx]  # normalize negative indices and raise IndexError
+        return bin_frame(self.stack.frame(idx), factor)
+
+    def rect(self, factor=1):
+        """Return (x, y, width, height) of the display rectangle for images binned by factor.
+
+        The rectangle is in full resolution display coordinates where x is the array column
+        and y is measured up from the bottom row of the image.
+        """
+        return (0, 0, (self.shape[1] // factor) * factor, (self.shape[0] // factor) * factor)
+
+    def choose_factor(self, pixel_size, current=1, hysteresis=0.875):
+        """Choose the coarsest bin factor with at least one binned pixel per screen pixel.
+
+        :param pixel_size: number of full resolution image pixels per screen pixel
+        :param current: bin factor currently displayed
+        :param hysteresis: fraction of the current factor the pixel size must fall below before
+                           switching to a finer level, so the small change in the displayed area
+                           when switching levels does not cause the level to flip back and forth
+        :return: integer bin factor, 1 for full resolution
+        """
+        factor = 1
+        for f in self.factors:
+            if f <= pixel_size:
+                factor = f
+        if factor < current and current in self.factors and pixel_size >= current * hysteresis:
+            return current
+        return factor
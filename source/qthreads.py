@@ -14,15 +14,33 @@ Common tasks for the worker thread will be:
     Loading raw data files from disk to memory
     Loading image files from disk to memory
     Outputting IV-data to text files(s)
+    Outputting many I(V) curves at once in a bulk format
+    Writing loaded data to the persistent cube cache
+
+CPU bound work on whole data sets (smoothing, and converting files to raw .dat
+files) is spread over the process pool in taskpool.py; the worker thread waits
+on the pool, emitting progressSIGNAL as blocks finish, so the computation does
+not hold the GIL needed by the GUI. Loading, smoothing, file conversion, and
+I(V) output stop early when cancel() is called; see scheduler.py.
+
+A WatchThread reads the images of a data set as they are acquired.
 """
 
+import functools
 import os
+import time
+import cubecache
+import ivoutput
 import LEEMFUNCTIONS as LF
-import numpy as np
-from configinfo import output_environment_config
+import taskpool
+from datastack import LAYOUTS, DataStack
 from experiment import Experiment
+from lazyimport import lazy_import
+from watchfolder import POLL_INTERVAL
 from PyQt5 import QtCore
 
+configinfo = lazy_import('configinfo')  # imports pendulum; only needed by outputConfigInfo()
+
 # TODO: Consider splitting to multiple classes for separate tasks
 
 
@@ -31,7 +49,10 @@ class WorkerThread(QtCore.QThread):
 
     # Pyqt5 Signals must be declared at class level
     done = QtCore.pyqtSignal()
-    outputSIGNAL = QtCore.pyqtSignal(np.ndarray)
+    outputSIGNAL = QtCore.pyqtSignal(object)  # datastack.DataStack when loading data, otherwise np.ndarray
+    chunkReady = QtCore.pyqtSignal(int, int)  # (start, stop) range of images read while streaming
+    arrangedSIGNAL = QtCore.pyqtSignal(object)  # datastack.DataStack in its requested layout replacing a streamed one
+    progressSIGNAL = QtCore.pyqtSignal(int, int)  # (items completed, total items)
     yamlFileOutput = QtCore.pyqtSignal(bool)
 
     def __init__(self, task=None, **kwargs):
@@ -40,7 +61,7 @@ class WorkerThread(QtCore.QThread):
         :param: task: string describing task to be completed by worker thread
         :kwargs:
         path: string path to data to load or directory to output into
-        data: numpy array of data to perform a calculation on or output to text
+        data: numpy array of data to perform a calculation on or output to text, or datastack.DataStack to arrange
         ilist: list of intensity values to output to text
         elist: list of energy values (eV) in single decimal format to be used for calculations or for outputting to text
         imht: integer image height dimension
@@ -51,15 +72,35 @@ class WorkerThread(QtCore.QThread):
         byte: string 'L or 'B' denoting endian-ness of data
         outpath: string path to directory in which to output .dat files
         files: list of strings of file names to be output as raw data to outpath
+        mmap: boolean to memory map raw data files instead of reading them into memory
+        workers: integer number of threads used to read data files in parallel
+        stream: boolean to emit the data array before it is filled then emit chunkReady as images are read
+        layout: string storage layout of loaded data, one of datastack.LAYOUTS
+        crop: (row start, column start, row stop, column stop) pixel region of each image to load
+        binning: integer size of the square blocks of pixels averaged together when loading
+        stride: integer step between the data files loaded
+        window_len: even integer size of smoothing window
+        window_type: string name of smoothing window function
+        processes: integer number of worker processes used for smoothing and file conversion
+        signature: dictionary from cubecache.dataset_signature() describing the data set in path
+        curves: (n_curve, n_energy) numpy array of I(V) curves to output in bulk
+        names: list of names for each curve used as column labels in bulk output
+        suffixes: list of file name suffixes for each curve when outputting one text file per curve
+        format: string bulk output format, one of ivoutput.FORMATS
+        table: integral.SummedAreaTable to build
         """
         super(WorkerThread, self).__init__()
         self.task = task
         # Get parameters as dictionary and validate against keys
         self.params = kwargs
+        self.stack = None  # DataStack emitted while streaming data in, replaced by arrangedSIGNAL once loaded
         # path refers to input data path
         # output data path is labeled as outpath
         self.valid_keys = ['path', 'data', 'ilist', 'elist',
-                           'imht', 'imwd', 'name', 'bits', 'ext', 'byte', 'outpath', 'files', 'settings']
+                           'imht', 'imwd', 'name', 'bits', 'ext', 'byte', 'outpath', 'files', 'settings',
+                           'mmap', 'signature', 'workers', 'stream', 'window_len', 'window_type',
+                           'layout', 'curves', 'names', 'suffixes', 'format', 'crop', 'binning', 'stride',
+                           'processes', 'table']
         for key in self.params.keys():
             if key not in self.valid_keys:
                 print('Terminating - ERROR Invalid Task Parameter: {}'.format(key))
@@ -74,6 +115,111 @@ class WorkerThread(QtCore.QThread):
         """Callable from gui.py to connect the outputSIGNAL to various slots."""
         self.outputSIGNAL.connect(slot)
 
+    def connectChunkSignal(self, slot):
+        """Callable from gui.py to connect the chunkReady signal to various slots."""
+        self.chunkReady.connect(slot)
+
+    def connectProgressSignal(self, slot):
+        """Callable from gui.py to connect the progressSIGNAL to various slots."""
+        self.progressSIGNAL.connect(slot)
+
+    def cancel(self):
+        """Ask the task to stop early; loading, smoothing, file conversion, and I(V) output then emit no output."""
+        self.requestInterruption()
+
+    def isCancelled(self):
+        """Return True if cancel() has been called."""
+        return self.isInterruptionRequested()
+
+    def isStreaming(self):
+        """Return True if the data array is emitted before it is filled when loading data."""
+        return bool(self.params.get('stream')) and not self.params.get('mmap')
+
+    def getReduction(self):
+        """Get the keyword arguments which crop, bin, and subsample data as it is loaded.
+
+        :return: dictionary of crop, binning, and stride for the LF loaders
+        """
+        return {'crop': self.params.get('crop'),
+                'binning': self.params.get('binning') or 1,
+                'stride': self.params.get('stride') or 1}
+
+    def isReduced(self):
+        """Return True if data is cropped, binned, or subsampled as it is loaded."""
+        reduction = self.getReduction()
+        return reduction['crop'] is not None or reduction['binning'] != 1 or reduction['stride'] != 1
+
+    def makeStreamCallback(self, interval=0.1):
+        """Build a loader callback which emits the data array as soon as it is allocated.
+
+        As images are read, chunkReady(start, stop) is emitted for each newly completed
+        range of images; emits are limited to one per interval seconds, with the first
+        image and the final range always emitted.
+        :param interval: minimum time in seconds between chunkReady signals
+        :return: callable(data, stop) to be passed as the callback to the LF loaders
+        """
+        state = {'start': 0, 'time': 0.0}
+
+        def callback(data, stop):
+            if stop == 0:
+                self.stack = DataStack(data, layout=self.getLayout())
+                self.outputSIGNAL.emit(self.stack)
+                return
+            now = time.monotonic()
+            if state['start'] == 0 or stop == data.shape[2] or now - state['time'] >= interval:
+                self.chunkReady.emit(state['start'], stop)
+                self.progressSIGNAL.emit(stop, data.shape[2])
+                state['start'] = stop
+                state['time'] = now
+        return callback
+
+    def makeProgressCallback(self, interval=0.1):
+        """Build a loader callback which emits progressSIGNAL(images read, total images).
+
+        Emits are limited to one per interval seconds, with the final count always emitted.
+        :param interval: minimum time in seconds between progressSIGNAL signals
+        :return: callable(data, stop) to be passed as the callback to the LF loaders
+        """
+        state = {'time': 0.0}
+
+        def callback(data, stop):
+            now = time.monotonic()
+            if stop == data.shape[2] or now - state['time'] >= interval:
+                self.progressSIGNAL.emit(stop, data.shape[2])
+                state['time'] = now
+        return callback
+
+    def getLoadCallback(self):
+        """Get the callback passed to the LF loaders: streaming if requested, otherwise progress only."""
+        return self.makeStreamCallback() if self.isStreaming() else self.makeProgressCallback()
+
+    def getLayout(self):
+        """Return the requested storage layout for loaded data, falling back to 'spectrum' if it is invalid."""
+        layout = self.params.get('layout', 'spectrum')
+        if layout not in LAYOUTS:
+            print("Error: Invalid data layout {0}; valid layouts are {1}".format(layout, ", ".join(LAYOUTS)))
+            print("Using the 'spectrum' layout ...")
+            return 'spectrum'
+        return layout
+
+    def emitLoadedData(self, data):
+        """Emit freshly loaded data as a DataStack with its requested storage layout.
+
+        The layout is built before the stack is emitted, as the GUI thread reads the stack as soon
+        as it is received. When streaming, the DataStack emitted by the stream callback is already
+        in use, so a new stack in the requested layout is built and emitted by arrangedSIGNAL.
+        :param data: 3d numpy array or datastack.MemmapStack returned by the loader
+        """
+        if self.isStreaming():
+            if self.stack is not None:
+                stack = self.stack.arranged()
+                if stack is not self.stack:
+                    self.arrangedSIGNAL.emit(stack)
+        else:
+            stack = DataStack(data, layout=self.getLayout())
+            stack.arrange()
+            self.outputSIGNAL.emit(stack)
+
     def run(self):
         """Call method to do work depending on self.task.
 
@@ -110,6 +256,11 @@ class WorkerThread(QtCore.QThread):
             self.quit()
             self.exit()  # restrict action to one task
 
+        elif self.task == 'OUTPUT_IV':
+            self.output_IV()
+            self.quit()
+            self.exit()  # restrict action to one task
+
         # elif self.task == 'COUNT_MINIMA':
         #     self.count_Minima()
         #     self.quit()
@@ -120,11 +271,26 @@ class WorkerThread(QtCore.QThread):
             self.quit()
             self.exit()  # restrict action to one task
 
+        elif self.task == 'ARRANGE':
+            self.arrange_Data()
+            self.quit()
+            self.exit()  # restrict action to one task
+
+        elif self.task == 'BUILD_TABLE':
+            self.build_Table()
+            self.quit()
+            self.exit()  # restrict action to one task
+
         elif self.task == 'GEN_DAT_FILES':
             self.gen_Dat_Files()
             self.quit()
             self.exit()  # restrict action to one task
 
+        elif self.task == 'WRITE_CACHE':
+            self.write_Cache()
+            self.quit()
+            self.exit()
+
         elif self.task == 'CREATE_YAML':
             self.createYAML()
             self.quit()
@@ -141,7 +307,7 @@ class WorkerThread(QtCore.QThread):
             self.exit()
 
     def load_LEED(self):
-        """Load raw binary LEED-IV data to a 3d numpy array.
+        """Load raw binary LEED-IV data to a 3d numpy array or a memory mapped view.
 
         Emit the numpy array as a custom SIGNAL to be retrieved in please.py
         :return: None
@@ -163,14 +329,32 @@ class WorkerThread(QtCore.QThread):
         if 'byte' not in self.params.keys():
             self.params['byte'] = 'L'  # default to Little Endian
 
+        if 'mmap' not in self.params.keys():
+            self.params['mmap'] = False  # default to reading the full stack into memory
+
+        if 'workers' not in self.params.keys():
+            self.params['workers'] = None  # default to ThreadPoolExecutor's choice of pool size
+
         # load raw data
+        # when memory mapping, a lazily indexed view of the files is emitted rather than a numpy array
+        # when streaming, the array is emitted by the callback before it is filled
+        if self.params['mmap'] and self.isReduced():
+            # memory mapped files can not be cropped or binned; read the reduced data instead
+            print('Crop, Binning, and Energy Stride settings override Memory Map; reading data into memory')
+            self.params['mmap'] = False
+        if self.params['mmap']:
+            loader = LF.map_LEEM_Data
+        else:
+            loader = functools.partial(LF.process_LEEM_Data, workers=self.params['workers'],
+                                       callback=self.getLoadCallback(), cancelled=self.isCancelled,
+                                       **self.getReduction())
         dat_3d = None
         try:
-            dat_3d = LF.process_LEEM_Data(dirname=self.params['path'],
-                                          ht=self.params['imht'],
-                                          wd=self.params['imwd'],
-                                          bits=self.params['bits'],
-                                          byte=self.params['byte'])
+            dat_3d = loader(dirname=self.params['path'],
+                            ht=self.params['imht'],
+                            wd=self.params['imwd'],
+                            bits=self.params['bits'],
+                            byte=self.params['byte'])
         except IOError as e:
             print("Error Loading LEED Data:")
             print(e)
@@ -178,11 +362,17 @@ class WorkerThread(QtCore.QThread):
             print("Please re-check the settings in your YAML experiment config file.")
             print("Ensure that the path setting points to the correct directory.")
             return
+        except LF.InvalidParameterError as e:
+            print(e)
+            return
+        except LF.TaskCancelled as e:
+            print(e)
+            return
         if dat_3d is None:
             self.quit()
             self.exit()
         else:
-            self.outputSIGNAL.emit(dat_3d)  # type: np.ndarray
+            self.emitLoadedData(dat_3d)
 
     def load_LEED_Images(self):
         """Load LEED data from image files.
@@ -209,7 +399,10 @@ class WorkerThread(QtCore.QThread):
         """
         data = None
         try:
-            data = LF.get_img_array(self.params['path'], ext=self.params['ext'], swap=False)
+            data = LF.get_img_array(self.params['path'], ext=self.params['ext'], swap=False,
+                                    workers=self.params.get('workers'),
+                                    callback=self.getLoadCallback(), cancelled=self.isCancelled,
+                                    **self.getReduction())
         except IOError as e:
             print("Error Loading LEED Images:")
             print(e)
@@ -217,14 +410,20 @@ class WorkerThread(QtCore.QThread):
             print("Please re-check the settings in your YAML experiment config file.")
             print("Ensure that the path setting points to the correct directory.")
             return
+        except LF.InvalidParameterError as e:
+            print(e)
+            return
+        except LF.TaskCancelled as e:
+            print(e)
+            return
         if data is None:
             self.quit()
             self.exit()
         else:
-            self.outputSIGNAL.emit(data)  # type: np.ndarray
+            self.emitLoadedData(data)
 
     def load_LEEM(self):
-        """Load raw binary LEEM-IV data to a 3d numpy array.
+        """Load raw binary LEEM-IV data to a 3d numpy array or a memory mapped view.
 
         Emit the numpy array as a custom SIGNAL to be retrieved in gui.py
         :return: None
@@ -246,14 +445,32 @@ class WorkerThread(QtCore.QThread):
         if 'byte' not in self.params.keys():
             self.params['byte'] = 'L'  # default to Little Endian
 
+        if 'mmap' not in self.params.keys():
+            self.params['mmap'] = False  # default to reading the full stack into memory
+
+        if 'workers' not in self.params.keys():
+            self.params['workers'] = None  # default to ThreadPoolExecutor's choice of pool size
+
         # load raw data
+        # when memory mapping, a lazily indexed view of the files is emitted rather than a numpy array
+        # when streaming, the array is emitted by the callback before it is filled
+        if self.params['mmap'] and self.isReduced():
+            # memory mapped files can not be cropped or binned; read the reduced data instead
+            print('Crop, Binning, and Energy Stride settings override Memory Map; reading data into memory')
+            self.params['mmap'] = False
+        if self.params['mmap']:
+            loader = LF.map_LEEM_Data
+        else:
+            loader = functools.partial(LF.process_LEEM_Data, workers=self.params['workers'],
+                                       callback=self.getLoadCallback(), cancelled=self.isCancelled,
+                                       **self.getReduction())
         dat_3d = None
         try:
-            dat_3d = LF.process_LEEM_Data(dirname=self.params['path'],
-                                          ht=self.params['imht'],
-                                          wd=self.params['imwd'],
-                                          bits=self.params['bits'],
-                                          byte=self.params['byte'])
+            dat_3d = loader(dirname=self.params['path'],
+                            ht=self.params['imht'],
+                            wd=self.params['imwd'],
+                            bits=self.params['bits'],
+                            byte=self.params['byte'])
         except IOError as e:
             print("Error Loading LEEM Data:")
             print(e)
@@ -263,14 +480,17 @@ class WorkerThread(QtCore.QThread):
             return
 
         except LF.InvalidParameterError as e:
-            print(e.message)
+            print(e)
+            return
+        except LF.TaskCancelled as e:
+            print(e)
             return
 
         if dat_3d is None:
             self.quit()
             self.exit()
         else:
-            self.outputSIGNAL.emit(dat_3d)  # type: np.ndarray
+            self.emitLoadedData(dat_3d)
 
     def load_LEEM_Images(self):
         """Load LEEM data from image files.
@@ -286,7 +506,10 @@ class WorkerThread(QtCore.QThread):
         data = None
         try:
             data = LF.get_img_array(self.params['path'],
-                                    ext=self.params['ext'])
+                                    ext=self.params['ext'],
+                                    workers=self.params.get('workers'),
+                                    callback=self.getLoadCallback(), cancelled=self.isCancelled,
+                                    **self.getReduction())
         except IOError as e:
             print("Error Loading LEEM Experiment:")
             print(e)
@@ -294,6 +517,12 @@ class WorkerThread(QtCore.QThread):
             print("Please re-check the settings in your YAML experiment config file.")
             print("Ensure that the path setting points to the correct directory.")
             return
+        except LF.InvalidParameterError as e:
+            print(e)
+            return
+        except LF.TaskCancelled as e:
+            print(e)
+            return
         except ValueError as e:
             print(e)
             print('Error occurred while loading LEEM data from images using a QThread')
@@ -303,7 +532,7 @@ class WorkerThread(QtCore.QThread):
             self.quit()
             self.exit()
         else:
-            self.outputSIGNAL.emit(data)  # type: np.ndarray
+            self.emitLoadedData(data)
 
     def output_to_Text(self):
         """Output LEEM or LEED I(V) data to tab delimited text file.
@@ -321,18 +550,87 @@ class WorkerThread(QtCore.QThread):
             for index, item in enumerate(elist):
                 f.write(str(item) + '\t' + str(ilist[index]) + '\n')
 
+    def output_IV(self):
+        """Output a set of I(V) curves in a single pass, emitting progressSIGNAL as curves are written.
+
+        :return: None
+        """
+        # requires params: name, elist, curves, names
+        for key in ('name', 'elist', 'curves', 'names'):
+            if key not in self.params.keys():
+                print('Terminating - ERROR: incorrect parameters for OUTPUT_IV task')
+                print('Required Parameters: name, elist, curves, names')
+                return
+        fmt = self.params.get('format', 'tsv')
+        print('Writing {0} I(V) curve(s) to {1} as {2} ...'.format(len(self.params['names']), self.params['name'], fmt))
+        try:
+            ivoutput.write_iv(self.params['name'], self.params['elist'], self.params['curves'],
+                              self.params['names'], fmt=fmt, suffixes=self.params.get('suffixes'),
+                              callback=self.reportOutputProgress)
+        except LF.TaskCancelled:
+            print("I(V) output cancelled.")
+        except (OSError, ImportError, ValueError) as e:
+            print("Error writing I(V) output:")
+            print(e)
+
+    def reportOutputProgress(self, done, total):
+        """Emit progressSIGNAL as I(V) curves are written, stopping the output once cancel() is called."""
+        self.progressSIGNAL.emit(done, total)
+        if done < total and self.isCancelled():
+            raise LF.TaskCancelled
+
     def smooth(self):
-        """Smooth 3D numpy array along the vertical (energy) axis.
+        """Smooth 3D numpy array along the vertical (energy) axis in the process pool.
 
-        Note- This is a long running task.
+        The smoothed array is single precision, halving the memory it holds.
+        Note- This is a long running task. progressSIGNAL reports the number of image rows smoothed.
         """
         if 'data' not in self.params.keys():
             print('Terminating - ERROR: incorrect parameters for smooth task')
             print('Required Parameters: data - 3d numpy array')
             return
-        smth = np.apply_along_axis(LF.smooth, 2, self.params['data'], window_len=10, window_type='flat')
-        # self.emit(QtCore.SIGNAL('output(PyQt_PyObject)'), smth)
-        self.outputSIGNAL.emit(smth)  # type: np.ndarray
+        try:
+            smth = taskpool.smooth_cube(self.params['data'],
+                                        window_len=self.params.get('window_len', 10),
+                                        window_type=self.params.get('window_type', 'flat'),
+                                        workers=self.params.get('processes'),
+                                        cancelled=self.isCancelled,
+                                        callback=self.progressSIGNAL.emit,
+                                        dtype='float32')
+        except taskpool.TaskCancelled:
+            return
+        except OSError as e:
+            print("Error smoothing data in worker processes:")
+            print(e)
+            return
+        if smth is not None:
+            self.outputSIGNAL.emit(smth)  # type: np.ndarray
+
+    def arrange_Data(self):
+        """Build the requested storage layout of a DataStack already on display and emit it by arrangedSIGNAL."""
+        if 'data' not in self.params.keys():
+            print('Terminating - ERROR: incorrect parameters for arrange task')
+            print('Required Parameters: data - datastack.DataStack')
+            return
+        try:
+            stack = self.params['data'].arranged()
+        except MemoryError:
+            print("Error: Not enough memory to store the data in the {} layout; "
+                  "keeping the spectrum layout.".format(self.params['data'].layout))
+            return
+        if stack is not self.params['data'] and not self.isCancelled():
+            self.arrangedSIGNAL.emit(stack)
+
+    def build_Table(self):
+        """Build a summed-area table so that later window I(V) extraction can use it."""
+        if 'table' not in self.params.keys():
+            print('Terminating - ERROR: incorrect parameters for build table task')
+            print('Required Parameters: table - integral.SummedAreaTable')
+            return
+        try:
+            self.params['table'].build(cancelled=self.isCancelled)
+        except MemoryError:
+            print("Error: Not enough memory to speed up window I(V) extraction; windows are summed directly.")
 
     def gen_Dat_Files(self):
         """Generate raw .dat files from LEEM or LEED image files.
@@ -365,20 +663,49 @@ class WorkerThread(QtCore.QThread):
         elif bits == 8 or bits == 1:
             bytes_per_pixel = 1
 
-        for file in files:
-            with open(os.path.join(indir, file), 'rb') as infile:
-                header = len(infile.read()) - bytes_per_pixel * w * h
-                infile.seek(0)
-                fmtstr = byte_order + 'u' + str(bytes_per_pixel)
-                data = np.fromstring(infile.read()[header:], fmtstr).reshape((h, w))
-                with open(os.path.join(outdir, file.split('.')[0]+'.dat'), 'wb') as outfile:
-                    data.tofile(outfile)
+        fmtstr = LF.get_format_string(8 * bytes_per_pixel, byte_order)
+        if fmtstr is None:
+            print("Error: Unknown byte order {} in call to gen_Dat_Files() ...".format(byte_order))
+            return
+        try:
+            taskpool.convert_dat_files([os.path.join(indir, file) for file in files], outdir, h, w, fmtstr,
+                                       workers=self.params.get('processes'),
+                                       cancelled=self.isCancelled,
+                                       callback=self.progressSIGNAL.emit)
+        except taskpool.TaskCancelled:
+            return
+        except (OSError, LF.InvalidParameterError) as e:
+            print("Error generating .dat files:")
+            print(e)
+            return
         self.done.emit()
 
+    def write_Cache(self):
+        """Write a loaded data set to the persistent cube cache."""
+        reqs = ['path', 'data', 'signature']
+        for req in reqs:
+            if req not in self.params.keys():
+                print("Error: Required Parameter {} is missing from call to write_Cache() ...".format(req))
+                return
+        print("Writing data cache for {} ...".format(self.params['path']))
+        try:
+            cache_dir = cubecache.write_cube_cache(self.params['path'],
+                                                   self.params['data'],
+                                                   self.params['signature'],
+                                                   elist=self.params.get('elist'))
+        except OSError as e:
+            print("Error writing data cache:")
+            print(e)
+            return
+        if cache_dir is None:
+            print("Data set is larger than the cache size limit; it was not cached.")
+            return
+        print("Data cache written to {}".format(cache_dir))
+
     def outputConfigInfo(self):
         """Write settings for USER runtime environment to file."""
         # no parameter requirements
-        output_environment_config()
+        configinfo.output_environment_config()
 
     def createYAML(self):
         """Write User settings to .yaml file with appropriate format."""
@@ -391,3 +718,50 @@ class WorkerThread(QtCore.QThread):
         Experiment.toFile(settings)
         self.yamlFileOutput.emit(True)
         return
+
+
+class WatchThread(QtCore.QThread):
+    """Thread which polls a data directory and reads each new image once its file is completely written."""
+
+    frameReady = QtCore.pyqtSignal(object)  # 2d numpy array of the newest image
+
+    def __init__(self, poller, read_frame, interval=POLL_INTERVAL):
+        """Setup the watch; the directory is not polled until the thread is started.
+
+        :param poller: watchfolder.FolderPoller for the data directory
+        :param read_frame: callable taking a string path and returning a 2d numpy array
+        :param interval: float seconds between polls
+        """
+        super(WatchThread, self).__init__()
+        self.poller = poller
+        self.read_frame = read_frame
+        self.interval = interval
+        # set here rather than in run() so that stop() called before the thread is scheduled is not undone
+        self._running = True
+
+    def stop(self):
+        """Stop watching after the current poll; call wait() to block until the thread has finished."""
+        self._running = False
+
+    def run(self):
+        """Poll the directory, emitting frameReady for each new image in order, until stop() is called."""
+        print("Watching {} for new data files ...".format(self.poller.path))
+        while self._running:
+            try:
+                paths = self.poller.poll()
+            except OSError as e:
+                print("Error watching data directory:")
+                print(e)
+                return
+            for path in paths:
+                if not self._running:
+                    return
+                try:
+                    frame = self.read_frame(path)
+                except (IOError, ValueError, LF.InvalidParameterError) as e:
+                    # skipping the file would shift every later image to the wrong energy
+                    print("Error reading {}; stopped watching for new data files.".format(path))
+                    print(e)
+                    return
+                self.frameReady.emit(frame)
+            self.msleep(int(1000 * self.interval))
@@ -0,0 +1,73 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Coalescing of rapid requests such as mouse movement.
+
+Qt can deliver mouse move events several hundred times per second, far more
+often than the screen is redrawn, so redrawing the hover I(V) plot for every
+event only builds a backlog. A Coalescer calls its slot at most rate times
+per second:
+    a request arriving after a quiet period is handled straight away, so a
+        single movement is shown without delay,
+    requests arriving sooner replace one another, and only the latest is
+        handled once the interval since the previous call has passed.
+The final request of a burst is therefore never dropped.
+"""
+
+import math
+import time
+
+from PyQt5 import QtCore
+
+DISPLAY_RATE = 60  # default maximum number of calls per second, matching a typical display refresh rate
+
+
+class Coalescer(QtCore.QObject):
+    """Call a slot with the latest requested arguments at most rate times per second."""
+
+    def __init__(self, slot, rate=DISPLAY_RATE, parent=None):
+        """Create an idle coalescer.
+
+        :param slot: callable receiving the arguments passed to request()
+        :param rate: maximum number of calls of slot per second
+        :param parent: optional QObject owning the coalescer
+        """
+        super(Coalescer, self).__init__(parent)
+        self.slot = slot
+        self.interval = 1.0 / rate
+        self.pending = None  # arguments of the latest request not yet handled
+        self.last = -math.inf  # time.perf_counter() of the latest call of slot
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.timeout.connect(self.flush)
+
+    def request(self, *args):
+        """Ask for slot(*args) to be called, replacing any request still waiting."""
+        self.pending = args
+        if self.timer.isActive():
+            return
+        wait = self.last + self.interval - time.perf_counter()
+        if wait <= 0:
+            self.flush()
+        else:
+            self.timer.start(int(math.ceil(1000 * wait)))
+
+    def flush(self):
+        """Call slot with the arguments of the waiting request straight away, if there is one."""
+        self.timer.stop()
+        args, self.pending = self.pending, None
+        if args is None:
+            return
+        self.last = time.perf_counter()
+        self.slot(*args)
+
+    def cancel(self):
+        """Discard the waiting request, if any, without calling slot."""
+        self.timer.stop()
+        self.pending = None
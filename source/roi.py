@@ -0,0 +1,211 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Regions of interest (ROIs) and batched I(V) extraction.
+
+Every I(V) curve in PLEASE is the average intensity within some region of
+each image: a rectangular LEEM window, a square LEED beam or background box,
+or an arbitrary shape. This module describes those regions and extracts the
+I(V) curves for any number of them at once with extract_iv(), which returns
+an (n_roi, n_energy) array.
+
+All coordinates are array coordinates: rows index the first axis of the data
+and columns the second. Each curve is the sum of the pixels inside the
+region divided by the number of pixels inside the region (after clipping to
+the image), so windows of any size are normalized consistently.
+"""
+
+import numpy as np
+
+import integral
+
+
+class RectROI(object):
+    """Rectangular region spanning rows [row0, row1) and columns [col0, col1)."""
+
+    def __init__(self, row0, col0, row1, col1):
+        """Store the rectangle bounds; stop values are excluded as in slicing."""
+        self.row0 = int(row0)
+        self.col0 = int(col0)
+        self.row1 = int(row1)
+        self.col1 = int(col1)
+
+    @classmethod
+    def from_center(cls, x, y, rad):
+        """Square box of side 2*rad + 1 centered on pixel (x, y), as used for LEED beam and background windows."""
+        x, y, rad = int(x), int(y), int(rad)
+        return cls(y - rad, x - rad, y + rad + 1, x + rad + 1)
+
+    @classmethod
+    def from_corners(cls, topleft, bottomright):
+        """Rectangle including both (x, y) corner pixels, as drawn by clicking two points on the LEEM image."""
+        return cls(topleft[1], topleft[0], bottomright[1] + 1, bottomright[0] + 1)
+
+    def bounds(self, shape):
+        """Return (row0, col0, row1, col1) clipped to an image of the given shape."""
+        return tuple(integral.clip_rects([(self.row0, self.col0, self.row1, self.col1)], shape)[0])
+
+    def mask(self, shape):
+        """Return a boolean mask of the pixels in the region within its clipped bounds."""
+        r0, c0, r1, c1 = self.bounds(shape)
+        return np.ones((r1 - r0, c1 - c0), dtype=bool)
+
+
+class CircleROI(object):
+    """Circular region containing every pixel whose center lies within rad of (x, y)."""
+
+    def __init__(self, x, y, rad):
+        """Store the circle center (column x, row y) and radius in pixels."""
+        self.x = float(x)
+        self.y = float(y)
+        self.rad = float(rad)
+
+    def bounds(self, shape):
+        """Return (row0, col0, row1, col1) of the bounding box clipped to an image of the given shape."""
+        rect = (np.floor(self.y - self.rad), np.floor(self.x - self.rad),
+                np.ceil(self.y + self.rad) + 1, np.ceil(self.x + self.rad) + 1)
+        return tuple(integral.clip_rects([rect], shape)[0])
+
+    def mask(self, shape):
+        """Return a boolean mask of the pixels in the region within its clipped bounds."""
+        r0, c0, r1, c1 = self.bounds(shape)
+        rows, cols = np.ogrid[r0:r1, c0:c1]
+        return (rows - self.y)**2 + (cols - self.x)**2 <= self.rad**2
+
+
+class PolygonROI(object):
+    """Polygonal region containing every pixel whose center lies inside the polygon (even-odd rule)."""
+
+    def __init__(self, vertices):
+        """Store the polygon vertices as a sequence of (x, y) points."""
+        self.vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+
+    def bounds(self, shape):
+        """Return (row0, col0, row1, col1) of the bounding box clipped to an image of the given shape."""
+        xs, ys = self.vertices[:, 0], self.vertices[:, 1]
+        rect = (np.floor(ys.min()), np.floor(xs.min()), np.ceil(ys.max()) + 1, np.ceil(xs.max()) + 1)
+        return tuple(integral.clip_rects([rect], shape)[0])
+
+    def mask(self, shape):
+        """Return a boolean mask of the pixels in the region within its clipped bounds."""
+        r0, c0, r1, c1 = self.bounds(shape)
+        rows, cols = np.mgrid[r0:r1, c0:c1]
+        inside = np.zeros(rows.shape, dtype=bool)
+        xs, ys = self.vertices[:, 0], self.vertices[:, 1]
+        # cast a ray in the +x direction from each pixel center and count edge crossings
+        for xa, ya, xb, yb in zip(xs, ys, np.roll(xs, -1), np.roll(ys, -1)):
+            if ya == yb:
+                continue
+            crosses = (ya > rows) != (yb > rows)
+            xcross = xa + (rows - ya) * (xb - xa) / (yb - ya)
+            inside ^= crosses & (cols < xcross)
+        return inside
+
+
+class MaskROI(object):
+    """Arbitrary region given by a boolean mask with the same height and width as the data."""
+
+    def __init__(self, mask):
+        """Store the full image mask."""
+        self.full_mask = np.asarray(mask, dtype=bool)
+
+    def bounds(self, shape):
+        """Return (row0, col0, row1, col1) of the bounding box of the mask."""
+        rows = np.flatnonzero(self.full_mask.any(axis=1))
+        cols = np.flatnonzero(self.full_mask.any(axis=0))
+        if rows.size == 0:
+            return (0, 0, 0, 0)
+        return (rows[0], cols[0], rows[-1] + 1, cols[-1] + 1)
+
+    def mask(self, shape):
+        """Return the mask within its bounds."""
+        r0, c0, r1, c1 = self.bounds(shape)
+        return self.full_mask[r0:r1, c0:c1]
+
+
+def pixel_indices(rois, shape):
+    """Flatten the pixels in each ROI into one index array into an image of the given shape.
+
+    :param rois: sequence of ROI objects
+    :param shape: tuple (height, width, ...) of the data
+    :return: tuple (indices, offsets) where the pixels of roi k are indices[offsets[k]:offsets[k+1]]
+    """
+    indices = []
+    offsets = [0]
+    for roi in rois:
+        r0, c0, r1, c1 = roi.bounds(shape)
+        rows, cols = np.nonzero(roi.mask(shape))
+        indices.append((rows + r0) * shape[1] + (cols + c0))
+        offsets.append(offsets[-1] + len(indices[-1]))
+    indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.intp)
+    return indices.astype(np.intp), np.array(offsets, dtype=np.intp)
+
+
+def pixel_counts(rois, shape):
+    """Return the number of pixels inside each ROI after clipping to an image of the given shape."""
+    return np.array([np.count_nonzero(roi.mask(shape)) for roi in rois], dtype=np.intp)
+
+
+def roi_sums(data, rois, table=None, block_size=2**24):
+    """Sum the pixels inside each ROI for every image.
+
+    Rectangles are summed with the summed-area table when one is given. All other
+    ROIs are gathered together with a single fancy index per block of images. Only
+    the bounding box of these ROIs is read from each image, so the memory used
+    scales with the size of the ROIs rather than the size of the images.
+
+    :param data: 3d numpy array or datastack.MemmapStack (height, width, image number)
+    :param rois: sequence of ROI objects
+    :param table: optional integral.SummedAreaTable for data
+    :param block_size: approximate number of gathered elements held in memory at once
+    :return: (n_roi, n_image) float numpy array
+    """
+    ht, wd, nimg = data.shape
+    sums = np.zeros((len(rois), nimg))
+    if table is not None:
+        rects = [k for k, roi in enumerate(rois) if isinstance(roi, RectROI)]
+    else:
+        rects = []
+    if rects:
+        sums[rects] = table.sums([rois[k].bounds(data.shape) for k in rects])
+    others = sorted(set(range(len(rois))) - set(rects))
+    if not others:
+        return sums
+
+    indices, offsets = pixel_indices([rois[k] for k in others], data.shape)
+    if not len(indices):
+        return sums
+    # index the pixels within the bounding box of every gathered ROI
+    rows, cols = np.divmod(indices, wd)
+    r0, c0, r1, c1 = rows.min(), cols.min(), rows.max() + 1, cols.max() + 1
+    indices = (rows - r0) * (c1 - c0) + (cols - c0)
+    boxsize = (r1 - r0) * (c1 - c0)
+    step = max(1, block_size // max(boxsize, len(indices)))
+    for start in range(0, nimg, step):
+        stop = min(start + step, nimg)
+        block = np.asarray(data[r0:r1, c0:c1, start:stop]).reshape(boxsize, stop - start)
+        # prefix sums over the gathered pixels give every ROI total by a difference of two rows
+        gathered = np.zeros((len(indices) + 1, stop - start))
+        np.cumsum(block[indices], axis=0, out=gathered[1:])
+        sums[others, start:stop] = gathered[offsets[1:]] - gathered[offsets[:-1]]
+    return sums
+
+
+def extract_iv(data, rois, table=None, block_size=2**24):
+    """Extract the average intensity inside each ROI for every image.
+
+    :param data: 3d numpy array or datastack.MemmapStack (height, width, image number)
+    :param rois: sequence of ROI objects
+    :param table: optional integral.SummedAreaTable for data used for rectangular ROIs
+    :param block_size: approximate number of gathered elements held in memory at once
+    :return: (n_roi, n_image) float numpy array; ROIs entirely outside the image give NaN
+    """
+    sums = roi_sums(data, rois, table=table, block_size=block_size)
+    counts = pixel_counts(rois, data.shape).astype(float)
+    counts[counts == 0] = np.nan
+    return sums / counts.reshape(-1, 1)
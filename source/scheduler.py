@@ -0,0 +1,230 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Prioritized scheduling of WorkerThread tasks.
+
+Every WorkerThread started by the Viewer is wrapped in a Task and submitted
+to a single TaskScheduler, which
+    starts tasks in priority order: interactive work the user is waiting on
+        (loading data) before background smoothing before exports (I(V)
+        output and cube cache writes),
+    runs at most max_background background and export tasks at a time;
+        interactive tasks always start straight away,
+    coalesces duplicate requests: submitting a task with the same key as a
+        queued or running task cancels the older task, so for example only
+        the latest of several smoothing setting changes is computed and a
+        new load supersedes one still in progress,
+    reports the state and progress of every task through Qt signals.
+
+Cancelling a running task asks its thread to stop via WorkerThread.cancel().
+Signals connected with Task.connect() and the Task.finished signal are never
+delivered for a cancelled task, so a superseded task can not overwrite the
+results of the task which replaced it.
+"""
+
+import itertools
+
+from PyQt5 import QtCore
+
+INTERACTIVE = 0
+BACKGROUND = 1
+EXPORT = 2
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background', EXPORT: 'export'}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+CANCELLED = 'cancelled'
+
+
+class Task(QtCore.QObject):
+    """A WorkerThread along with its priority, coalescing key, state, and progress."""
+
+    stateChanged = QtCore.pyqtSignal(str)  # new state
+    progressChanged = QtCore.pyqtSignal(int, int)  # (items completed, total items)
+    finished = QtCore.pyqtSignal()  # the thread finished without being cancelled
+
+    def __init__(self, thread, name, priority=BACKGROUND, key=None):
+        """Wrap a thread which has not been started.
+
+        :param thread: qthreads.WorkerThread
+        :param name: string description shown in the status bar, e.g. "Loading LEEM data"
+        :param priority: INTERACTIVE, BACKGROUND, or EXPORT
+        :param key: optional hashable value; a newer task with the same key cancels this one
+        """
+        super(Task, self).__init__()
+        self.thread = thread
+        self.name = name
+        self.priority = priority
+        self.key = key
+        self.state = QUEUED
+        self.progress = (0, 0)
+        self.order = 0  # submission order, set by the scheduler
+        thread.progressSIGNAL.connect(self.setProgress)
+
+    def __repr__(self):
+        """."""
+        return "<Task {0!r} {1} {2}>".format(self.name, PRIORITY_NAMES.get(self.priority), self.state)
+
+    @property
+    def cancelled(self):
+        """True once the task has been cancelled."""
+        return self.state == CANCELLED
+
+    def isActive(self):
+        """Return True if the task is queued or running."""
+        return self.state in (QUEUED, RUNNING)
+
+    def connect(self, signal, slot):
+        """Connect a signal of the thread to a slot which is not called once the task is cancelled.
+
+        :param signal: bound pyqtSignal of self.thread
+        :param slot: callable
+        """
+        def guarded(*args):
+            if not self.cancelled:
+                slot(*args)
+        signal.connect(guarded)
+
+    @QtCore.pyqtSlot(int, int)
+    def setProgress(self, done, total):
+        """Store and forward progress reported by the thread."""
+        self.progress = (done, total)
+        self.progressChanged.emit(done, total)
+
+    def setState(self, state):
+        """Update the state and emit stateChanged."""
+        if state != self.state:
+            self.state = state
+            self.stateChanged.emit(state)
+
+    def cancel(self):
+        """Stop the task; a queued task is never started and a running one is asked to stop."""
+        if not self.isActive():
+            return
+        if self.state == RUNNING:
+            self.thread.cancel()
+        self.setState(CANCELLED)
+
+
+class TaskScheduler(QtCore.QObject):
+    """Start Tasks in priority order with bounded concurrency, coalescing duplicates by key."""
+
+    tasksChanged = QtCore.pyqtSignal()  # a task was submitted, started, finished, cancelled, or made progress
+    statusChanged = QtCore.pyqtSignal(str)  # one line summary of the active tasks
+
+    def __init__(self, max_background=2, parent=None):
+        """Create an idle scheduler.
+
+        :param max_background: integer number of background and export tasks run at the same time
+        :param parent: optional QObject parent
+        """
+        super(TaskScheduler, self).__init__(parent)
+        self.max_background = max_background
+        self._queued = []
+        self._running = []  # includes cancelled tasks whose threads are still stopping
+        self._counter = itertools.count()
+
+    def submit(self, task):
+        """Queue a task, cancelling any active task with the same key, and start it if a slot is free.
+
+        :param task: Task wrapping a thread which has not been started
+        :return: task
+        """
+        if task.key is not None:
+            self.cancel(key=task.key)
+        task.order = next(self._counter)
+        task.progressChanged.connect(self._progress)
+        self._queued.append(task)
+        self._queued.sort(key=lambda t: (t.priority, t.order))
+        self._start_next()
+        self._changed()
+        return task
+
+    def cancel(self, key=None, priority=None):
+        """Cancel active tasks.
+
+        :param key: cancel only tasks with this key; default any key
+        :param priority: cancel only tasks with this priority; default any priority
+        :return: number of tasks cancelled
+        """
+        cancelled = 0
+        for task in self.tasks():
+            if (key is None or task.key == key) and (priority is None or task.priority == priority):
+                task.cancel()
+                cancelled += 1
+        if cancelled:
+            self._queued = [task for task in self._queued if task.isActive()]
+            self._changed()
+        return cancelled
+
+    def cancel_all(self):
+        """Cancel every queued and running task."""
+        return self.cancel()
+
+    def tasks(self):
+        """Get the queued and running tasks which have not been cancelled, in priority order."""
+        active = [task for task in self._running + self._queued if task.isActive()]
+        return sorted(active, key=lambda t: (t.state != RUNNING, t.priority, t.order))
+
+    def isIdle(self):
+        """Return True if no thread is running and nothing is queued."""
+        return not self._running and not self._queued
+
+    def status(self):
+        """Summarize the active tasks on one line, e.g. "Loading LEEM data 40%; 1 queued"."""
+        tasks = self.tasks()
+        running = [task for task in tasks if task.state == RUNNING]
+        parts = []
+        for task in running:
+            done, total = task.progress
+            parts.append("{0} {1:.0%}".format(task.name, done / total) if total else task.name)
+        queued = len(tasks) - len(running)
+        if queued:
+            parts.append("{} queued".format(queued))
+        return "; ".join(parts)
+
+    def wait(self):
+        """Block until every running thread has finished; queued tasks are not started."""
+        for task in list(self._running):
+            task.thread.wait()
+        QtCore.QCoreApplication.processEvents()  # deliver queued finished signals
+
+    def _start_next(self):
+        """Start queued tasks in priority order while slots are free."""
+        background = sum(1 for task in self._running if task.priority != INTERACTIVE)
+        for task in list(self._queued):
+            if task.priority != INTERACTIVE:
+                if background >= self.max_background:
+                    continue
+                background += 1
+            self._queued.remove(task)
+            self._running.append(task)
+            task.thread.finished.connect(lambda task=task: self._finished(task))
+            task.setState(RUNNING)
+            task.thread.start()
+
+    def _finished(self, task):
+        """Remove a task whose thread has finished and start the next queued tasks."""
+        if task in self._running:
+            self._running.remove(task)
+        if task.state == RUNNING:
+            task.setState(FINISHED)
+            task.finished.emit()
+        self._start_next()
+        self._changed()
+
+    @QtCore.pyqtSlot(int, int)
+    def _progress(self, done, total):
+        """Forward progress of any task as a status change."""
+        self._changed()
+
+    def _changed(self):
+        """Emit tasksChanged and statusChanged."""
+        self.tasksChanged.emit()
+        self.statusChanged.emit(self.status())
@@ -0,0 +1,222 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Store of smoothed I(V) curves.
+
+While smoothing is enabled, the I(V) curve of each LEEM pixel under the mouse
+is smoothed the first time it is needed and kept in a SpectrumStore, so moving
+back over a pixel does not smooth it again. Curves are kept in a bounded least
+recently used cache keyed by pixel, so the memory used grows with the number
+of pixels visited rather than with the size of the data set, and a bit-packed
+mask records which pixels have a stored curve.
+
+When the smoothed curves of the whole data set fit within max_total_bytes,
+the data set is smoothed in the background (see
+Viewer.smooth_LEEM_in_background()) and the resulting array is stored with
+fill(), making every pixel available without further smoothing. Larger data
+sets are only ever smoothed a pixel at a time. Curves are stored in single
+precision.
+
+A SmoothingCache holds a SpectrumStore for each of the most recently used
+smoothing settings, keyed by (window type, window length, data version), so
+switching back to settings used a moment ago shows their curves straight away
+instead of smoothing everything again, and curves smoothed with other settings
+or for a previous data set are never shown.
+"""
+
+import collections
+
+import numpy as np
+
+MAX_BYTES = 2**26  # default upper bound on the memory used by curves smoothed one pixel at a time
+MAX_SETTINGS = 4  # default number of smoothing settings whose curves are kept
+MAX_TOTAL_BYTES = 2**30  # default upper bound on the memory used by the curves of every kept setting
+DTYPE = np.dtype(np.float32)  # numpy dtype of stored curves
+
+
+class SpectrumStore(object):
+    """Bounded LRU store of the smoothed I(V) curves of individual pixels of one data set."""
+
+    def __init__(self, shape, max_bytes=MAX_BYTES):
+        """Create an empty store.
+
+        :param shape: (height, width, image number) of the data set
+        :param max_bytes: approximate upper bound on the memory used by curves stored with put()
+        """
+        self.shape = tuple(shape)
+        self.max_bytes = max_bytes
+        self.full = None  # 3d array of every smoothed curve, once stored with fill()
+        self.mask = np.zeros((self.shape[0], (self.shape[1] + 7) // 8), dtype=np.uint8)  # np.packbits layout
+        self._curves = collections.OrderedDict()  # (row, col) -> 1d array, least recently used first
+        self._nbytes = 0
+
+    def __len__(self):
+        """Number of pixels with a stored curve."""
+        if self.full is not None:
+            return self.shape[0] * self.shape[1]
+        return len(self._curves)
+
+    def __contains__(self, pixel):
+        """True if the curve of pixel (row, col) is stored."""
+        row, col = pixel
+        return bool(self.mask[row, col >> 3] & (0x80 >> (col & 7)))
+
+    @property
+    def nbytes(self):
+        """Memory used by stored curves in bytes."""
+        if self.full is not None:
+            return self.full.nbytes
+        return self._nbytes
+
+    def get(self, row, col):
+        """Get the stored curve of a pixel.
+
+        :param row: integer array row
+        :param col: integer array column
+        :return: 1d numpy array or None if the curve of the pixel is not stored
+        """
+        if self.full is not None:
+            return self.full[row, col, :]
+        curve = self._curves.get((row, col))
+        if curve is not None:
+            self._curves.move_to_end((row, col))
+        return curve
+
+    def put(self, row, col, curve):
+        """Store the smoothed curve of a pixel, evicting the least recently used curves beyond max_bytes.
+
+        :param row: integer array row
+        :param col: integer array column
+        :param curve: 1d array-like
+        """
+        if self.full is not None:
+            return
+        curve = np.asarray(curve, dtype=DTYPE)
+        old = self._curves.pop((row, col), None)
+        if old is not None:
+            self._nbytes -= old.nbytes
+        self._curves[(row, col)] = curve
+        self._nbytes += curve.nbytes
+        self._set(row, col, True)
+        while self._nbytes > self.max_bytes and len(self._curves) > 1:
+            (r, c), evicted = self._curves.popitem(last=False)
+            self._nbytes -= evicted.nbytes
+            self._set(r, c, False)
+
+    def fill(self, data):
+        """Store the smoothed curves of every pixel at once, replacing curves stored with put().
+
+        :param data: 3d numpy array of shape self.shape
+        """
+        if tuple(data.shape) != self.shape:
+            raise ValueError("Smoothed data shape {0} does not match {1}".format(data.shape, self.shape))
+        self._curves.clear()
+        self._nbytes = 0
+        self.full = data
+        self.mask.fill(0xFF)
+
+    def clear(self):
+        """Discard every stored curve, e.g. once the data or smoothing settings change."""
+        self._curves.clear()
+        self._nbytes = 0
+        self.full = None
+        self.mask.fill(0)
+
+    def computed(self):
+        """Get a boolean image which is True for each pixel with a stored curve."""
+        return np.unpackbits(self.mask, axis=1, count=self.shape[1]).astype(bool)
+
+    def _set(self, row, col, value):
+        """Set or clear the mask bit of a pixel."""
+        bit = np.uint8(0x80 >> (col & 7))
+        if value:
+            self.mask[row, col >> 3] |= bit
+        else:
+            self.mask[row, col >> 3] &= ~bit
+
+
+class SmoothingCache(object):
+    """SpectrumStores of one data set for the most recently used smoothing settings."""
+
+    def __init__(self, shape, max_settings=MAX_SETTINGS, max_bytes=MAX_BYTES, max_total_bytes=MAX_TOTAL_BYTES):
+        """Create an empty cache.
+
+        :param shape: (height, width, image number) of the data set
+        :param max_settings: number of smoothing settings whose curves are kept
+        :param max_bytes: max_bytes of each SpectrumStore
+        :param max_total_bytes: approximate upper bound on the memory used by every store together;
+                                the store in use is kept even if it alone exceeds the bound
+        """
+        self.shape = tuple(shape)
+        self.max_settings = max_settings
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+        self._stores = collections.OrderedDict()  # (window type, window length, version) -> SpectrumStore
+
+    def __len__(self):
+        """Number of smoothing settings with a store."""
+        return len(self._stores)
+
+    def __contains__(self, key):
+        """True if there is a store for key = (window type, window length, data version)."""
+        return key in self._stores
+
+    @property
+    def nbytes(self):
+        """Memory used by the curves of every store in bytes."""
+        return sum(store.nbytes for store in self._stores.values())
+
+    def get(self, key):
+        """Get the store for key = (window type, window length, data version) without creating it.
+
+        :return: SpectrumStore or None
+        """
+        return self._stores.get(key)
+
+    def store(self, key):
+        """Get the store for key = (window type, window length, data version), creating it if needed.
+
+        Stores for other data versions are discarded, and the least recently used stores are
+        evicted beyond max_settings stores or max_total_bytes.
+        :return: SpectrumStore
+        """
+        store = self._stores.get(key)
+        if store is None:
+            for old in [k for k in self._stores if k[2] != key[2]]:
+                del self._stores[old]
+            store = self._stores[key] = SpectrumStore(self.shape, max_bytes=self.max_bytes)
+            self.trim()
+        else:
+            self._stores.move_to_end(key)
+        return store
+
+    def fits(self):
+        """True if the smoothed curves of every pixel fit within max_total_bytes."""
+        return self.shape[0] * self.shape[1] * self.shape[2] * DTYPE.itemsize <= self.max_total_bytes
+
+    def fill(self, key, data):
+        """Store the smoothed curves of every pixel for key, evicting other stores beyond the size limits.
+
+        Data larger than max_total_bytes is not stored.
+        :param key: (window type, window length, data version) used to smooth data
+        :param data: 3d numpy array of shape self.shape
+        """
+        if data.nbytes > self.max_total_bytes:
+            return
+        self.store(key).fill(data)
+        self.trim()
+
+    def trim(self):
+        """Evict least recently used stores, other than the most recent, beyond the size limits."""
+        while len(self._stores) > 1 and (len(self._stores) > self.max_settings or
+                                         self.nbytes > self.max_total_bytes):
+            self._stores.popitem(last=False)
+
+    def clear(self):
+        """Discard the curves of every setting, e.g. once the data changes without a new version."""
+        self._stores.clear()
@@ -0,0 +1,310 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Process pool for CPU bound work on whole data sets.
+
+A QThread keeps the GUI responsive while it waits on I/O, but pure Python and
+numpy work done on it still competes with the Qt event loop for the GIL. The
+functions here split such work into blocks of image rows and run the blocks
+in a shared pool of worker processes instead, leaving the calling thread (a
+WorkerThread) to do nothing but wait, report progress, and check whether the
+task has been cancelled.
+
+Data is passed to the workers through SharedArray blocks of shared memory
+rather than being pickled: the data set is copied into shared memory once,
+each worker attaches to it by name, and results are written straight into a
+second shared array, which is handed back to the caller without a copy.
+
+Worker processes are started with the 'spawn' method, since forking a process
+which is running Qt threads can deadlock the child. This module does not import
+PyQt, so neither do the workers.
+
+multiprocessing.shared_memory requires Python 3.8 or newer.
+"""
+
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import instrument
+import LEEMFUNCTIONS as LF
+
+MIN_PARALLEL_SIZE = 2**24  # data sets with fewer elements are processed in the calling thread
+POLL_INTERVAL = 0.1  # seconds between checks for cancellation while waiting on workers
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+_futures = weakref.WeakSet()  # blocks submitted to the pool, cancelled by shutdown() if not yet started
+
+TaskCancelled = LF.TaskCancelled  # raised when a task is cancelled before all of its blocks are processed
+
+
+class SharedArray(object):
+    """A numpy array backed by a named block of shared memory which other processes can attach to."""
+
+    def __init__(self, shm, shape, dtype, owner=False):
+        """Use create(), from_array(), or attach() rather than calling this directly."""
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = owner  # only the creating process unlinks the memory
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape, dtype):
+        """Allocate an uninitialized shared array.
+
+        :param shape: tuple of integer dimensions
+        :param dtype: numpy dtype
+        :return: SharedArray
+        """
+        size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        return cls(shared_memory.SharedMemory(create=True, size=size), shape, dtype, owner=True)
+
+    @classmethod
+    def from_array(cls, data, block_rows=256):
+        """Copy a 3d array, DataStack, or MemmapStack into a new shared array a block of rows at a time.
+
+        :param data: array-like with shape and dtype supporting data[start:stop, :, :]
+        :param block_rows: number of image rows copied at a time, bounding the temporary memory
+                           used for lazily read data
+        :return: SharedArray
+        """
+        shared = cls.create(data.shape, data.dtype)
+        try:
+            for start in range(0, data.shape[0], block_rows):
+                shared.array[start:start + block_rows] = data[start:start + block_rows]
+        except BaseException:
+            shared.release()
+            raise
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        """Attach to a shared array created by another process.
+
+        :param spec: tuple from spec()
+        :return: SharedArray
+        """
+        name, shape, dtype = spec
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype)
+
+    def spec(self):
+        """Get the picklable (name, shape, dtype) description passed to worker processes."""
+        return self.shm.name, self.shape, self.dtype.str
+
+    def detach(self):
+        """Hand the array over to the caller in place of a copy, for a shared array this process created.
+
+        The memory is unlinked, so no other process can attach to it, and freed once the returned
+        array and every view of it have been discarded. The SharedArray can not be used afterwards.
+        :return: numpy array backed by the shared memory
+        """
+        array, shm = self.array, self.shm
+        self.array = None
+        if self.owner:
+            shm.unlink()  # the mapping stays valid until it is closed
+        weakref.finalize(array, shm.close)
+        return array
+
+    def release(self):
+        """Close this process's view of the memory, and free it if this process created it."""
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        """."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Release the memory on leaving a with block."""
+        self.release()
+        return False
+
+
+def default_workers():
+    """Get the default number of worker processes: one per core, leaving one for the GUI."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def get_pool(workers=None):
+    """Get the shared process pool, starting it on first use.
+
+    :param workers: integer number of worker processes; default default_workers().
+                    Asking for a different number replaces the pool once it is idle.
+    :return: concurrent.futures.ProcessPoolExecutor
+    """
+    global _pool, _pool_workers
+    workers = workers or default_workers()
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown():
+    """Stop the worker processes, cancelling queued blocks; called when PLEASE exits."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            # shutdown(cancel_futures=True) requires Python 3.9
+            for future in list(_futures):
+                future.cancel()
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def row_blocks(rows, workers, min_blocks_per_worker=4):
+    """Split rows [0, rows) into contiguous blocks, several per worker so progress is reported smoothly.
+
+    :return: list of (start, stop) tuples
+    """
+    nblocks = max(1, min(rows, workers * min_blocks_per_worker))
+    edges = np.linspace(0, rows, nblocks + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def run_blocks(pool, func, blocks, args=(), cancelled=None, callback=None):
+    """Run func(start, stop, *args) for each block in the pool, waiting until every block has finished.
+
+    :param pool: concurrent.futures.Executor
+    :param func: picklable module level function
+    :param blocks: list of (start, stop) tuples
+    :param args: tuple of extra picklable arguments
+    :param cancelled: optional callable returning True once the task should stop
+    :param callback: optional callable invoked as callback(blocks done, total blocks) as blocks finish
+    :raises TaskCancelled: if cancelled() returned True; blocks which had not started are cancelled
+                           and those already running are waited for
+    """
+    pending = {pool.submit(func, start, stop, *args) for start, stop in blocks}
+    _futures.update(pending)
+    done = 0
+    try:
+        while pending:
+            finished, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in finished:
+                future.result()  # re-raise errors from the worker
+            done += len(finished)
+            if finished and callback is not None:
+                callback(done, len(blocks))
+            if pending and cancelled is not None and cancelled():
+                raise TaskCancelled
+    finally:
+        # never free shared memory while a worker may still be writing to it
+        for future in pending:
+            future.cancel()
+        wait(pending)
+
+
+def _smooth_rows(start, stop, src_spec, dst_spec, window_len, window_type):
+    """Worker process: smooth image rows [start, stop) of the shared source array into the shared output."""
+    src = SharedArray.attach(src_spec)
+    dst = SharedArray.attach(dst_spec)
+    try:
+        dst.array[start:stop] = LF.smooth_cube(src.array[start:stop], window_len=window_len,
+                                               window_type=window_type, dtype=dst.dtype)
+    finally:
+        src.release()
+        dst.release()
+    return start, stop
+
+
+@instrument.timed('smooth cube in processes', 'smooth')
+def smooth_cube(data, window_len=10, window_type='flat', workers=None, cancelled=None, callback=None,
+                dtype=np.float64):
+    """Smooth every I(V) curve of a 3d data set in the process pool.
+
+    Produces the same result as LEEMFUNCTIONS.smooth_cube(). Data sets smaller than
+    MIN_PARALLEL_SIZE elements are smoothed in the calling thread, where starting
+    worker processes would cost more than it saves.
+
+    :param data: 3d numpy array, datastack.DataStack, or datastack.MemmapStack (height, width, image number)
+    :param window_len: even integer size of window
+    :param window_type: string for type of window function
+    :param workers: integer number of worker processes; default default_workers()
+    :param cancelled: optional callable returning True once smoothing should stop
+    :param callback: optional callable invoked as callback(rows done, total rows)
+    :param dtype: numpy float dtype of the output; float32 halves the memory used
+    :return: 3d numpy float array, or None if the window settings are invalid
+    :raises TaskCancelled: if cancelled() returned True before smoothing finished
+    """
+    ht = data.shape[0]
+    if int(np.prod(data.shape)) < MIN_PARALLEL_SIZE:
+        def progress(start, stop):
+            if cancelled is not None and cancelled():
+                raise TaskCancelled
+            if callback is not None:
+                callback(stop, ht)
+        return LF.smooth_cube(data, window_len=window_len, window_type=window_type, callback=progress, dtype=dtype)
+
+    # validate the window here so invalid settings are reported once rather than by every worker
+    if LF.smooth_cube(np.zeros((1, 1, data.shape[2])), window_len=window_len, window_type=window_type) is None:
+        return None
+    pool = get_pool(workers)
+    blocks = row_blocks(ht, _pool_workers)
+
+    def report(done, total):
+        if callback is not None:
+            callback(ht * done // total, ht)
+
+    with SharedArray.from_array(data) as src:
+        dst = SharedArray.create(data.shape, dtype)
+        try:
+            run_blocks(pool, _smooth_rows, blocks, args=(src.spec(), dst.spec(), window_len, window_type),
+                       cancelled=cancelled, callback=report)
+        except BaseException:
+            dst.release()
+            raise
+    return dst.detach()
+
+
+def _convert_dat_files(start, stop, paths, outdir, ht, wd, formatstring):
+    """Worker process: strip the headers from raw files [start, stop) of paths and write them to outdir."""
+    for path in paths[start:stop]:
+        frame = LF.read_raw_frame(path, ht, wd, formatstring)
+        name = os.path.splitext(os.path.basename(path))[0] + '.dat'
+        with open(os.path.join(outdir, name), 'wb') as f:
+            frame.tofile(f)
+    return start, stop
+
+
+@instrument.timed('convert dat files', 'write')
+def convert_dat_files(paths, outdir, ht, wd, formatstring, workers=None, cancelled=None, callback=None):
+    """Write the image data of raw files without their headers as .dat files, spread over the process pool.
+
+    :param paths: list of string paths to input files
+    :param outdir: string path to the output directory
+    :param ht: integer pixel height of image
+    :param wd: integer pixel width of image
+    :param formatstring: numpy dtype string such as '<u2'
+    :param workers: integer number of worker processes; default default_workers()
+    :param cancelled: optional callable returning True once conversion should stop
+    :param callback: optional callable invoked as callback(files done, total files)
+    :raises TaskCancelled: if cancelled() returned True before every file was written
+    """
+    pool = get_pool(workers)
+    blocks = row_blocks(len(paths), _pool_workers)
+
+    def report(done, total):
+        if callback is not None:
+            callback(len(paths) * done // total, len(paths))
+
+    run_blocks(pool, _convert_dat_files, blocks, args=(list(paths), outdir, ht, wd, formatstring),
+               cancelled=cancelled, callback=report)
@@ -15,10 +15,30 @@ the unit test ecosystem in python.
 
 """
 import glob
+import json
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 import numpy as np
+import batch
+import bline
+import cubecache
+import datastack
+import framecache
+import instrument
+import integral
+import ivoutput
+import lazyimport
 import LEEMFUNCTIONS as LF
+import pyramid
+import roi
+import smoothcache
+import taskpool
+import watchfolder
 
 from PIL import Image
 
@@ -96,7 +116,6 @@ class TestReadImage(unittest.TestCase):
             self.assertTrue(im.dtype == dtype)
 
     @unittest.skipUnless(tests_complete["test_16bitTiff"], "Skipping incomplete test.")
-    @unittest.expectedFailure
     def test_16bitTiff(self):
         """Test LF.read_img() with 16bit TIFF."""
         dtype = self.dtypes[1]
@@ -104,9 +123,29 @@ class TestReadImage(unittest.TestCase):
         files = glob.glob(os.path.join(self.test_data_path, "*.tif"))
         for fl in files:
             im = LF.read_img(os.path.join(self.test_data_path, fl))
-            # NOTE: This should fail since read_img() uses .convert('L') which downscales to 8-bit
             self.assertTrue(im.dtype == dtype)
 
+    def test_32bit_dtype_from_mode(self):
+        """A 32bit image should be read as int32 whatever its pixel values."""
+        for value in (300, 70000):
+            test_array = np.zeros((16, 16), dtype=np.int32)
+            test_array[-1, -1] = value
+            fl = os.path.join(self.test_data_path, "test_img_int32_{}.tif".format(value))
+            Image.fromarray(test_array).save(fl)
+            im = LF.read_img(fl)
+            self.assertEqual(im.dtype, np.int32)
+            np.testing.assert_array_equal(im, test_array)
+
+    def test_32bit_stack_with_mixed_ranges(self):
+        """Later images of a 32bit stack should not wrap when they hold larger values than the first."""
+        values = [300, 100000, -5]
+        for idx, value in enumerate(values):
+            fl = os.path.join(self.test_data_path, "test_img_{}.tif".format(idx))
+            Image.fromarray(np.full((8, 8), value, dtype=np.int32)).save(fl)
+        dat = LF.get_img_array(self.test_data_path, ext='.tif', workers=2)
+        self.assertEqual(dat.dtype, np.int32)
+        np.testing.assert_array_equal(dat[0, 0, :], values)
+
     @unittest.skipUnless(tests_complete["test_read_images"], "Skipping incomplete test.")
     def test_read_images(self):
         """Use LF.read_img to read the images created by createImage()."""
@@ -130,5 +169,1145 @@ class TestReadImage(unittest.TestCase):
             self.assertTrue(im.dtype == dtype)
 
 
+class TestRawLEEMData(unittest.TestCase):
+    """Test LF.map_LEEM_Data() and LF.process_LEEM_Data() against the raw data written to disk."""
+
+    height, width, nfiles = (24, 32, 5)
+    header = b"HEADER" * 7
+
+    def setUp(self):
+        """Write a small stack of raw .dat files with headers."""
+        self.test_data_path = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        self.expected = rng.randint(0, 65535, size=(self.height, self.width, self.nfiles)).astype('>u2')
+        for idx in range(self.nfiles):
+            with open(os.path.join(self.test_data_path, "img_{:03d}.dat".format(idx)), 'wb') as f:
+                f.write(self.header)
+                f.write(self.expected[:, :, idx].tobytes())
+        # hidden files and other extensions must be ignored
+        with open(os.path.join(self.test_data_path, ".hidden.dat"), 'wb') as f:
+            f.write(b"ignored")
+
+    def tearDown(self):
+        """Remove temp data directory."""
+        shutil.rmtree(self.test_data_path)
+
+    def test_map_matches_file_data(self):
+        """Memory mapped stack should index like the equivalent 3d array."""
+        stack = LF.map_LEEM_Data(self.test_data_path, ht=self.height, wd=self.width, bits=16, byte='B')
+        self.assertEqual(stack.shape, self.expected.shape)
+        self.assertEqual(stack.hdln, len(self.header))
+        np.testing.assert_array_equal(stack[3, 7, :], self.expected[3, 7, :])
+        np.testing.assert_array_equal(stack[::-1, :, 2].T, self.expected[::-1, :, 2].T)
+        np.testing.assert_array_equal(stack[2:9, 4:20, :], self.expected[2:9, 4:20, :])
+        np.testing.assert_array_equal(stack[:, :, 1:4], self.expected[:, :, 1:4])
+        np.testing.assert_array_equal(stack.copy(), self.expected)
+
+    def test_map_is_lazy(self):
+        """No files should be mapped until they are indexed."""
+        stack = LF.map_LEEM_Data(self.test_data_path, ht=self.height, wd=self.width, bits=16, byte='B')
+        self.assertEqual(len(stack._maps), 0)
+        stack[:, :, 0]
+        self.assertEqual(list(stack._maps), [0])
+
+    def test_map_keeps_few_files_open(self):
+        """Reading every file should only keep the most recently used files mapped."""
+        stack = LF.map_LEEM_Data(self.test_data_path, ht=self.height, wd=self.width, bits=16, byte='B')
+        stack.max_open = 2
+        np.testing.assert_array_equal(stack[3, 7, :], self.expected[3, 7, :])
+        self.assertEqual(list(stack._maps), [3, 4])
+        np.testing.assert_array_equal(stack[:, :, 3], self.expected[:, :, 3])
+        np.testing.assert_array_equal(stack[:, :, 0], self.expected[:, :, 0])
+        self.assertEqual(list(stack._maps), [3, 0])
+        self.assertLessEqual(stack.max_open, datastack.MAX_OPEN_MAPS)
+
+    def test_map_raises_for_bad_params(self):
+        """Image parameters larger than the file should raise InvalidParameterError."""
+        with self.assertRaises(LF.InvalidParameterError):
+            LF.map_LEEM_Data(self.test_data_path, ht=10 * self.height, wd=self.width, bits=16, byte='B')
+
+    def test_process_matches_file_data(self):
+        """Parallel reads should fill each slice of the stack with its own file for any worker count."""
+        for workers in (1, 3, None):
+            dat = LF.process_LEEM_Data(self.test_data_path, ht=self.height, wd=self.width, bits=16, byte='B',
+                                       workers=workers)
+            self.assertEqual(dat.dtype, np.dtype('>u2'))
+            np.testing.assert_array_equal(dat, self.expected)
+
+    def test_process_reports_contiguous_progress(self):
+        """The callback should see the allocated array first, then every image in order."""
+        calls = []
+        dat = LF.process_LEEM_Data(self.test_data_path, ht=self.height, wd=self.width, bits=16, byte='B',
+                                   workers=3, callback=lambda arr, stop: calls.append((arr, stop)))
+        self.assertTrue(all(arr is dat for arr, _ in calls))
+        self.assertEqual([stop for _, stop in calls], list(range(self.nfiles + 1)))
+
+    def test_process_raises_for_bad_params(self):
+        """Image parameters larger than the file should raise InvalidParameterError from the worker."""
+        with self.assertRaises(LF.InvalidParameterError):
+            LF.process_LEEM_Data(self.test_data_path, ht=10 * self.height, wd=self.width, bits=16, byte='B')
+
+    def test_process_crops_bins_and_strides(self):
+        """Load-time reduction should match cropping, binning, and slicing the full stack."""
+        # 13 rows and 17 columns trim to 6 x 8 bins of 2 x 2 pixels
+        dat = LF.process_LEEM_Data(self.test_data_path, ht=self.height, wd=self.width, bits=16, byte='B',
+                                   crop=(3, 5, 16, 22), binning=2, stride=2)
+        block = self.expected[3:15, 5:21, ::2].astype(float)
+        expected = np.rint(block.reshape(6, 2, 8, 2, 3).mean(axis=(1, 3)))
+        self.assertEqual(dat.shape, (6, 8, 3))
+        self.assertEqual(dat.dtype, np.dtype('>u2'))
+        np.testing.assert_array_equal(dat, expected)
+
+    def test_crop_bounds(self):
+        """Crop regions should be clipped to the image and trimmed to whole bins."""
+        self.assertEqual(LF.crop_bounds(24, 32), (0, 0, 24, 32))
+        self.assertEqual(LF.crop_bounds(24, 32, (None, 4, 100, None), binning=3), (0, 4, 24, 31))
+        with self.assertRaises(LF.InvalidParameterError):
+            LF.crop_bounds(24, 32, (10, 0, 11, 32), binning=2)
+        with self.assertRaises(LF.InvalidParameterError):
+            LF.crop_bounds(24, 32, binning=0)
+
+    def test_crop_bounds_match_please_package(self):
+        """LF.crop_bounds should agree with the loaders of the please package on the cases both are tested with."""
+        cases_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(LF.__file__))),
+                                  "please", "io", "tests", "data", "crop_bounds.json")
+        with open(cases_file) as f:
+            cases = json.load(f)
+        for case in cases:
+            with self.subTest(**case):
+                if case['bounds'] is None:
+                    with self.assertRaises(LF.InvalidParameterError):
+                        LF.crop_bounds(case['shape'][0], case['shape'][1], case['crop'], case['binning'])
+                else:
+                    bounds = LF.crop_bounds(case['shape'][0], case['shape'][1], case['crop'], case['binning'])
+                    self.assertEqual(bounds, tuple(case['bounds']))
+
+
+class TestDataStack(unittest.TestCase):
+    """Test that every DataStack layout gives the same frames, spectra, and indexing."""
+
+    def setUp(self):
+        """Create random data in the (height, width, image number) layout produced by the loaders."""
+        self.data = np.random.RandomState(3).randint(0, 4000, size=(17, 23, 9)).astype(np.uint16)
+
+    def test_layouts_agree(self):
+        """frame(), spectrum() and 3d indexing match the source array for each layout."""
+        for layout in datastack.LAYOUTS:
+            stack = datastack.DataStack(self.data.copy(), layout=layout)
+            stack.arrange(block_size=100)
+            self.assertEqual(stack.shape, self.data.shape)
+            for idx in (0, 4, -1):
+                np.testing.assert_array_equal(stack.frame(idx), self.data[:, :, idx])
+            np.testing.assert_array_equal(stack.spectrum(5, 7), self.data[5, 7, :])
+            np.testing.assert_array_equal(stack[2:6, 3:9, 1:4], self.data[2:6, 3:9, 1:4])
+            np.testing.assert_array_equal(np.asarray(stack), self.data)
+
+    def test_frame_layout_is_contiguous(self):
+        """Frames come from contiguous memory once the frame layout is built."""
+        stack = datastack.DataStack(self.data, layout='frame')
+        self.assertFalse(stack.frame(2).flags['C_CONTIGUOUS'])
+        stack.arrange()
+        self.assertTrue(stack.frame(2).flags['C_CONTIGUOUS'])
+        self.assertEqual(stack.nbytes, self.data.nbytes)
+
+    def test_arranged_leaves_stack_unchanged(self):
+        """arranged() builds the layout in a new stack so a stack already in use is never modified."""
+        stack = datastack.DataStack(self.data, layout='frame')
+        arranged = stack.arranged()
+        self.assertIsNot(arranged, stack)
+        self.assertFalse(stack.frame(2).flags['C_CONTIGUOUS'])
+        np.testing.assert_array_equal(stack.spectrum(5, 7), self.data[5, 7, :])
+        self.assertTrue(arranged.frame(2).flags['C_CONTIGUOUS'])
+        np.testing.assert_array_equal(arranged.spectrum(5, 7), self.data[5, 7, :])
+        spectrum = datastack.DataStack(self.data)
+        self.assertIs(spectrum.arranged(), spectrum)
+
+    def test_invalid_layout(self):
+        """Unknown layouts are rejected."""
+        with self.assertRaises(ValueError):
+            datastack.DataStack(self.data, layout='diagonal')
+
+
+class TestGrowableStack(unittest.TestCase):
+    """Test appending images to a GrowableStack."""
+
+    def test_append_grows_capacity(self):
+        """Appended images should match the stacked array as the buffer doubles in capacity."""
+        rng = np.random.RandomState(3)
+        frames = rng.randint(0, 4000, size=(11, 6, 5)).astype(np.uint16)
+        stack = datastack.GrowableStack(frames[0], capacity=2)
+        capacities = []
+        for frame in frames[1:]:
+            stack.append(frame)
+            capacities.append(stack.capacity)
+        self.assertEqual(capacities, [2, 4, 4, 8, 8, 8, 8, 16, 16, 16])
+        expected = np.moveaxis(frames, 0, 2)
+        self.assertEqual(stack.shape, expected.shape)
+        np.testing.assert_array_equal(np.asarray(stack), expected)
+        np.testing.assert_array_equal(stack.spectrum(4, 2), expected[4, 2, :])
+        np.testing.assert_array_equal(stack.frame(10), frames[10])
+        stack.arrange()
+        self.assertEqual(stack.layout, 'spectrum')
+
+    def test_append_rejects_wrong_shape(self):
+        """Images which do not match the stack shape should raise ValueError."""
+        stack = datastack.GrowableStack(np.zeros((6, 5)))
+        with self.assertRaises(ValueError):
+            stack.append(np.zeros((5, 6)))
+        self.assertEqual(stack.shape, (6, 5, 1))
+
+    def test_pyramid_follows_appended_images(self):
+        """An ImagePyramid of a GrowableStack should bin images appended after it was created."""
+        stack = datastack.GrowableStack(np.zeros((8, 8), dtype=np.uint16))
+        pyr = pyramid.ImagePyramid(stack)
+        stack.append(np.full((8, 8), 7, dtype=np.uint16))
+        self.assertEqual(pyr.shape, (8, 8, 2))
+        np.testing.assert_array_equal(pyr.frame(1, 2), np.full((4, 4), 7))
+
+
+class TestFrameCache(unittest.TestCase):
+    """Test rendering, eviction, and prefetching of display-ready frames."""
+
+    def setUp(self):
+        """Create a small data set."""
+        self.data = np.random.RandomState(4).randint(0, 4000, size=(12, 16, 30)).astype(np.uint16)
+        self.stack = datastack.DataStack(self.data)
+
+    def test_display_frame(self):
+        """Frames are flipped, transposed, and scaled from their min and max to 0 - 255."""
+        frame = framecache.display_frame(self.data[:, :, 2])
+        expected = self.data[::-1, :, 2].T.astype(float)
+        expected = (expected - expected.min()) * 255 / (expected.max() - expected.min())
+        self.assertEqual(frame.dtype, np.uint8)
+        self.assertTrue(frame.flags['C_CONTIGUOUS'])
+        np.testing.assert_allclose(frame, expected, atol=1)
+        self.assertFalse(framecache.display_frame(np.ones((4, 5))).any())
+
+    def test_prefetch_in_scroll_direction(self):
+        """Frames ahead of the current frame are rendered in the direction of travel."""
+        cache = framecache.FrameCache(prefetch=3)
+        cache.reset(self.stack, key=1)
+        cache.get(10)
+        cache.get(9)
+        cache.wait()
+        self.assertEqual(sorted(idx for idx, factor in cache._frames), [6, 7, 8, 9, 10, 11, 12, 13])
+        cache.reset(self.stack, key=2)
+        cache.get(0, limit=2)  # only the first two images have been read
+        cache.wait()
+        self.assertEqual(sorted(idx for idx, factor in cache._frames), [0, 1])
+
+    def test_capacity_and_reset(self):
+        """The cache never holds more frames than its capacity and reset() discards every frame."""
+        cache = framecache.FrameCache(max_bytes=12 * 16 * 5, prefetch=2)
+        cache.reset(self.stack, key=1)
+        self.assertEqual(cache.capacity, 5)
+        for idx in range(20):
+            cache.get(idx)
+        cache.wait()
+        self.assertLessEqual(len(cache), 5)
+        self.assertIn(19, cache)
+        cache.reset(self.stack, key=2)
+        self.assertEqual(len(cache), 0)
+
+
+class TestImagePyramid(unittest.TestCase):
+    """Test mean binning and level selection of the display image pyramid."""
+
+    def setUp(self):
+        """Create a data set whose dimensions are not multiples of the bin factors."""
+        self.data = np.random.RandomState(5).randint(0, 4000, size=(37, 50, 3)).astype(np.uint16)
+        self.pyramid = pyramid.ImagePyramid(datastack.DataStack(self.data))
+
+    def test_bins_line_up_with_full_resolution_pixels(self):
+        """Bin (i, j) averages the full resolution pixels it covers within rect()."""
+        for factor in (2, 4, 8):
+            binned = self.pyramid.frame(1, factor)
+            x, y, wd, ht = self.pyramid.rect(factor)
+            self.assertEqual(binned.shape, (ht // factor, wd // factor))
+            # rect() starts at the bottom edge of the image so the top rows are the ones dropped
+            top = self.data.shape[0] - ht
+            expected = self.data[top + factor:top + 2 * factor, 2 * factor:3 * factor, 1].mean()
+            self.assertEqual(binned[1, 2], np.rint(expected))
+            self.assertFalse(np.shares_memory(self.pyramid.frame(1, factor), binned))  # never kept
+        np.testing.assert_array_equal(self.pyramid.frame(2), self.data[:, :, 2])
+
+    def test_choose_factor(self):
+        """The coarsest level with at least one binned pixel per screen pixel is chosen."""
+        self.assertEqual(self.pyramid.choose_factor(0.5), 1)
+        self.assertEqual(self.pyramid.choose_factor(3.0), 2)
+        self.assertEqual(self.pyramid.choose_factor(20.0), 8)
+        # small changes in scale just below the current factor do not switch levels
+        self.assertEqual(self.pyramid.choose_factor(3.9, current=4), 4)
+        self.assertEqual(self.pyramid.choose_factor(3.0, current=4), 2)
+        small = pyramid.ImagePyramid(datastack.DataStack(self.data[:6, :6]))
+        self.assertEqual(small.factors, (2, 4))
+
+
+class TestCubeCache(unittest.TestCase):
+    """Test writing, loading and invalidating the persistent cube cache."""
+
+    def setUp(self):
+        """Create a data directory with a few files and an empty cache root."""
+        self.test_data_path = tempfile.mkdtemp()
+        self.cache_root = tempfile.mkdtemp()
+        for idx in range(3):
+            with open(os.path.join(self.test_data_path, "img_{}.dat".format(idx)), 'wb') as f:
+                f.write(bytes(16))
+        self.params = {'Height': 4, 'Width': 6, 'Bit Size': 16}
+        self.data = np.arange(4 * 6 * 3, dtype='<u2').reshape((4, 6, 3))
+        self.elist = [1.0, 1.5, 2.0]
+
+    def tearDown(self):
+        """Remove temp directories."""
+        shutil.rmtree(self.test_data_path)
+        shutil.rmtree(self.cache_root)
+
+    def write_cache(self):
+        """Write self.data to the cache using the current data directory signature."""
+        signature = cubecache.dataset_signature(self.test_data_path, self.params)
+        cubecache.write_cube_cache(self.test_data_path, self.data, signature,
+                                   elist=self.elist, cache_root=self.cache_root)
+
+    def load_cache(self):
+        """Load the cache using the current data directory signature."""
+        signature = cubecache.dataset_signature(self.test_data_path, self.params)
+        return cubecache.load_cube_cache(self.test_data_path, signature, cache_root=self.cache_root)
+
+    def test_cache_round_trip(self):
+        """Cached data should be returned as a memory map identical to the written data."""
+        self.assertIsNone(self.load_cache())
+        self.write_cache()
+        cube = self.load_cache()
+        self.assertIsInstance(cube, np.memmap)
+        np.testing.assert_array_equal(cube, self.data)
+        meta = cubecache.load_cube_metadata(self.test_data_path, cache_root=self.cache_root)
+        self.assertEqual(meta['elist'], self.elist)
+        self.assertEqual(meta['shape'], list(self.data.shape))
+        self.assertEqual(meta['dtype'], self.data.dtype.str)
+
+    def test_cached_data_arranged_in_requested_layout(self):
+        """Data loaded from a warm cache should be arranged into the layout of the experiment like a fresh load."""
+        import qthreads
+        self.write_cache()
+        for layout in ('frame', 'both'):
+            stack = datastack.DataStack(self.load_cache(), layout=layout)
+            arranged = []
+            thread = qthreads.WorkerThread(task='ARRANGE', data=stack)
+            thread.arrangedSIGNAL.connect(arranged.append)
+            thread.run()
+            self.assertEqual(len(arranged), 1)
+            self.assertEqual(arranged[0].layout, layout)
+            self.assertIsNotNone(arranged[0]._frames)
+            self.assertEqual(arranged[0]._spectra is None, layout == 'frame')
+            for idx in range(self.data.shape[2]):
+                np.testing.assert_array_equal(arranged[0].frame(idx), self.data[:, :, idx])
+            np.testing.assert_array_equal(arranged[0].spectrum(2, 3), self.data[2, 3, :])
+
+    def test_cache_invalidated_by_file_changes(self):
+        """Modifying, adding files, or changing load parameters should invalidate the cache."""
+        self.write_cache()
+        path = os.path.join(self.test_data_path, "img_0.dat")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNone(self.load_cache())
+
+        self.write_cache()
+        with open(os.path.join(self.test_data_path, "img_3.dat"), 'wb') as f:
+            f.write(bytes(16))
+        self.assertIsNone(self.load_cache())
+
+        self.write_cache()
+        self.params['Bit Size'] = 8
+        self.assertIsNone(self.load_cache())
+
+    def test_prefetch(self):
+        """Prefetching should read the whole cube file, nothing if there is no cache, and stop when cancelled."""
+        self.assertEqual(cubecache.prefetch_cube_cache(self.test_data_path, cache_root=self.cache_root), 0)
+        self.write_cache()
+        size = os.path.getsize(os.path.join(cubecache.get_cache_dir(self.test_data_path, self.cache_root),
+                                            cubecache.CUBE_FILE))
+        self.assertEqual(cubecache.prefetch_cube_cache(self.test_data_path, cache_root=self.cache_root,
+                                                       block_size=64), size)
+        self.assertEqual(cubecache.prefetch_cube_cache(self.test_data_path, cache_root=self.cache_root,
+                                                       cancelled=lambda: True), 0)
+
+    def test_block_write(self):
+        """Data copied a few rows at a time should match the data written in one block."""
+        signature = cubecache.dataset_signature(self.test_data_path, self.params)
+        cubecache.write_cube_cache(self.test_data_path, self.data, signature,
+                                   cache_root=self.cache_root, block_size=20)
+        np.testing.assert_array_equal(self.load_cache(), self.data)
+
+    def test_least_recently_used_caches_evicted(self):
+        """Writing a cache should remove the least recently used caches beyond the size limit."""
+        paths = []
+        for idx in range(3):
+            path = os.path.join(self.test_data_path, "set_{}".format(idx))
+            os.mkdir(path)
+            paths.append(path)
+            cubecache.write_cube_cache(path, self.data, {}, cache_root=self.cache_root)
+            sidecar = os.path.join(cubecache.get_cache_dir(path, self.cache_root), cubecache.SIDECAR_FILE)
+            os.utime(sidecar, (1000 + idx, 1000 + idx))
+        cache_dir = cubecache.get_cache_dir(paths[0], self.cache_root)
+        cache_bytes = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+        self.assertIsNotNone(cubecache.load_cube_cache(paths[0], {}, cache_root=self.cache_root))  # now most recent
+        path = os.path.join(self.test_data_path, "set_3")
+        os.mkdir(path)
+        cubecache.write_cube_cache(path, self.data, {}, cache_root=self.cache_root, max_bytes=3 * cache_bytes)
+        cached = [cubecache.load_cube_metadata(p, cache_root=self.cache_root) is not None for p in paths + [path]]
+        self.assertEqual(cached, [True, False, True, True])
+        self.assertFalse(os.path.exists(cubecache.get_cache_dir(paths[1], self.cache_root)))
+
+    def test_data_larger_than_limit_not_cached(self):
+        """A data set larger than the cache size limit should not be written."""
+        signature = cubecache.dataset_signature(self.test_data_path, self.params)
+        self.assertIsNone(cubecache.write_cube_cache(self.test_data_path, self.data, signature,
+                                                     cache_root=self.cache_root, max_bytes=self.data.nbytes - 1))
+        self.assertIsNone(self.load_cache())
+
+
+class TestFolderPoller(unittest.TestCase):
+    """Test watchfolder.FolderPoller against files written to a directory between polls."""
+
+    def setUp(self):
+        """Create an empty data directory."""
+        self.test_data_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove temp data directory."""
+        shutil.rmtree(self.test_data_path)
+
+    def write(self, name, size):
+        """Write a file of size bytes to the data directory."""
+        with open(os.path.join(self.test_data_path, name), 'wb') as f:
+            f.write(b"x" * size)
+
+    def names(self, paths):
+        """Get the file names of a list of paths."""
+        return [os.path.basename(path) for path in paths]
+
+    def test_files_returned_in_order_once_complete(self):
+        """Files should be returned once their size is stable, without passing one still being written."""
+        poller = watchfolder.FolderPoller(self.test_data_path, ext='.dat', min_size=10)
+        self.write("img_000.dat", 12)
+        self.write("img_001.dat", 5)  # still being written
+        self.write("img_002.dat", 12)
+        self.write(".hidden.dat", 12)
+        self.write("notes.txt", 12)
+        self.assertEqual(poller.poll(), [])
+        self.assertEqual(self.names(poller.poll()), ["img_000.dat"])
+        self.write("img_001.dat", 12)
+        self.assertEqual(poller.poll(), [])
+        self.assertEqual(self.names(poller.poll()), ["img_001.dat", "img_002.dat"])
+        self.assertEqual(poller.poll(), [])
+
+    def test_stride_skips_files(self):
+        """Only every stride-th complete file should be returned."""
+        poller = watchfolder.FolderPoller(self.test_data_path, ext='.dat', stride=2)
+        for idx in range(3):
+            self.write("img_{:03d}.dat".format(idx), 4)
+        poller.poll()
+        self.assertEqual(self.names(poller.poll()), ["img_000.dat", "img_002.dat"])
+        for idx in range(3, 5):
+            self.write("img_{:03d}.dat".format(idx), 4)
+        poller.poll()
+        self.assertEqual(self.names(poller.poll()), ["img_004.dat"])
+        self.assertEqual(poller.count, 5)
+
+    def test_watch_stopped_before_start(self):
+        """A WatchThread stopped before it is scheduled should finish rather than poll forever."""
+        import qthreads
+        poller = watchfolder.FolderPoller(self.test_data_path, ext='.dat')
+        thread = qthreads.WatchThread(poller, LF.read_img, interval=0.01)
+        thread.stop()
+        thread.start()
+        self.assertTrue(thread.wait(2000))
+
+
+class TestInstrument(unittest.TestCase):
+    """Test timing spans, counters, and trace output of instrument.Recorder."""
+
+    def setUp(self):
+        """Create a temp directory for trace files."""
+        self.test_data_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove temp directory."""
+        shutil.rmtree(self.test_data_path)
+
+    def test_disabled_recorder_records_nothing(self):
+        """Spans, decorated functions, and counters should not be recorded until enabled."""
+        recorder = instrument.Recorder()
+        double = recorder.timed('double')(lambda x: 2 * x)
+        with recorder.span('read'):
+            pass
+        recorder.count('frames')
+        self.assertEqual(double(2), 4)
+        self.assertEqual(len(recorder.stats), 0)
+        self.assertEqual(len(recorder.counters), 0)
+        self.assertEqual(len(recorder.events), 0)
+
+    def test_spans_and_counters(self):
+        """Enabled spans should accumulate statistics and be written as a Chrome trace."""
+        recorder = instrument.Recorder(enabled=True)
+        double = recorder.timed('double', 'math')(lambda x: 2 * x)
+        for idx in range(3):
+            self.assertEqual(double(idx), 2 * idx)
+        with self.assertRaises(ValueError):
+            with recorder.span('read', 'io', path='img.dat'):
+                raise ValueError
+        recorder.count('frames', 2)
+        recorder.count('frames')
+        self.assertEqual(recorder.stats['double'].count, 3)
+        self.assertEqual(recorder.stats['double'].category, 'math')
+        self.assertEqual(recorder.stats['read'].count, 1)
+        self.assertEqual(recorder.counters['frames'], 3)
+        self.assertEqual(recorder.rate('double', window=60), 3 / 60)
+        self.assertIsNotNone(recorder.latency('double'))
+        self.assertIsNone(recorder.latency('missing'))
+        summary = recorder.summary()
+        for name in ('double', 'read', 'frames'):
+            self.assertIn(name, summary)
+
+        path = os.path.join(self.test_data_path, 'trace.json')
+        recorder.write_trace(path)
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+        spans = [e for e in events if e['ph'] == 'X']
+        counters = [e for e in events if e['ph'] == 'C']
+        self.assertEqual([e['name'] for e in spans], ['double'] * 3 + ['read'])
+        self.assertEqual(spans[-1]['args'], {'path': 'img.dat'})
+        self.assertTrue(all(e['dur'] >= 0 and e['ts'] >= 0 for e in spans))
+        self.assertEqual([e['args']['frames'] for e in counters], [2, 3])
+
+        recorder.reset()
+        self.assertEqual(len(recorder.stats), 0)
+        self.assertEqual(len(recorder.events), 0)
+
+
+class TestTaskScheduler(unittest.TestCase):
+    """Test priority order, bounded concurrency, cancellation, and coalescing of scheduler.TaskScheduler."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Qt signals between threads are delivered by the event loop of a QCoreApplication."""
+        from PyQt5 import QtCore
+        import scheduler
+        cls.QtCore = QtCore
+        cls.scheduler = scheduler
+        cls.app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+        class CountThread(QtCore.QThread):
+            """Count to total, emitting progress, until cancelled."""
+
+            progressSIGNAL = QtCore.pyqtSignal(int, int)
+            outputSIGNAL = QtCore.pyqtSignal(object)
+
+            def __init__(self, name, started, total=5):
+                super(CountThread, self).__init__()
+                self.name, self.started, self.total = name, started, total
+
+            def cancel(self):
+                self.requestInterruption()
+
+            def run(self):
+                self.started.append(self.name)
+                for idx in range(self.total):
+                    if self.isInterruptionRequested():
+                        return
+                    self.msleep(5)
+                    self.progressSIGNAL.emit(idx + 1, self.total)
+                self.outputSIGNAL.emit(self.name)
+
+        cls.CountThread = CountThread
+
+    def run_until_idle(self, sched, timeout=5.0):
+        """Process events until every task has finished."""
+        end = time.monotonic() + timeout
+        while not sched.isIdle() and time.monotonic() < end:
+            self.app.processEvents()
+            time.sleep(0.002)
+        self.app.processEvents()
+        self.assertTrue(sched.isIdle())
+
+    def test_priority_and_concurrency(self):
+        """Background tasks run one at a time in priority order while interactive tasks start at once."""
+        sched = self.scheduler.TaskScheduler(max_background=1)
+        started = []
+        tasks = [self.scheduler.Task(self.CountThread(name, started), name, priority=priority)
+                 for name, priority in (('export 1', self.scheduler.EXPORT),
+                                        ('export 2', self.scheduler.EXPORT),
+                                        ('smooth', self.scheduler.BACKGROUND),
+                                        ('load', self.scheduler.INTERACTIVE))]
+        for task in tasks:
+            sched.submit(task)
+        self.assertEqual([task.state for task in tasks], ['running', 'queued', 'queued', 'running'])
+        self.assertIn('queued', sched.status())
+        self.run_until_idle(sched)
+        self.assertEqual(started[-2:], ['smooth', 'export 2'])
+        self.assertEqual([task.state for task in tasks], ['finished'] * 4)
+        self.assertEqual(tasks[0].progress, (5, 5))
+
+    def test_coalescing_and_cancellation(self):
+        """A task with the key of an active task supersedes it; cancelled tasks deliver nothing."""
+        sched = self.scheduler.TaskScheduler(max_background=1)
+        started, outputs, finished = [], [], []
+        tasks = []
+        for name in ('old', 'new'):
+            task = self.scheduler.Task(self.CountThread(name, started, total=50), name, key='smooth')
+            task.connect(task.thread.outputSIGNAL, outputs.append)
+            task.finished.connect(lambda name=name: finished.append(name))
+            tasks.append(sched.submit(task))
+        self.assertEqual(tasks[0].state, 'cancelled')
+        self.run_until_idle(sched)
+        self.assertEqual(outputs, ['new'])
+        self.assertEqual(finished, ['new'])
+
+        task = sched.submit(self.scheduler.Task(self.CountThread('long', started, total=1000), 'long'))
+        queued = sched.submit(self.scheduler.Task(self.CountThread('never', started), 'never'))
+        self.assertEqual(sched.cancel_all(), 2)
+        self.run_until_idle(sched)
+        self.assertEqual(task.state, 'cancelled')
+        self.assertNotIn('never', started)
+        self.assertEqual(queued.state, 'cancelled')
+
+
+class TestCoalescer(unittest.TestCase):
+    """Test that ratelimit.Coalescer handles requests at most rate times per second without losing the latest."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Coalesced requests are handled by a QTimer in the event loop of a QCoreApplication."""
+        from PyQt5 import QtCore
+        import ratelimit
+        cls.QtCore = QtCore
+        cls.ratelimit = ratelimit
+        cls.app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    def wait(self, condition, timeout=2.0):
+        """Process events until condition() is True."""
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            self.app.processEvents(self.QtCore.QEventLoop.AllEvents, 10)
+        return condition()
+
+    def test_first_request_immediate(self):
+        calls = []
+        coalescer = self.ratelimit.Coalescer(lambda *args: calls.append(args), rate=10)
+        coalescer.request(1, 2)
+        self.assertEqual(calls, [(1, 2)])
+
+    def test_burst_coalesced_to_latest(self):
+        calls = []
+        coalescer = self.ratelimit.Coalescer(lambda x: calls.append(x), rate=10)
+        for x in range(100):
+            coalescer.request(x)
+        self.assertEqual(calls, [0])
+        self.assertTrue(self.wait(lambda: len(calls) == 2))
+        self.assertEqual(calls, [0, 99])
+        self.assertIsNone(coalescer.pending)
+
+    def test_cancel(self):
+        calls = []
+        coalescer = self.ratelimit.Coalescer(lambda x: calls.append(x), rate=20)
+        coalescer.request(0)
+        coalescer.request(1)
+        coalescer.cancel()
+        self.assertFalse(self.wait(lambda: len(calls) > 1, timeout=0.2))
+        self.assertEqual(calls, [0])
+
+
+class TestLazyImport(unittest.TestCase):
+    """Test lazyimport.lazy_import(); which modules the GUI imports is checked by please/tests/test_imports.py."""
+
+    def test_lazy_module(self):
+        """A lazy module should import the real module on first use and then behave like it."""
+        module = lazyimport.lazy_import('json')
+        self.assertIn('not loaded', repr(module))
+        self.assertIs(module.dumps, json.dumps)
+        self.assertIn('loads', dir(module))
+        self.assertNotIn('not loaded', repr(module))
+        with self.assertRaises(AttributeError):
+            module.not_a_function
+
+
+class TestSpectrumStore(unittest.TestCase):
+    """Test smoothcache.SpectrumStore of smoothed I(V) curves."""
+
+    def test_put_get_and_mask(self):
+        """Stored curves should be returned and flagged in the bit-packed mask, including past the first byte."""
+        store = smoothcache.SpectrumStore((4, 11, 5))
+        self.assertEqual(store.mask.shape, (4, 2))
+        self.assertIsNone(store.get(1, 9))
+        store.put(1, 9, np.arange(5))
+        store.put(3, 0, np.ones(5))
+        np.testing.assert_array_equal(store.get(1, 9), np.arange(5))
+        self.assertIn((1, 9), store)
+        self.assertNotIn((1, 8), store)
+        expected = np.zeros((4, 11), dtype=bool)
+        expected[1, 9] = expected[3, 0] = True
+        np.testing.assert_array_equal(store.computed(), expected)
+        self.assertEqual(store.nbytes, 2 * 5 * 4)
+
+    def test_least_recently_used_curves_evicted(self):
+        """Curves beyond max_bytes should be evicted least recently used first and cleared from the mask."""
+        store = smoothcache.SpectrumStore((10, 10, 4), max_bytes=3 * 4 * 4)
+        for col in range(3):
+            store.put(0, col, np.full(4, col))
+        store.get(0, 0)  # most recently used
+        store.put(0, 3, np.zeros(4))
+        self.assertEqual(len(store), 3)
+        self.assertNotIn((0, 1), store)
+        self.assertIn((0, 0), store)
+        self.assertLessEqual(store.nbytes, store.max_bytes)
+
+    def test_fill_and_clear(self):
+        """A fully smoothed data set should serve every pixel until the store is cleared."""
+        store = smoothcache.SpectrumStore((3, 4, 2))
+        store.put(0, 0, np.zeros(2))
+        full = np.random.RandomState(0).rand(3, 4, 2)
+        store.fill(full)
+        self.assertEqual(len(store), 12)
+        self.assertTrue(store.computed().all())
+        np.testing.assert_array_equal(store.get(2, 3), full[2, 3])
+        with self.assertRaises(ValueError):
+            store.fill(np.zeros((3, 4, 3)))
+        store.clear()
+        self.assertEqual(len(store), 0)
+        self.assertFalse(store.computed().any())
+        self.assertIsNone(store.get(2, 3))
+
+
+class TestSmoothingCache(unittest.TestCase):
+    """Test smoothcache.SmoothingCache of stores keyed by smoothing settings and data version."""
+
+    def test_stores_keyed_by_settings(self):
+        """Each setting should have its own store, kept for the most recent max_settings settings."""
+        cache = smoothcache.SmoothingCache((4, 4, 3), max_settings=2)
+        flat = cache.store(('flat', 4, 1))
+        flat.put(0, 0, np.ones(3))
+        hanning = cache.store(('hanning', 4, 1))
+        self.assertIsNot(flat, hanning)
+        self.assertIsNone(hanning.get(0, 0))
+        self.assertIs(cache.store(('flat', 4, 1)), flat)  # switching back keeps the curves
+        np.testing.assert_array_equal(cache.get(('flat', 4, 1)).get(0, 0), np.ones(3))
+        cache.store(('flat', 6, 1))
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn(('hanning', 4, 1), cache)  # least recently used
+        self.assertIn(('flat', 4, 1), cache)
+
+    def test_new_version_discards_stores(self):
+        """Stores for a previous data version should be discarded."""
+        cache = smoothcache.SmoothingCache((4, 4, 3))
+        cache.store(('flat', 4, 1))
+        cache.store(('flat', 4, 2))
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(('flat', 4, 1)))
+
+    def test_fill_respects_total_bytes(self):
+        """Fully smoothed data sets beyond max_total_bytes should evict older stores but keep the newest."""
+        cache = smoothcache.SmoothingCache((4, 4, 3), max_total_bytes=500)
+        cache.fill(('flat', 4, 1), np.zeros((4, 4, 3)))
+        cache.fill(('flat', 6, 1), np.ones((4, 4, 3)))
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(cache.get(('flat', 6, 1)).computed().all())
+
+    def test_data_beyond_total_bytes_not_stored(self):
+        """A data set whose smoothed curves exceed max_total_bytes is smoothed a pixel at a time instead."""
+        cache = smoothcache.SmoothingCache((4, 4, 3), max_total_bytes=100)
+        self.assertFalse(cache.fits())
+        self.assertTrue(smoothcache.SmoothingCache((4, 4, 3), max_total_bytes=4 * 4 * 3 * 4).fits())
+        cache.fill(('flat', 4, 1), np.zeros((4, 4, 3), dtype=np.float32))
+        self.assertIsNone(cache.get(('flat', 4, 1)))
+
+
+class TestSmoothCube(unittest.TestCase):
+    """Test LF.smooth_cube() against LF.smooth() applied to each pixel."""
+
+    def test_matches_per_pixel_smoothing(self):
+        """Every window type should match LF.smooth() including across block boundaries."""
+        data = np.random.RandomState(0).randint(0, 65535, size=(9, 7, 40)).astype(np.uint16)
+        for window_type in ['flat', 'hanning', 'hamming', 'bartlett', 'blackman']:
+            for window_len in (4, 10):
+                expected = np.apply_along_axis(LF.smooth, 2, data, window_len=window_len, window_type=window_type)
+                blocks = []
+                result = LF.smooth_cube(data, window_len=window_len, window_type=window_type, block_size=1000,
+                                        callback=lambda start, stop: blocks.append((start, stop)))
+                np.testing.assert_allclose(result, expected, rtol=1e-12)
+                self.assertGreater(len(blocks), 1)
+                self.assertEqual(blocks[-1][1], data.shape[0])
+
+    def test_invalid_window(self):
+        """Invalid settings return None as LF.smooth() does."""
+        data = np.zeros((2, 2, 20))
+        self.assertIsNone(LF.smooth_cube(data, window_len=2))
+        self.assertIsNone(LF.smooth_cube(data, window_type='gaussian'))
+
+    def test_windows_memoized(self):
+        """Windows should be normalized, built once per setting, and protected from modification."""
+        window = LF.get_window(8, 'hanning')
+        self.assertIs(LF.get_window(8, 'hanning'), window)
+        self.assertAlmostEqual(window.sum(), 1.0)
+        np.testing.assert_allclose(window, np.hanning(8) / np.hanning(8).sum())
+        np.testing.assert_allclose(LF.get_window(4), np.full(4, 0.25))
+        with self.assertRaises(ValueError):
+            window[0] = 1
+
+
+class TestTaskPool(unittest.TestCase):
+    """Test smoothing and file conversion spread over worker processes by taskpool."""
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the worker processes."""
+        taskpool.shutdown()
+
+    def setUp(self):
+        """Create a temp directory and process every data set in the pool regardless of its size."""
+        self.test_data_path = tempfile.mkdtemp()
+        self.min_size = taskpool.MIN_PARALLEL_SIZE
+        taskpool.MIN_PARALLEL_SIZE = 0
+
+    def tearDown(self):
+        """Remove temp directory and restore the size threshold."""
+        taskpool.MIN_PARALLEL_SIZE = self.min_size
+        shutil.rmtree(self.test_data_path)
+
+    def test_shared_array_round_trip(self):
+        """A shared array attached by name should see the data of the original."""
+        data = np.arange(24, dtype='>u2').reshape(2, 3, 4)
+        with taskpool.SharedArray.from_array(data, block_rows=1) as shared:
+            attached = taskpool.SharedArray.attach(shared.spec())
+            np.testing.assert_array_equal(attached.array, data)
+            self.assertEqual(attached.array.dtype, data.dtype)
+            attached.release()
+
+    def test_smooth_cube_matches_single_process(self):
+        """Smoothing in worker processes should match LF.smooth_cube() and report every row."""
+        data = np.random.RandomState(2).randint(0, 1000, size=(13, 5, 30)).astype(np.uint16)
+        progress = []
+        smth = taskpool.smooth_cube(data, window_len=6, window_type='hanning', workers=2,
+                                    callback=lambda done, total: progress.append((done, total)))
+        np.testing.assert_allclose(smth, LF.smooth_cube(data, window_len=6, window_type='hanning'))
+        self.assertEqual(progress[-1], (13, 13))
+        self.assertIsNone(taskpool.smooth_cube(data, window_len=2, workers=2))
+
+    def test_smooth_cube_single_precision(self):
+        """Single precision output should be returned in the shared memory the workers wrote to."""
+        data = np.random.RandomState(3).randint(0, 1000, size=(6, 4, 20)).astype(np.uint16)
+        smth = taskpool.smooth_cube(data, window_len=4, workers=2, dtype=np.float32)
+        self.assertEqual(smth.dtype, np.float32)
+        np.testing.assert_allclose(smth, LF.smooth_cube(data, window_len=4), rtol=1e-6)
+        self.assertFalse(smth.flags['OWNDATA'])
+
+    def test_cancel(self):
+        """A cancelled task should raise TaskCancelled rather than return partial results."""
+        data = np.ones((40, 4, 20))
+        with self.assertRaises(taskpool.TaskCancelled):
+            taskpool.smooth_cube(data, window_len=4, workers=1, cancelled=lambda: True)
+        taskpool.MIN_PARALLEL_SIZE = self.min_size
+        with self.assertRaises(taskpool.TaskCancelled):
+            taskpool.smooth_cube(data, window_len=4, cancelled=lambda: True)
+
+    def test_convert_dat_files(self):
+        """Headers should be stripped from raw files written by the worker processes."""
+        data = np.arange(3 * 4 * 5, dtype='<u2').reshape(3, 4, 5)
+        paths = []
+        for idx in range(data.shape[2]):
+            paths.append(os.path.join(self.test_data_path, 'img_{}.raw'.format(idx)))
+            with open(paths[-1], 'wb') as f:
+                f.write(b'header' + data[:, :, idx].tobytes())
+        outdir = os.path.join(self.test_data_path, 'out')
+        os.mkdir(outdir)
+        taskpool.convert_dat_files(paths, outdir, 3, 4, '<u2', workers=2)
+        for idx in range(data.shape[2]):
+            frame = np.fromfile(os.path.join(outdir, 'img_{}.dat'.format(idx)), dtype='<u2')
+            np.testing.assert_array_equal(frame.reshape(3, 4), data[:, :, idx])
+
+
+class TestLineSampling(unittest.TestCase):
+    """Test the vectorized Bresenham points and line profiles in bline."""
+
+    @staticmethod
+    def stepped_bline(x0, y0, xf, yf):
+        """Step through the Bresenham Algorithm one point at a time."""
+        w, h = xf - x0, yf - y0
+        dx1 = dx2 = int(np.sign(w))
+        dy1, dy2 = int(np.sign(h)), 0
+        longest, shortest = abs(w), abs(h)
+        if not longest > shortest:
+            longest, shortest = abs(h), abs(w)
+            dx2, dy2 = 0, int(np.sign(h))
+        numerator = longest >> 1
+        x, y = x0, y0
+        points = []
+        for i in range(longest + 1):
+            points.append((x, y))
+            numerator += shortest
+            if not numerator < longest:
+                numerator -= longest
+                x, y = x + dx1, y + dy1
+            else:
+                x, y = x + dx2, y + dy2
+        return points
+
+    def test_bline_matches_stepped_algorithm(self):
+        """Every octant, axis aligned line, and single point should match the stepped algorithm."""
+        segments = [(x0, y0, xf, yf) for x0 in (-2, 0, 3) for y0 in (-1, 0, 2)
+                    for xf in range(-7, 8) for yf in range(-7, 8)]
+        xs, ys, offsets = bline.bline_many(segments)
+        for i, segment in enumerate(segments):
+            expected = self.stepped_bline(*segment)
+            self.assertEqual(bline.bline(*segment), expected)
+            self.assertEqual(list(zip(xs[offsets[i]:offsets[i + 1]], ys[offsets[i]:offsets[i + 1]])), expected)
+
+    def test_polylines_share_vertices(self):
+        """Vertices joining consecutive segments should appear once."""
+        xs, ys, offsets = bline.bline_polylines([[(0, 0), (3, 0), (3, 2)], [(5, 5)]])
+        np.testing.assert_array_equal(offsets, [0, 6, 7])
+        self.assertEqual(list(zip(xs, ys)), [(0, 0), (1, 0), (2, 0), (3, 0), (3, 1), (3, 2), (5, 5)])
+
+    def test_sample_polylines_spacing(self):
+        """Samples should be evenly spaced in arc length, across corners of a polyline."""
+        xs, ys, distance, offsets = bline.sample_polylines([[(0, 0), (3, 4)], [(0, 0), (2, 0), (2, 2)]])
+        np.testing.assert_array_equal(offsets, [0, 6, 11])
+        np.testing.assert_allclose(distance, [0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4])
+        np.testing.assert_allclose(xs, [0, 0.6, 1.2, 1.8, 2.4, 3, 0, 1, 2, 2, 2])
+        np.testing.assert_allclose(ys, [0, 0.8, 1.6, 2.4, 3.2, 4, 0, 0, 0, 1, 2])
+        xs, ys, distance, offsets = bline.sample_polylines([[(0, 0), (3, 0)]], spacing=0.5)
+        np.testing.assert_allclose(xs, np.arange(7) * 0.5)
+
+    def test_line_profiles(self):
+        """Profiles of a linear image should be interpolated exactly, including at the image edges."""
+        frame = np.add.outer(10 * np.arange(8.0), np.arange(6.0))  # value = 10 * row + column
+        profiles = bline.LineProfiles([[(0, 0), (5, 0)], [(0.5, 0.5), (4.5, 3.5)], [(5, 7), (5, 3)]], frame.shape)
+        self.assertEqual(len(profiles), 3)
+        result = profiles.profiles(frame)
+        for distance, values in result:
+            self.assertEqual(distance.shape, values.shape)
+        np.testing.assert_allclose(result[0][1], np.arange(6.0))
+        np.testing.assert_allclose(result[1][1], 10 * (0.5 + 0.6 * result[1][0]) + 0.5 + 0.8 * result[1][0])
+        np.testing.assert_allclose(result[2][1], [75, 65, 55, 45, 35])
+
+
+class TestSummedAreaTable(unittest.TestCase):
+    """Test integral.SummedAreaTable and integral.window_sums() against direct window sums."""
+
+    rects = [(0, 0, 30, 40), (3, 4, 10, 20), (10, 10, 10, 30), (-5, -5, 4, 4), (25, 35, 80, 90)]
+
+    def expected(self, data):
+        """Sum each rectangle clipped to the image by slicing."""
+        return np.array([data[max(r0, 0):r1, max(c0, 0):c1, :].sum(axis=(0, 1), dtype=np.float64)
+                         for r0, c0, r1, c1 in self.rects])
+
+    def test_sums_match_direct_sums(self):
+        """Integer and float data should give the same sums as slicing, with or without a table."""
+        rng = np.random.RandomState(0)
+        for dtype in (np.uint8, np.uint16, np.float32):
+            data = (rng.rand(30, 40, 6) * 250).astype(dtype)
+            table = integral.SummedAreaTable(data, block_size=2000)
+            self.assertFalse(table.built)
+            sums = table.sums(self.rects)
+            self.assertTrue(table.built)
+            self.assertEqual(sums.shape, (len(self.rects), data.shape[2]))
+            np.testing.assert_allclose(sums, self.expected(data), rtol=1e-6)
+            np.testing.assert_allclose(integral.window_sums(data, self.rects), self.expected(data), rtol=1e-6)
+
+    def test_large_integer_sums_do_not_overflow(self):
+        """Tables for 16 bit images large enough to overflow 32 bits should use 64 bit integers."""
+        data = np.full((300, 300, 2), 65535, dtype=np.uint16)
+        table = integral.SummedAreaTable(data)
+        self.assertEqual(table.dtype, np.int64)
+        self.assertEqual(table.sums([(0, 0, 300, 300)])[0, 0], 65535 * 300 * 300)
+
+    def test_cancelled_build(self):
+        """A cancelled build leaves the table unbuilt so that it can be built again later."""
+        data = np.ones((10, 10, 6), dtype=np.uint16)
+        table = integral.SummedAreaTable(data, block_size=100)
+        self.assertIsNone(table.build(cancelled=lambda: True))
+        self.assertFalse(table.built)
+        self.assertEqual(table.build()[-1, -1, 0], 100)
+        self.assertTrue(table.built)
+
+
+class TestROIExtraction(unittest.TestCase):
+    """Test roi.extract_iv() against averages computed with boolean masks."""
+
+    def setUp(self):
+        """Create random data and a full image coordinate grid."""
+        self.data = np.random.RandomState(1).randint(0, 4000, size=(50, 60, 8)).astype(np.uint16)
+        self.rows, self.cols = np.mgrid[0:50, 0:60]
+
+    def masked_mean(self, mask):
+        """Average the data over a full image boolean mask."""
+        return self.data[mask].mean(axis=0)
+
+    def test_leed_box_normalization(self):
+        """A box of radius rad is averaged over all (2*rad + 1)**2 pixels in the window."""
+        curve = roi.extract_iv(self.data, [roi.RectROI.from_center(20, 15, 5)])[0]
+        np.testing.assert_allclose(curve, self.data[10:21, 15:26, :].sum(axis=(0, 1)) / 11**2)
+
+    def test_mixed_rois_with_and_without_table(self):
+        """Rectangles, circles, polygons and masks give the same curves in any combination."""
+        circle = (self.rows - 25)**2 + (self.cols - 30)**2 <= 6.5**2
+        triangle = (self.rows >= 5) & (self.cols >= 5) & (self.cols - 5 < 20 - (self.rows - 5) * 20 / 30.)
+        rois = [roi.RectROI.from_corners((3, 4), (10, 12)),
+                roi.CircleROI(30, 25, 6.5),
+                roi.PolygonROI([(5, 5), (25, 5), (5, 35)]),
+                roi.MaskROI(circle),
+                roi.RectROI.from_center(58, 48, 4)]
+        expected = [self.data[4:13, 3:11, :].mean(axis=(0, 1)),
+                    self.masked_mean(circle),
+                    self.masked_mean(triangle),
+                    self.masked_mean(circle),
+                    self.data[44:50, 54:60, :].mean(axis=(0, 1))]
+        table = integral.SummedAreaTable(self.data)
+        for curves in (roi.extract_iv(self.data, rois), roi.extract_iv(self.data, rois, table=table, block_size=50)):
+            self.assertEqual(curves.shape, (len(rois), self.data.shape[2]))
+            np.testing.assert_allclose(curves, expected)
+
+    def test_reads_only_roi_bounding_box(self):
+        """Gathering small ROIs reads the region around them from each image, not the whole image."""
+        data = self.data
+
+        class Recorder(object):
+            shape = data.shape
+
+            def __init__(self):
+                self.largest = 0
+
+            def __getitem__(self, key):
+                block = data[key]
+                self.largest = max(self.largest, block.size)
+                return block
+
+        recorder = Recorder()
+        rois = [roi.CircleROI(30, 25, 3), roi.RectROI.from_center(20, 15, 2)]
+        curves = roi.extract_iv(recorder, rois)
+        np.testing.assert_allclose(curves, roi.extract_iv(self.data, rois))
+        self.assertLessEqual(recorder.largest, 16 * 16 * self.data.shape[2])
+
+    def test_roi_outside_image(self):
+        """ROIs which lie entirely outside the image have no pixels to average."""
+        curves = roi.extract_iv(self.data, [roi.RectROI(-10, -10, -2, -2)])
+        self.assertTrue(np.isnan(curves).all())
+
+
+class TestIVOutput(unittest.TestCase):
+    """Test writing many I(V) curves in a single pass with ivoutput.write_iv()."""
+
+    def setUp(self):
+        """Create a temp output directory and a few curves."""
+        self.outdir = tempfile.mkdtemp()
+        self.elist = [1.0, 1.5, 2.0, 2.5]
+        self.curves = np.arange(12, dtype=float).reshape(3, 4) / 4
+        self.names = ['beam_0', 'beam_0_bkgd_0', 'beam_1']
+
+    def tearDown(self):
+        """Remove temp output directory."""
+        shutil.rmtree(self.outdir)
+
+    def test_per_curve_text_layout(self):
+        """The txt format keeps the original layout of one E / I file per curve."""
+        progress = []
+        paths = ivoutput.write_iv(os.path.join(self.outdir, "run"), self.elist, self.curves, self.names,
+                                  fmt='txt', suffixes=['0', '1', '2'], callback=lambda *args: progress.append(args))
+        self.assertEqual([os.path.basename(path) for path in paths], ['run0.txt', 'run1.txt', 'run2.txt'])
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+        with open(paths[1], 'r') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], 'E\tI')
+        self.assertEqual(lines[1:], ['{0}\t{1}'.format(e, i) for e, i in zip(self.elist, self.curves[1])])
+
+    def test_bulk_formats_round_trip(self):
+        """Wide text and npz output contain every curve in a single file."""
+        outname = os.path.join(self.outdir, "run")
+        tsv, = ivoutput.write_iv(outname, self.elist, self.curves, self.names, fmt='tsv')
+        csv, = ivoutput.write_iv(outname, self.elist, self.curves, self.names, fmt='csv')
+        npz, = ivoutput.write_iv(outname, self.elist, self.curves, self.names, fmt='npz')
+        for path, delimiter in ((tsv, '\t'), (csv, ',')):
+            with open(path, 'r') as f:
+                self.assertEqual(f.readline().strip().split(delimiter), ['E'] + self.names)
+            table = np.loadtxt(path, delimiter=delimiter, skiprows=1)
+            np.testing.assert_allclose(table[:, 0], self.elist)
+            np.testing.assert_allclose(table[:, 1:].T, self.curves)
+        archive = np.load(npz)
+        np.testing.assert_allclose(archive['energy'], self.elist)
+        np.testing.assert_allclose(archive['curves'], self.curves)
+        self.assertEqual(list(archive['names']), self.names)
+
+    @unittest.skipIf(ivoutput.h5py is None, "h5py is not installed")
+    def test_hdf5(self):
+        """HDF5 output holds the same datasets as npz output."""
+        path, = ivoutput.write_iv(os.path.join(self.outdir, "run"), self.elist, self.curves, self.names, fmt='hdf5')
+        with ivoutput.h5py.File(path, 'r') as f:
+            np.testing.assert_allclose(f['curves'][()], self.curves)
+            self.assertEqual([name.decode('utf-8') for name in f['names'][()]], self.names)
+
+
+class TestBatch(unittest.TestCase):
+    """Test headless I(V) extraction with batch.py."""
+
+    height, width, nfiles = (20, 30, 6)
+
+    def setUp(self):
+        """Write two raw LEEM experiments with their YAML files and an ROI YAML file."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.outdir = os.path.join(self.tmpdir, "out")
+        rng = np.random.RandomState(2)
+        self.data = {}
+        self.exp_files = []
+        for name in ("first", "second"):
+            data_path = os.path.join(self.tmpdir, name)
+            os.mkdir(data_path)
+            self.data[name] = rng.randint(0, 4000, size=(self.height, self.width, self.nfiles)).astype('<u2')
+            for idx in range(self.nfiles):
+                with open(os.path.join(data_path, "img_{:03d}.dat".format(idx)), 'wb') as f:
+                    f.write(self.data[name][:, :, idx].tobytes())
+            exp_file = os.path.join(self.tmpdir, name + ".yaml")
+            with open(exp_file, 'w') as f:
+                f.write("Experiment:\n"
+                        "    Type: LEEM\n"
+                        "    Name: {0}\n"
+                        "    Data Type: Raw\n"
+                        "    File Format: .dat\n"
+                        "    Image Parameters: {{Height: {1}, Width: {2}}}\n"
+                        "    Energy Parameters: {{Min: 1.0, Max: 3.5, Step: 0.5}}\n"
+                        "    Data Path: {3}\n"
+                        "    Bit Size: 16\n"
+                        "    Byte Order: L\n".format(name, self.height, self.width, data_path))
+            self.exp_files.append(exp_file)
+        self.roi_file = os.path.join(self.tmpdir, "rois.yaml")
+        with open(self.roi_file, 'w') as f:
+            f.write("ROIs:\n"
+                    "    Points: [[3, 4]]\n"
+                    "    Rectangles: [[12, 8, 5, 2]]\n"
+                    "    Beams: [[15, 10, 2]]\n")
+
+    def tearDown(self):
+        """Remove temp directory."""
+        shutil.rmtree(self.tmpdir)
+
+    def test_parallel_extraction(self):
+        """Every experiment is written to a wide text file with one column per ROI."""
+        status = batch.main(self.exp_files + ['--rois', self.roi_file, '--out', self.outdir,
+                                              '--jobs', '2', '--no-cache'])
+        self.assertEqual(status, 0)
+        for name, data in self.data.items():
+            with open(os.path.join(self.outdir, name + "_IV.txt"), 'r') as f:
+                self.assertEqual(f.readline().split(), ['E', 'point_0', 'rect_0', 'beam_0'])
+            table = np.loadtxt(os.path.join(self.outdir, name + "_IV.txt"), skiprows=1)
+            np.testing.assert_allclose(table[:, 0], [1.0, 1.5, 2.0, 2.5, 3.0, 3.5])
+            np.testing.assert_allclose(table[:, 1], data[4, 3, :])
+            np.testing.assert_allclose(table[:, 2], data[2:9, 5:13, :].mean(axis=(0, 1)))
+            np.testing.assert_allclose(table[:, 3], data[8:13, 13:18, :].mean(axis=(0, 1)))
+
+    def test_does_not_import_qt(self):
+        """The batch module must be usable without PyQt."""
+        out = subprocess.check_output([sys.executable, '-c', "import sys, batch; print('PyQt5' in sys.modules)"],
+                                      cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(out.strip(), b"False")
+
+
 if __name__ == '__main__':
     unittest.main()
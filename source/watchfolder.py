@@ -0,0 +1,113 @@
+"""
+PLEASE - The Python Low-energy Electron Analysis SuitE.
+
+Author: Maxwell Grady
+Affiliation: University of New Hampshire Department of Physics Pohl group
+Version 1.0.0
+Date: October, 2026
+
+Watch a data directory for the files written during data acquisition.
+
+While an experiment is running the detector writes one file per energy into
+the Data Path. A FolderPoller lists the directory each time poll() is called
+and returns the files which have appeared since, in file name order, once
+each has been completely written: its size must be at least the size of one
+image and unchanged since the previous poll. A file which is still being
+written holds back every file after it, so images are always returned in
+order.
+
+The directory is polled rather than watched with an operating system
+notification API so that watching works the same way on every platform and
+on network drives, where change notifications are often not delivered.
+
+This module does not import PyQt; qthreads.WatchThread polls from a QThread.
+"""
+
+import functools
+import os
+
+import numpy as np
+
+import LEEMFUNCTIONS as LF
+
+POLL_INTERVAL = 0.5  # seconds between directory listings
+
+
+class FolderPoller(object):
+    """Find the data files added to a directory since it was last polled."""
+
+    def __init__(self, path, ext='.dat', min_size=0, stride=1):
+        """Setup polling parameters; the directory is not listed until poll() is called.
+
+        :param path: string path to data directory
+        :param ext: string file extension, or tuple of extensions, of the data files
+        :param min_size: integer number of bytes below which a file is still being written
+        :param stride: integer step between the files returned; files in between are skipped
+        """
+        self.path = path
+        self.ext = ext
+        self.min_size = min_size
+        self.stride = LF.check_stride(stride)
+        self.count = 0  # number of complete files found, including those skipped by the stride
+        self._done = set()
+        self._sizes = {}
+
+    def list_files(self):
+        """Return the sorted names of data files in the directory, excluding hidden files."""
+        return sorted(name for name in os.listdir(self.path) if name.endswith(self.ext) and not name.startswith("."))
+
+    def poll(self):
+        """Return the paths of the files which have been completely written since the last poll.
+
+        :return: list of string paths sorted by file name
+        """
+        ready = []
+        blocked = False
+        for name in self.list_files():
+            if name in self._done:
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                blocked = True  # removed since the directory was listed
+                continue
+            complete = size >= self.min_size and self._sizes.get(name) == size
+            self._sizes[name] = size
+            if blocked or not complete:
+                # wait for the next poll; later files keep their sizes so they are not held back again
+                blocked = True
+                continue
+            del self._sizes[name]
+            self._done.add(name)
+            if self.count % self.stride == 0:
+                ready.append(path)
+            self.count += 1
+        return ready
+
+
+def experiment_poller(exp):
+    """Create a FolderPoller and a function reading one image for the Data Path of an experiment.
+
+    Images are cropped and binned as they are read, as set in the experiment.
+    :param exp: experiment.Experiment object
+    :return: tuple (FolderPoller, callable taking a string path and returning a 2d numpy array)
+    """
+    if exp.data_type.lower() == 'raw':
+        formatstring = LF.get_format_string(exp.bit, exp.byte_order)
+        if formatstring is None or not exp.imh or not exp.imw:
+            raise LF.InvalidParameterError
+        min_size = np.dtype(formatstring).itemsize * exp.imh * exp.imw
+        poller = FolderPoller(str(exp.path), ext='.dat', min_size=min_size, stride=exp.energy_stride)
+        bounds = LF.crop_bounds(exp.imh, exp.imw, exp.crop, exp.binning)
+        return poller, functools.partial(LF.read_reduced_frame, ht=exp.imh, wd=exp.imw, formatstring=formatstring,
+                                         bounds=bounds, binning=exp.binning)
+
+    ext = exp.ext if exp.ext not in ('.tif', '.tiff') else ('.tif', '.tiff')
+    poller = FolderPoller(str(exp.path), ext=ext, min_size=1, stride=exp.energy_stride)
+
+    def read_frame(path):
+        frame = LF.read_img(path)
+        bounds = LF.crop_bounds(frame.shape[0], frame.shape[1], exp.crop, exp.binning)
+        return LF.reduce_frame(frame, bounds, exp.binning)
+    return poller, read_frame